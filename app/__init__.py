@@ -2,72 +2,168 @@
 Flask application factory.
 """
 import os
+import click
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_wtf.csrf import CSRFProtect
+from app.jobs import JobQueue
+from app.utils.lifecycle import ServerLifecycle
+from app.utils.metrics import Metrics
+from app.utils.post_stream import PostStream
+from app.utils.rate_limit import RateLimiter
+from app.utils.replicas import RoutingSession
+from app.utils.slow_queries import SlowQueryLog
+from app.utils.startup import StartupProfile
+from app.utils.surrogate import SurrogateCache
+from app.utils.typeahead import Typeahead
 
 # Initialize extensions
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 csrf = CSRFProtect()
+job_queue = JobQueue()
+rate_limiter = RateLimiter()
+metrics = Metrics()
+slow_query_log = SlowQueryLog()
+surrogate_cache = SurrogateCache()
+post_stream = PostStream()
+typeahead = Typeahead()
+lifecycle = ServerLifecycle()
 
 def create_app(config_name='default'):
     """
     Application factory function.
-    
+
     Args:
         config_name (str): Configuration name to use
-        
+
     Returns:
         Flask: Configured Flask application instance
     """
+    profile = StartupProfile()
     app = Flask(__name__)
-    
+    app.extensions['startup_profile'] = profile
+
     # Load configuration
     from config import config
     app.config.from_object(config[config_name])
-    
+
+    # Take the client address and scheme from the trusted proxies' headers
+    if app.config['TRUSTED_PROXY_HOPS']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        hops = app.config['TRUSTED_PROXY_HOPS']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
     # Ensure upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-    
+
     # Initialize extensions
-    db.init_app(app)
-    migrate.init_app(app, db)
-    login_manager.init_app(app)
-    csrf.init_app(app)
-    
+    from app.utils.engine import build_engine_options, configure_engine_options, configure_engine_events, \
+        dispose_inherited_pools
+    from app.utils.replicas import ReplicaRouter, configure_replica_binds
+    with profile.measure('extension', 'sqlalchemy'):
+        configure_engine_options(app)
+        replica_keys = configure_replica_binds(app, build_engine_options)
+        db.init_app(app)
+        configure_engine_events(app, db)
+        ReplicaRouter(
+            db,
+            replica_keys,
+            health_check_interval=app.config['REPLICA_HEALTH_CHECK_INTERVAL'],
+            read_your_writes=app.config['READ_YOUR_WRITES_SECONDS']
+        ).init_app(app)
+    with profile.measure('extension', 'migrate'):
+        init_migrate(app)
+    with profile.measure('extension', 'login'):
+        login_manager.init_app(app)
+    with profile.measure('extension', 'csrf'):
+        csrf.init_app(app)
+    with profile.measure('extension', 'jobs'):
+        job_queue.init_app(app)
+        from app.jobs import tasks  # noqa: F401 (registers the tasks)
+    with profile.measure('extension', 'rate_limiter'):
+        rate_limiter.init_app(app)
+    with profile.measure('extension', 'metrics'):
+        metrics.init_app(app)
+        metrics.instrument_engines(app, db)
+        job_queue.instrument_metrics(app, metrics)
+    with profile.measure('extension', 'slow_query_log'):
+        slow_query_log.init_app(app)
+        slow_query_log.instrument_engines(app, db)
+    with profile.measure('extension', 'surrogate_cache'):
+        surrogate_cache.init_app(app)
+        surrogate_cache.instrument_models(RoutingSession, [User, Post, Category])
+    with profile.measure('extension', 'post_stream'):
+        post_stream.init_app(app)
+        post_stream.instrument_models(RoutingSession, Post)
+    with profile.measure('extension', 'typeahead'):
+        typeahead.init_app(app)
+        typeahead.instrument_models(RoutingSession)
+    with profile.measure('extension', 'lifecycle'):
+        lifecycle.init_app(app)
+        lifecycle.on(app, 'server_ready', metrics.reset)
+        lifecycle.on(app, 'server_ready', typeahead.build)
+        lifecycle.on(app, 'worker_start', dispose_inherited_pools(db))
+        lifecycle.on(app, 'worker_exit', job_queue.shutdown)
+        lifecycle.on(app, 'worker_exit', post_stream.shutdown)
+        lifecycle.on(app, 'worker_exit', metrics.retire)
+
     # Configure login manager
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
     login_manager.login_message_category = 'info'
-    
+
     # Register blueprints
-    from app.views import main_bp
-    from app.auth import auth_bp
-    from app.api import api_bp
-    from app.admin import admin_bp
-    
-    app.register_blueprint(main_bp)
-    app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(api_bp, url_prefix='/api/v1')
-    app.register_blueprint(admin_bp, url_prefix='/admin')
-    
+    with profile.measure('blueprint', 'main'):
+        from app.views import main_bp
+        app.register_blueprint(main_bp)
+    with profile.measure('blueprint', 'auth'):
+        from app.auth import auth_bp
+        app.register_blueprint(auth_bp, url_prefix='/auth')
+    with profile.measure('blueprint', 'api'):
+        from app.api import api_bp
+        app.register_blueprint(api_bp, url_prefix='/api/v1')
+    with profile.measure('blueprint', 'admin'):
+        from app.admin import admin_bp
+        app.register_blueprint(admin_bp, url_prefix='/admin')
+
     # Register error handlers
     from app.errors import register_error_handlers
     register_error_handlers(app)
-    
+
     # Register template filters
     from app.utils import register_template_filters
     register_template_filters(app)
-    
-    # Create database tables
-    with app.app_context():
-        db.create_all()
-    
+
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+
+    # Create database tables (schema is owned by Flask-Migrate in production)
+    if app.config['AUTO_CREATE_TABLES']:
+        with profile.measure('database', 'create_all'):
+            with app.app_context():
+                db.create_all()
+
+    profile.finish()
     return app
 
+def init_migrate(app):
+    """
+    Initialize Flask-Migrate.
+
+    Alembic is expensive to import, so with LAZY_EXTENSIONS enabled the
+    extension is only attached when the app is loaded by the ``flask`` CLI.
+
+    Args:
+        app: Flask application instance
+    """
+    if app.config['LAZY_EXTENSIONS'] and click.get_current_context(silent=True) is None:
+        return
+
+    from flask_migrate import Migrate
+    Migrate(app, db)
+
 # Import models to ensure they are registered with SQLAlchemy
-from app.models import User, Post, Category 
\ No newline at end of file
+from app.models import User, Post, Category
\ No newline at end of file
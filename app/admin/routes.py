@@ -1,11 +1,14 @@
 """
 Admin routes for administrative functions.
 """
-from flask import render_template, redirect, url_for, flash, request, abort
+from flask import render_template, redirect, url_for, flash, request, abort, current_app
 from flask_login import login_required, current_user
 from app.admin import admin_bp
 from app.models import User, Post, Category
 from app import db
+from app.utils.moderation import BulkActionError, filter_args, filter_posts, filter_users, \
+    post_filters, post_list_keys, run_bulk_action, user_filters, user_list_keys
+from app.utils.pagination import keyset_paginate
 
 def admin_required(f):
     """Decorator to require admin privileges."""
@@ -49,13 +52,35 @@ def dashboard():
 @login_required
 @admin_required
 def users():
-    """Admin users management."""
-    page = request.args.get('page', 1, type=int)
-    users = User.query.order_by(User.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    """Admin users management, searchable by username or email prefix."""
+    filters = user_filters(request.args)
+    keys, descending = user_list_keys(filters)
+    users = keyset_paginate(filter_users(User.query, filters), keys, descending=descending,
+                            per_page=20,
+                            after=request.args.get('after', type=int),
+                            before=request.args.get('before', type=int))
     
-    return render_template('admin/users.html', users=users)
+    return render_template('admin/users.html', users=users, filters=filters,
+                           filter_args=filter_args(filters))
+
+@admin_bp.route('/users/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_users():
+    """Apply a moderation action to the selected users or to every user matching the filters."""
+    filters = user_filters(request.form)
+    ids = None if request.form.get('all_matching') else request.form.getlist('ids', type=int)
+    
+    try:
+        changed = run_bulk_action('users', request.form.get('action'), ids=ids, filters=filters,
+                                  exclude_ids=[current_user.id],
+                                  batch_size=current_app.config['BULK_ACTION_BATCH_SIZE'])
+    except BulkActionError as e:
+        flash(str(e), 'error')
+    else:
+        flash(f'{changed} user(s) updated.', 'success')
+    
+    return redirect(url_for('admin.users', **filter_args(filters)))
 
 @admin_bp.route('/users/<int:user_id>/toggle-status', methods=['POST'])
 @login_required
@@ -99,13 +124,34 @@ def toggle_user_admin(user_id):
 @login_required
 @admin_required
 def posts():
-    """Admin posts management."""
-    page = request.args.get('page', 1, type=int)
-    posts = Post.query.order_by(Post.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    """Admin posts management, filterable by status, featured flag, author and category."""
+    filters = post_filters(request.args)
+    keys, descending = post_list_keys(filters)
+    posts = keyset_paginate(filter_posts(Post.query, filters), keys, descending=descending,
+                            per_page=20,
+                            after=request.args.get('after', type=int),
+                            before=request.args.get('before', type=int))
     
-    return render_template('admin/posts.html', posts=posts)
+    return render_template('admin/posts.html', posts=posts, filters=filters,
+                           filter_args=filter_args(filters))
+
+@admin_bp.route('/posts/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_posts():
+    """Apply a moderation action to the selected posts or to every post matching the filters."""
+    filters = post_filters(request.form)
+    ids = None if request.form.get('all_matching') else request.form.getlist('ids', type=int)
+    
+    try:
+        changed = run_bulk_action('posts', request.form.get('action'), ids=ids, filters=filters,
+                                  batch_size=current_app.config['BULK_ACTION_BATCH_SIZE'])
+    except BulkActionError as e:
+        flash(str(e), 'error')
+    else:
+        flash(f'{changed} post(s) updated.', 'success')
+    
+    return redirect(url_for('admin.posts', **filter_args(filters)))
 
 @admin_bp.route('/posts/<int:post_id>/toggle-published', methods=['POST'])
 @login_required
@@ -212,4 +258,20 @@ def delete_category(category_id):
     db.session.commit()
     
     flash('Category deleted successfully!', 'success')
-    return redirect(url_for('admin.categories')) 
\ No newline at end of file
+    return redirect(url_for('admin.categories')) 
+
+@admin_bp.route('/slow-queries')
+@login_required
+@admin_required
+def slow_queries():
+    """Slow query log grouped by statement fingerprint."""
+    from app.utils.slow_queries import aggregate_slow_queries, read_slow_queries
+    
+    config = current_app.config
+    records = read_slow_queries(config['SLOW_QUERY_LOG'], config['SLOW_QUERY_LOG_BACKUPS'])
+    groups = aggregate_slow_queries(records)
+    
+    return render_template('admin/slow_queries.html',
+                         groups=groups,
+                         total=len(records),
+                         threshold=config['SLOW_QUERY_THRESHOLD'])
\ No newline at end of file
@@ -1,11 +1,15 @@
 """
 API routes for RESTful endpoints.
 """
-from flask import jsonify, request, abort
+from flask import Response, jsonify, request, abort, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm.attributes import set_committed_value
 from app.api import api_bp
-from app.models import User, Post, Category
-from app import db
+from app.models import User, Post, Category, ArchiveMonth
+from app import db, post_stream, rate_limiter, surrogate_cache, typeahead
+from app.utils.pagination import paginate
+from app.utils.post_stream import StreamsBusy
+from app.utils.typeahead import MAX_SUGGESTIONS
 
 # API Response Helpers
 def api_response(data=None, message="", status_code=200):
@@ -21,40 +25,90 @@ def api_error(message="An error occurred", status_code=400):
     """Helper function to create error responses."""
     return api_response(message=message, status_code=status_code)
 
+def wants_count():
+    """Check whether the client wants totals (``?count=false`` only needs ``has_next``)."""
+    return request.args.get('count', 'true').lower() != 'false'
+
+def serialize_posts(posts):
+    """
+    Serialize a list of posts for API list responses.
+    
+    By default each post embeds its author and category; they are loaded
+    with one IN query per type and category post counts with one grouped
+    query, however many posts are listed.
+    
+    With ``?include=author,category`` the response is a compound document:
+    posts only carry ``author_id``/``category_id`` and each referenced author
+    and category is sent once under ``included``, loaded with one IN query
+    per type.
+    
+    Args:
+        posts (list): Posts to serialize
+        
+    Returns:
+        dict: 'posts' list, plus 'included' in compound mode
+    """
+    include = {name.strip() for name in request.args.get('include', '').split(',') if name.strip()}
+    if not include:
+        author_ids = {post.author_id for post in posts}
+        category_ids = {post.category_id for post in posts if post.category_id}
+        authors = {user.id: user for user in User.query.filter(User.id.in_(author_ids))} if author_ids else {}
+        categories = {category.id: category
+                      for category in Category.query.filter(Category.id.in_(category_ids))} if category_ids else {}
+        for post in posts:
+            set_committed_value(post, 'author', authors.get(post.author_id))
+            set_committed_value(post, 'category', categories.get(post.category_id))
+        
+        post_counts = Category.get_post_counts(category_ids)
+        return {'posts': [post.to_dict(include_content=False, category_post_counts=post_counts)
+                          for post in posts]}
+    
+    data = {
+        'posts': [post.to_dict(include_content=False, embed_related=False) for post in posts],
+        'included': {}
+    }
+    
+    if 'author' in include:
+        author_ids = {post.author_id for post in posts}
+        authors = User.query.filter(User.id.in_(author_ids)).all() if author_ids else []
+        data['included']['users'] = [author.to_dict() for author in authors]
+    
+    if 'category' in include:
+        category_ids = {post.category_id for post in posts if post.category_id}
+        categories = Category.query.filter(Category.id.in_(category_ids)).all() if category_ids else []
+        post_counts = Category.get_post_counts(category_ids)
+        data['included']['categories'] = [
+            category.to_dict(post_count=post_counts.get(category.id, 0)) for category in categories
+        ]
+    
+    return data
+
 # User API Endpoints
 @api_bp.route('/users', methods=['GET'])
+@surrogate_cache.cacheable('users')
 def get_users():
     """Get all users."""
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
-    users = User.query.paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
-    )
+    users = paginate(User.query.order_by(User.id), page=page, per_page=per_page, count=wants_count())
     
     data = {
         'users': [user.to_dict() for user in users.items],
-        'pagination': {
-            'page': users.page,
-            'pages': users.pages,
-            'per_page': users.per_page,
-            'total': users.total,
-            'has_next': users.has_next,
-            'has_prev': users.has_prev
-        }
+        'pagination': users.to_dict()
     }
     
     return api_response(data=data, message="Users retrieved successfully")
 
 @api_bp.route('/users/<int:user_id>', methods=['GET'])
+@surrogate_cache.cacheable()
 def get_user(user_id):
     """Get a specific user."""
     user = User.query.get_or_404(user_id)
     return api_response(data=user.to_dict(), message="User retrieved successfully")
 
 @api_bp.route('/users', methods=['POST'])
+@rate_limiter.limit('5/hour')
 def create_user():
     """Create a new user."""
     data = request.get_json()
@@ -92,6 +146,7 @@ def create_user():
 
 # Post API Endpoints
 @api_bp.route('/posts', methods=['GET'])
+@surrogate_cache.cacheable('posts')
 def get_posts():
     """Get all posts."""
     page = request.args.get('page', 1, type=int)
@@ -100,41 +155,67 @@ def get_posts():
     author_id = request.args.get('author_id', type=int)
     published_only = request.args.get('published_only', 'true').lower() == 'true'
     
-    query = Post.query
-    
     if published_only:
-        query = query.filter_by(is_published=True)
+        query = Post.published_query(category_id=category_id, author_id=author_id)
+    else:
+        query = Post.query
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        if author_id:
+            query = query.filter_by(author_id=author_id)
+        query = query.order_by(Post.created_at.desc())
     
-    if category_id:
-        query = query.filter_by(category_id=category_id)
+    posts = paginate(query, page=page, per_page=per_page, count=wants_count())
     
-    if author_id:
-        query = query.filter_by(author_id=author_id)
+    data = serialize_posts(posts.items)
+    data['pagination'] = posts.to_dict()
     
-    posts = query.order_by(Post.created_at.desc()).paginate(
-        page=page, 
-        per_page=per_page, 
-        error_out=False
-    )
+    return api_response(data=data, message="Posts retrieved successfully")
+
+@api_bp.route('/posts/trending', methods=['GET'])
+# Short proxy lifetime: trending scores change without writes
+@surrogate_cache.cacheable('posts', surrogate_max_age=60)
+def get_trending_posts():
+    """Get the published posts with the most recent views, hottest first."""
+    limit = min(max(request.args.get('limit', 10, type=int), 1), current_app.config['TRENDING_BOARD_SIZE'])
+    trending = Post.get_trending(limit=limit)
     
-    data = {
-        'posts': [post.to_dict() for post in posts.items],
-        'pagination': {
-            'page': posts.page,
-            'pages': posts.pages,
-            'per_page': posts.per_page,
-            'total': posts.total,
-            'has_next': posts.has_next,
-            'has_prev': posts.has_prev
-        }
-    }
+    data = serialize_posts([post for post, _ in trending])
+    for item, (_, heat) in zip(data['posts'], trending):
+        item['heat'] = round(heat, 3)
     
-    return api_response(data=data, message="Posts retrieved successfully")
+    return api_response(data=data, message="Trending posts retrieved successfully")
+
+@api_bp.route('/posts/stream', methods=['GET'])
+@rate_limiter.limit('30/minute')
+def stream_posts():
+    """Stream newly published posts as server-sent events."""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return api_error("Invalid Last-Event-ID", 400)
+    
+    try:
+        events = post_stream.stream(last_event_id)
+    except StreamsBusy:
+        # EventSource gives up on errors; app.js reconnects after a delay
+        retry = current_app.config['POSTS_STREAM_BUSY_RETRY_SECONDS']
+        response = Response(f'retry: {retry * 1000}\n\n', status=503, mimetype='text/event-stream')
+        response.headers['Retry-After'] = str(retry)
+        return response
+    
+    response = Response(events, mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @api_bp.route('/posts/<int:post_id>', methods=['GET'])
 def get_post(post_id):
     """Get a specific post."""
-    post = Post.query.get_or_404(post_id)
+    post = Post.query.options(db.undefer(Post.content), db.undefer(Post.content_html))\
+                     .get_or_404(post_id)
     
     # Increment view count
     post.increment_view_count()
@@ -170,22 +251,60 @@ def create_post():
     # Generate slug
     from app.utils import generate_slug
     post.slug = generate_slug(post.title)
+    post.update_derived_fields()
     
     db.session.add(post)
     db.session.commit()
     
     return api_response(data=post.to_dict(), message="Post created successfully", status_code=201)
 
+# Archive API Endpoints
+@api_bp.route('/archive', methods=['GET'])
+@surrogate_cache.cacheable('posts')
+def get_archive():
+    """Get the months with published posts and their post counts, newest first."""
+    category_id = request.args.get('category_id', type=int)
+    months = ArchiveMonth.get_months(category_id)
+    
+    return api_response(data=[month.to_dict() for month in months],
+                        message="Archive retrieved successfully")
+
+@api_bp.route('/archive/<int:year>/<int:month>', methods=['GET'])
+@surrogate_cache.cacheable('posts')
+def get_archive_month(year, month):
+    """Get the published posts of one month."""
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        return api_error("Invalid archive month", 404)
+    
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', 10, type=int)
+    category_id = request.args.get('category_id', type=int)
+    
+    # Total from the rollup row instead of a COUNT over the month
+    total = ArchiveMonth.get_count(year, month, category_id)
+    posts = paginate(Post.archive_query(year, month, category_id=category_id),
+                     page=page, per_page=per_page, total=total)
+    
+    data = serialize_posts(posts.items)
+    data['year'] = year
+    data['month'] = month
+    data['pagination'] = posts.to_dict()
+    
+    return api_response(data=data, message="Archive posts retrieved successfully")
+
 # Category API Endpoints
 @api_bp.route('/categories', methods=['GET'])
+@surrogate_cache.cacheable('categories')
 def get_categories():
     """Get all categories."""
     categories = Category.get_active_categories()
-    data = [category.to_dict() for category in categories]
+    post_counts = Category.get_post_counts([category.id for category in categories])
+    data = [category.to_dict(post_count=post_counts.get(category.id, 0)) for category in categories]
     
     return api_response(data=data, message="Categories retrieved successfully")
 
 @api_bp.route('/categories/<int:category_id>', methods=['GET'])
+@surrogate_cache.cacheable()
 def get_category(category_id):
     """Get a specific category."""
     category = Category.query.get_or_404(category_id)
@@ -193,6 +312,8 @@ def get_category(category_id):
 
 # Search API Endpoint
 @api_bp.route('/search', methods=['GET'])
+@rate_limiter.limit('60/minute', key='user')
+@surrogate_cache.cacheable('posts')
 def search_posts():
     """Search posts."""
     query = request.args.get('q', '')
@@ -202,19 +323,150 @@ def search_posts():
     if not query:
         return api_error("Search query is required", 400)
     
-    posts = Post.search_posts(query, page=page, per_page=per_page)
+    posts = Post.search_posts(query, page=page, per_page=per_page, count=wants_count())
     
-    data = {
-        'posts': [post.to_dict() for post in posts.items],
-        'query': query,
-        'pagination': {
-            'page': posts.page,
-            'pages': posts.pages,
-            'per_page': posts.per_page,
-            'total': posts.total,
-            'has_next': posts.has_next,
-            'has_prev': posts.has_prev
-        }
-    }
+    data = serialize_posts(posts.items)
+    data['query'] = query
+    data['pagination'] = posts.to_dict()
+    
+    return api_response(data=data, message="Search completed successfully") 
+
+@api_bp.route('/search/suggest', methods=['GET'])
+@rate_limiter.limit('300/minute')
+def suggest():
+    """Suggest published posts and authors for a typed prefix, from the in-memory index."""
+    query = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 8, type=int), 1), MAX_SUGGESTIONS)
+    
+    data = {'query': query, 'suggestions': typeahead.suggest(query, limit=limit)}
+    return api_response(data=data, message="Suggestions retrieved successfully")
+
+# Bulk Moderation Endpoints
+@api_bp.route('/posts/bulk', methods=['POST'])
+@login_required
+def bulk_posts():
+    """Apply a moderation action to many posts (``ids`` or every post matching ``filter``)."""
+    return bulk_action('posts')
+
+@api_bp.route('/users/bulk', methods=['POST'])
+@login_required
+def bulk_users():
+    """Apply a moderation action to many users (``ids`` or every user matching ``filter``)."""
+    return bulk_action('users')
+
+def bulk_action(kind):
+    """
+    Run a bulk moderation request for posts or users.
+    
+    The body is ``{"action": ..., "ids": [...]}`` or
+    ``{"action": ..., "filter": {...}}`` to target every matching row.
+    """
+    from app.utils.moderation import BulkActionError, post_filters, run_bulk_action, user_filters
+    
+    if not current_user.is_admin:
+        return api_error("Admin privileges required", 403)
+    
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return api_error("The body must be a JSON object", 400)
+    ids = data.get('ids')
+    if ids is None and 'filter' not in data:
+        return api_error("Provide ids or a filter", 400)
+    # bool is a subclass of int, but true/false are not post or user ids
+    if ids is not None and (not isinstance(ids, list) or
+                            not all(isinstance(i, int) and not isinstance(i, bool) for i in ids)):
+        return api_error("ids must be a list of integers", 400)
+    if data.get('filter') is not None and not isinstance(data['filter'], dict):
+        return api_error("filter must be an object", 400)
+    
+    filters = (post_filters if kind == 'posts' else user_filters)(data.get('filter') or {})
+    exclude_ids = [current_user.id] if kind == 'users' else []
+    
+    try:
+        changed = run_bulk_action(kind, data.get('action'), ids=ids, filters=filters,
+                                  exclude_ids=exclude_ids,
+                                  batch_size=current_app.config['BULK_ACTION_BATCH_SIZE'])
+    except BulkActionError as e:
+        return api_error(str(e), 400)
+    
+    return api_response(data={'action': data.get('action'), 'updated': changed},
+                        message=f"{changed} {kind} updated")
+
+# Batch API Endpoint
+@api_bp.route('/batch', methods=['POST'])
+def batch():
+    """Run several API reads in one round trip."""
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('requests'), list):
+        return api_error("A list of requests is required", 400)
+    
+    max_size = current_app.config['API_BATCH_MAX_SIZE']
+    if len(data['requests']) > max_size:
+        return api_error(f"A batch may contain at most {max_size} requests", 413)
+    
+    # Resolve the user once; sub-requests share it through the app context
+    current_user._get_current_object()
+    
+    prefix = request.path.rsplit('/', 1)[0]
+    results = [dispatch_subrequest(item, prefix) for item in data['requests']]
+    
+    return api_response(data=results, message="Batch completed successfully")
+
+def dispatch_subrequest(item, prefix):
+    """
+    Dispatch one batched read to its API view without going through HTTP.
+    
+    Sub-requests reuse the current app context, so they share the loaded
+    user, and skip the before/after request hooks. They carry the client
+    address, cookies and headers of the batch request (rate limits and
+    per-user views see the same client), and the shared database session
+    is rolled back after each one so none leaks state into the next.
+    
+    Args:
+        item (dict): Sub-request with 'path' and optional 'method'
+        prefix (str): API URL prefix for relative paths
+        
+    Returns:
+        dict: Status code and JSON body of the sub-response
+    """
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        return {'path': None, 'status_code': 400, 'body': {'message': 'Each request needs a path'}}
+    
+    path = item['path']
+    method = str(item.get('method', 'GET')).upper()
+    if not path.startswith('/'):
+        path = f'{prefix}/{path}'
+    
+    if not path.startswith(f'{prefix}/'):
+        return {'path': item['path'], 'status_code': 404, 'body': {'message': 'Only API paths can be batched'}}
+    
+    if method != 'GET':
+        return {'path': item['path'], 'status_code': 405, 'body': {'message': 'Only GET requests can be batched'}}
+    
+    headers = [(name, value) for name, value in request.headers
+               if name.lower() not in ('host', 'content-type', 'content-length')]
+    environ_base = {'REMOTE_ADDR': request.remote_addr}
+    
+    with current_app.test_request_context(path, method=method, base_url=request.url_root,
+                                          headers=headers, environ_base=environ_base):
+        try:
+            if request.routing_exception is not None:
+                raise request.routing_exception
+            
+            endpoint = request.url_rule.endpoint
+            if not endpoint.startswith(f'{api_bp.name}.') or endpoint == f'{api_bp.name}.batch':
+                abort(404)
+            
+            rv = current_app.view_functions[endpoint](**request.view_args)
+        except Exception as e:
+            rv = current_app.handle_user_exception(e)
+        
+        response = current_app.make_response(rv)
+        db.session.rollback()
     
-    return api_response(data=data, message="Search completed successfully") 
\ No newline at end of file
+    return {
+        'path': item['path'],
+        'status_code': response.status_code,
+        'body': response.get_json(silent=True)
+    }
\ No newline at end of file
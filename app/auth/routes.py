@@ -7,12 +7,15 @@ from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.urls import url_parse
 from app.auth import auth_bp
 from app.models import User
-from app.forms import LoginForm, RegistrationForm, ProfileForm
-from app import db
+from app import db, rate_limiter
+from app.utils.pagination import paginate
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
+@rate_limiter.limit('10/minute', methods=['POST'])
 def login():
     """User login route."""
+    from app.forms import LoginForm
+    
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
@@ -29,9 +32,9 @@ def login():
         
         login_user(user, remember=form.remember_me.data)
         
-        # Update last login time
-        user.last_login = datetime.utcnow()
-        db.session.commit()
+        # Update last login time in the background
+        from app.jobs.tasks import record_user_login
+        record_user_login.delay(user.id, datetime.utcnow().isoformat())
         
         next_page = request.args.get('next')
         if not next_page or url_parse(next_page).netloc != '':
@@ -43,8 +46,11 @@ def login():
     return render_template('auth/login.html', form=form)
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
+@rate_limiter.limit('5/hour', methods=['POST'])
 def register():
     """User registration route."""
+    from app.forms import RegistrationForm
+    
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
@@ -93,6 +99,8 @@ def profile():
 @login_required
 def edit_profile():
     """Edit user profile."""
+    from app.forms import ProfileForm
+    
     form = ProfileForm(obj=current_user)
     
     if form.validate_on_submit():
@@ -126,9 +134,7 @@ def user_profile(username):
     # Get user's published posts
     from app.models import Post
     page = request.args.get('page', 1, type=int)
-    posts = Post.query.filter_by(author_id=user.id, is_published=True)\
-                     .order_by(Post.created_at.desc())\
-                     .paginate(page=page, per_page=10, error_out=False)
+    posts = paginate(Post.published_query(author_id=user.id), page=page, per_page=10)
     
     return render_template('auth/user_profile.html', user=user, posts=posts)
 
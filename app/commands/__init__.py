@@ -0,0 +1,33 @@
+"""
+CLI commands package for ``flask`` subcommands.
+"""
+from .startup import startup_profile
+from .benchmarks import benchmark
+from .replicas import replica
+from .posts import posts
+from .users import users
+from .export import export_static
+from .imports import import_data
+from .jobs import jobs
+from .query_plans import check_query_plans
+from .seed import seed
+from .trending import trending
+
+def register_commands(app):
+    """
+    Register custom CLI commands with the Flask app.
+    
+    Args:
+        app: Flask application instance
+    """
+    app.cli.add_command(startup_profile)
+    app.cli.add_command(benchmark)
+    app.cli.add_command(replica)
+    app.cli.add_command(posts)
+    app.cli.add_command(users)
+    app.cli.add_command(export_static)
+    app.cli.add_command(import_data)
+    app.cli.add_command(jobs)
+    app.cli.add_command(check_query_plans)
+    app.cli.add_command(seed)
+    app.cli.add_command(trending)
\ No newline at end of file
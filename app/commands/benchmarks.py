@@ -0,0 +1,182 @@
+"""
+Benchmark commands for performance-sensitive subsystems.
+"""
+import os
+import random
+import tempfile
+import threading
+import time
+import click
+
+@click.group('benchmark')
+def benchmark():
+    """Run micro-benchmarks."""
+
+@benchmark.command('sqlite-concurrency')
+@click.option('--threads', default=8, show_default=True, help='Concurrent worker threads.')
+@click.option('--seconds', default=5.0, show_default=True, help='Duration of each run.')
+@click.option('--write-ratio', default=0.2, show_default=True, help='Fraction of operations that write.')
+def sqlite_concurrency(threads, seconds, write_ratio):
+    """Compare SQLite throughput with default and tuned engine settings."""
+    from flask import current_app
+    from sqlalchemy import create_engine
+    from app.utils.engine import build_engine_options, apply_sqlite_pragmas
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = []
+        
+        default_url = f"sqlite:///{os.path.join(tmp, 'default.db')}"
+        runs.append(('default', create_engine(default_url)))
+        
+        tuned_url = f"sqlite:///{os.path.join(tmp, 'tuned.db')}"
+        tuned = create_engine(tuned_url, **build_engine_options(current_app.config, tuned_url))
+        apply_sqlite_pragmas(tuned, current_app.config['SQLITE_PRAGMAS'])
+        runs.append(('tuned', tuned))
+        
+        click.echo(f'{"engine":<10}{"ops/s":>12}{"reads":>10}{"writes":>10}{"errors":>8}')
+        for name, engine in runs:
+            result = _run_mixed_workload(engine, threads, seconds, write_ratio)
+            click.echo(f'{name:<10}{result["ops"] / seconds:>12.1f}'
+                       f'{result["reads"]:>10}{result["writes"]:>10}{result["errors"]:>8}')
+            engine.dispose()
+
+def _run_mixed_workload(engine, threads, seconds, write_ratio):
+    """Run concurrent readers and writers against a scratch table."""
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE bench (id INTEGER PRIMARY KEY, payload TEXT)'))
+        conn.execute(text('INSERT INTO bench (payload) VALUES (:p)'),
+                     [{'p': 'x' * 200} for _ in range(1000)])
+    
+    totals = {'ops': 0, 'reads': 0, 'writes': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+    
+    def worker(seed):
+        rng = random.Random(seed)
+        counts = {'ops': 0, 'reads': 0, 'writes': 0, 'errors': 0}
+        while time.perf_counter() < deadline:
+            try:
+                if rng.random() < write_ratio:
+                    with engine.begin() as conn:
+                        conn.execute(text('INSERT INTO bench (payload) VALUES (:p)'), {'p': 'y' * 200})
+                    counts['writes'] += 1
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(text('SELECT payload FROM bench WHERE id = :id'),
+                                     {'id': rng.randint(1, 1000)}).fetchone()
+                    counts['reads'] += 1
+                counts['ops'] += 1
+            except OperationalError:
+                counts['errors'] += 1
+        with lock:
+            for key, value in counts.items():
+                totals[key] += value
+    
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    
+    return totals
+
+@benchmark.command('rate-limiter')
+@click.option('--iterations', default=100000, show_default=True, help='Checks per store.')
+@click.option('--clients', default=1000, show_default=True, help='Distinct bucket keys.')
+def rate_limiter(iterations, clients):
+    """Measure the cost of one rate-limit check per bucket store."""
+    from app.utils.rate_limit import MemoryBucketStore, MmapBucketStore
+    
+    keys = [f'api.search_posts:ip:10.0.{i // 256}.{i % 256}' for i in range(clients)]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = [
+            ('memory', MemoryBucketStore()),
+            ('mmap', MmapBucketStore(os.path.join(tmp, 'ratelimit.bin')))
+        ]
+        
+        click.echo(f'{"store":<10}{"checks":>10}{"us/check":>12}')
+        for name, store in stores:
+            start = time.perf_counter()
+            for i in range(iterations):
+                store.consume(keys[i % clients], 60, 1.0)
+            elapsed = time.perf_counter() - start
+            click.echo(f'{name:<10}{iterations:>10}{elapsed / iterations * 1_000_000:>12.2f}')
+
+def _credentials(value):
+    """Split a ``username:password`` option."""
+    if not value:
+        return None
+    username, sep, password = value.partition(':')
+    if not sep:
+        raise click.BadParameter('expected username:password')
+    return username, password
+
+@benchmark.command('load')
+@click.option('--url', default='http://127.0.0.1:8000', show_default=True, help='Base URL of the running server.')
+@click.option('--users', default=20, show_default=True, help='Concurrent virtual users.')
+@click.option('--duration', default=30.0, show_default=True, help='Seconds to run.')
+@click.option('--mix', default='browse=70,search=20,author=5,admin=5', show_default=True,
+              help='Scenario weights.')
+@click.option('--author', help='username:password of the account creating posts.')
+@click.option('--admin', help='username:password of an admin account.')
+@click.option('--think-time', default=0.5, show_default=True, help='Mean seconds between page views.')
+@click.option('--seed', type=int, help='Random seed for a repeatable run.')
+@click.option('--histogram/--no-histogram', default=True, help='Print latency histograms per route.')
+@click.option('--json', 'json_path', type=click.Path(dir_okay=False), help='Also write the report as JSON.')
+def load(url, users, duration, mix, author, admin, think_time, seed, histogram, json_path):
+    """Run mixed-traffic scenarios against a running server and report per route."""
+    import json
+    from app.utils.loadtest import HTTPError, LoadTest, parse_mix
+    
+    try:
+        test = LoadTest(url, users=users, duration=duration, mix=parse_mix(mix),
+                        author=_credentials(author), admin=_credentials(admin),
+                        think_time=think_time, seed=seed)
+        report = test.run()
+    except (ValueError, RuntimeError, OSError, HTTPError) as e:
+        raise click.ClickException(str(e))
+    
+    elapsed = report['elapsed']
+    routes = report['routes']
+    scenarios = ', '.join(f'{name}={count}' for name, count in sorted(report['scenarios'].items()))
+    click.echo(f'{users} users ({scenarios}) for {elapsed:.1f}s against {url}\n')
+    
+    click.echo(f'{"route":<26}{"requests":>10}{"req/s":>9}{"errors":>8}'
+               f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"max ms":>9}')
+    for route, stats in sorted(routes.items()):
+        click.echo(f'{route:<26}{stats.requests:>10}{stats.requests / elapsed:>9.1f}'
+                   f'{stats.error_rate:>8.1%}{stats.percentile(50):>9.1f}{stats.percentile(95):>9.1f}'
+                   f'{stats.percentile(99):>9.1f}{max(stats.latencies, default=0):>9.1f}')
+    
+    total = sum(stats.requests for stats in routes.values())
+    errors = sum(stats.errors for stats in routes.values())
+    click.echo(f'{"total":<26}{total:>10}{total / elapsed:>9.1f}{errors / total if total else 0:>8.1%}')
+    
+    if histogram:
+        for route, stats in sorted(routes.items()):
+            click.echo(f'\n{route}  (status: {dict(stats.statuses)})')
+            peak = max((count for _, count in stats.histogram()), default=0) or 1
+            for bound, count in stats.histogram():
+                label = f'<= {bound} ms' if bound is not None else '> 5000 ms'
+                click.echo(f'  {label:>12} {count:>8} {"#" * round(count / peak * 40)}')
+    
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({
+                'url': url,
+                'elapsed': elapsed,
+                'scenarios': report['scenarios'],
+                'routes': {route: {
+                    'requests': stats.requests,
+                    'errors': stats.errors,
+                    'statuses': {str(k): v for k, v in stats.statuses.items()},
+                    'p50': stats.percentile(50),
+                    'p95': stats.percentile(95),
+                    'p99': stats.percentile(99),
+                    'histogram': stats.histogram()
+                } for route, stats in routes.items()}
+            }, f, indent=2)
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Static site export command.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+@click.command('export-static')
+@click.argument('output_dir', required=False)
+@click.option('--incremental', is_flag=True,
+              help='Only re-render pages affected by posts changed since the last export.')
+@with_appcontext
+def export_static(output_dir, incremental):
+    """Render the public pages to a directory tree for the web server."""
+    from app.utils.static_export import StaticExporter
+    
+    output_dir = output_dir or current_app.config['STATIC_EXPORT_FOLDER']
+    exporter = StaticExporter(current_app._get_current_object(), output_dir)
+    was_incremental = exporter.export(incremental=incremental)
+    
+    if incremental and not was_incremental:
+        click.echo('No previous export found, exported everything.')
+    
+    for path, query, status_code in exporter.failures:
+        click.echo(f'Failed to render {path} {query or ""}: HTTP {status_code}', err=True)
+    
+    click.echo(f'Wrote {exporter.written} pages to {output_dir}.')
+    
+    if exporter.failures:
+        raise click.ClickException(f'{len(exporter.failures)} pages failed to render.')
@@ -0,0 +1,102 @@
+"""
+Content import commands.
+"""
+import json
+import click
+from flask.cli import with_appcontext
+
+@click.group('import')
+def import_data():
+    """Import content exported from other systems."""
+
+@import_data.command('posts')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['jsonl', 'csv']),
+              help='Input format (default: from the file extension).')
+@click.option('--batch-size', default=500, show_default=True, help='Posts per INSERT and commit.')
+@click.option('--default-author', help='Username or email for records without a known author.')
+@click.option('--create-categories', is_flag=True, help='Create unknown categories instead of rejecting.')
+@click.option('--checkpoint', 'checkpoint_path', help='Checkpoint file (default: <path>.checkpoint).')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start over.')
+@click.option('--rejects', type=click.Path(dir_okay=False),
+              help='Append rejected records, with the reason, to this JSON lines file.')
+@with_appcontext
+def import_posts(path, fmt, batch_size, default_author, create_categories, checkpoint_path,
+                 restart, rejects):
+    """Stream posts from a JSON lines or CSV file, resuming after a crash."""
+    from app import db, surrogate_cache
+    from app.models import Post
+    from app.models.archive import apply_archive_deltas, archive_deltas
+    from app.utils.importing import Checkpoint, Lookups, RecordError, allocate_slugs, build_row, \
+        detect_format, read_records
+    
+    fmt = fmt or detect_format(path)
+    checkpoint_path = checkpoint_path or f'{path}.checkpoint'
+    try:
+        checkpoint = Checkpoint(checkpoint_path, path) if restart else Checkpoint.load(checkpoint_path, path)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    statement = Post.__table__.insert()
+    rejects_file = open(rejects, 'a', encoding='utf-8') if rejects else None
+    
+    try:
+        with db.engine.connect() as connection:
+            if checkpoint.pending:
+                committed = checkpoint.recover(connection)
+                click.echo(f'Recovered the interrupted batch ({"committed" if committed else "rolled back"}).')
+            if checkpoint.offset:
+                click.echo(f'Resuming at byte {checkpoint.offset} '
+                           f'({checkpoint.imported} imported, {checkpoint.rejected} rejected so far).')
+            
+            try:
+                lookups = Lookups(connection, default_author, create_categories)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+            connection.commit()
+            
+            def flush(rows, offset, rejected):
+                if rows:
+                    allocate_slugs(connection, rows)
+                    checkpoint.begin(offset, rows[-1]['slug'], len(rows), rejected)
+                    connection.execute(statement, rows)
+                    # Same transaction, so the rollup counts exactly the committed batches
+                    apply_archive_deltas(connection, archive_deltas(rows))
+                    connection.commit()
+                if rejects_file:
+                    rejects_file.flush()
+                checkpoint.advance(offset, len(rows), rejected)
+                click.echo(f'Imported {checkpoint.imported} posts ({checkpoint.rejected} rejected)...')
+            
+            rows = []
+            rejected = 0
+            offset = checkpoint.offset
+            
+            for record, offset in read_records(path, fmt, checkpoint.offset):
+                try:
+                    if isinstance(record, RecordError):
+                        raise record
+                    rows.append(build_row(record, lookups))
+                except RecordError as e:
+                    rejected += 1
+                    if rejects_file:
+                        rejects_file.write(json.dumps({'offset': offset, 'error': str(e),
+                                                       'record': record if isinstance(record, dict) else None},
+                                                      default=str) + '\n')
+                
+                if len(rows) >= batch_size:
+                    flush(rows, offset, rejected)
+                    rows = []
+                    rejected = 0
+            
+            if rows or rejected or offset != checkpoint.offset:
+                flush(rows, offset, rejected)
+    finally:
+        if rejects_file:
+            rejects_file.close()
+    
+    checkpoint.remove()
+    surrogate_cache.purge(['posts', 'categories'] if lookups.categories_created else ['posts'])
+    click.echo(f'Imported {checkpoint.imported} posts, rejected {checkpoint.rejected}, '
+               f'created {lookups.categories_created} categories.')
+    click.echo('Rendered HTML is built on first view, or now with: flask posts rerender')
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""
+Background job queue commands.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+@click.group('jobs')
+def jobs():
+    """Inspect and run the background job queue."""
+
+@jobs.command('stats')
+@with_appcontext
+def stats():
+    """Show the queue depth and job counters of the running server."""
+    from app import job_queue
+    
+    for key, value in job_queue.stats().items():
+        click.echo(f'{key:<12}{value}')
+
+@jobs.command('work')
+@with_appcontext
+def work():
+    """Run workers for the durable SQLite queue in the foreground."""
+    backend = current_app.extensions['job_queue']
+    if backend.name != 'sqlite':
+        raise click.ClickException('flask jobs work requires JOBS_BACKEND=sqlite.')
+    
+    click.echo(f'Processing jobs from {backend.path} with {backend.worker_count} workers (Ctrl+C to stop).')
+    backend.run_forever()
@@ -0,0 +1,121 @@
+"""
+Post maintenance commands.
+"""
+import os
+import click
+from flask.cli import with_appcontext
+
+@click.group('posts')
+def posts():
+    """Maintain stored post data."""
+
+@posts.command('backfill-derived')
+@click.option('--batch-size', default=500, show_default=True, help='Posts updated per commit.')
+@with_appcontext
+def backfill_derived(batch_size):
+    """Recompute summary, word count and reading time for every post."""
+    from app import db
+    from app.models import Post
+    
+    last_id = 0
+    updated = 0
+    
+    while True:
+        batch = Post.query.options(db.undefer(Post.content))\
+                          .filter(Post.id > last_id)\
+                          .order_by(Post.id)\
+                          .limit(batch_size).all()
+        if not batch:
+            break
+        
+        for post in batch:
+            post.update_derived_fields()
+        
+        last_id = batch[-1].id
+        updated += len(batch)
+        
+        db.session.commit()
+        db.session.expunge_all()
+        click.echo(f'Updated {updated} posts...')
+    
+    click.echo(f'Backfilled derived fields for {updated} posts.')
+
+@posts.command('rerender')
+@click.option('--all', 'rerender_all', is_flag=True, help='Re-render every post, not only stale ones.')
+@click.option('--workers', default=None, type=int, help='Render processes (default: CPU count).')
+@click.option('--batch-size', default=200, show_default=True, help='Posts per commit.')
+@with_appcontext
+def rerender(rerender_all, workers, batch_size):
+    """Re-render stored post HTML, summaries and word counts in parallel (e.g. after a renderer upgrade)."""
+    from concurrent.futures import ProcessPoolExecutor
+    from app import db
+    from app.models import Post
+    from app.models.post import derived_fields
+    from app.utils.rendering import RENDERER_VERSION, render_content_batch
+    
+    query = db.session.query(Post.id, Post.content, Post.excerpt, Post.updated_at)
+    if not rerender_all:
+        query = query.filter(db.or_(Post.renderer_version.is_(None),
+                                    Post.renderer_version != RENDERER_VERSION))
+    
+    last_id = 0
+    rendered = 0
+    workers = workers or os.cpu_count() or 1
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            rows = query.filter(Post.id > last_id).order_by(Post.id).limit(batch_size).all()
+            if not rows:
+                break
+            
+            last_id = rows[-1].id
+            updated_at = {row.id: row.updated_at for row in rows}
+            excerpts = {row.id: row.excerpt for row in rows}
+            items = [(row.id, row.content) for row in rows]
+            chunks = [items[i::workers] for i in range(workers)]
+            
+            updates = []
+            for results in executor.map(render_content_batch, [chunk for chunk in chunks if chunk]):
+                for post_id, digest, html, text in results:
+                    updates.append({
+                        'id': post_id,
+                        'content_html': html,
+                        'content_hash': digest,
+                        'renderer_version': RENDERER_VERSION,
+                        'updated_at': updated_at[post_id],
+                        **derived_fields(text, excerpts[post_id])
+                    })
+            
+            db.session.execute(db.update(Post), updates)
+            db.session.commit()
+            
+            rendered += len(updates)
+            click.echo(f'Rendered {rendered} posts...')
+    
+    click.echo(f'Re-rendered {rendered} posts with renderer version {RENDERER_VERSION}.')
+
+@posts.command('rebuild-archive')
+@with_appcontext
+def rebuild_archive_command():
+    """Recount the monthly archive rollup from the posts table."""
+    from app import db
+    from app.models import ArchiveMonth
+    from app.models.archive import rebuild_archive
+    
+    with db.engine.begin() as connection:
+        rebuild_archive(connection)
+    
+    click.echo(f'Rebuilt {ArchiveMonth.query.count()} archive rows.')
+
+@posts.command('prune-events')
+@with_appcontext
+def prune_events():
+    """Delete post stream events older than POSTS_STREAM_RETENTION_HOURS."""
+    from flask import current_app
+    from app import db
+    from app.models.post_event import prune
+    
+    with db.engine.begin() as connection:
+        deleted = prune(connection, current_app.config['POSTS_STREAM_RETENTION_HOURS'])
+    
+    click.echo(f'Deleted {deleted} post stream events.')
\ No newline at end of file
@@ -0,0 +1,28 @@
+"""
+Query plan regression check.
+"""
+import click
+from flask.cli import with_appcontext
+
+@click.command('check-query-plans')
+@click.option('--verbose', '-v', is_flag=True, help='Show the plan of every query.')
+@with_appcontext
+def check_query_plans(verbose):
+    """Fail when a hot query falls back to a full table scan or a temp b-tree sort."""
+    from app import db
+    from app.utils.query_plans import check_query_plans as run_checks, hot_queries
+    
+    results = run_checks(db.metadata, hot_queries())
+    failed = 0
+    
+    for name, (details, problems) in results.items():
+        click.echo(f'{"FAIL" if problems else "ok":<6}{name}')
+        if problems:
+            failed += 1
+        for detail in details if verbose else problems:
+            click.echo(f'        {detail}')
+    
+    if failed:
+        raise click.ClickException(f'{failed} of {len(results)} queries need a table scan or a sort.')
+    
+    click.echo(f'All {len(results)} query plans use indexes.')
\ No newline at end of file
@@ -0,0 +1,54 @@
+"""
+Read replica management commands.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+@click.group('replica')
+def replica():
+    """Inspect and manage read replicas."""
+
+@replica.command('status')
+@with_appcontext
+def status():
+    """Probe every replica and show whether it is healthy."""
+    from app import db
+    
+    router = current_app.extensions['replica_router']
+    if not router.bind_keys:
+        click.echo('No read replicas configured (set DATABASE_REPLICA_URLS).')
+        return
+    
+    engines = db.engines
+    for key in router.bind_keys:
+        healthy = router.is_healthy(key, engines[key], force=True)
+        click.echo(f'{key:<12}{engines[key].url!r:<50}{"up" if healthy else "down"}')
+
+@replica.command('sync')
+@with_appcontext
+def sync():
+    """Copy the primary SQLite database onto each SQLite replica (local testing)."""
+    from app import db
+    
+    router = current_app.extensions['replica_router']
+    primary = db.engines[None]
+    if primary.dialect.name != 'sqlite':
+        raise click.ClickException('replica sync only supports SQLite primaries.')
+    
+    source = primary.raw_connection()
+    try:
+        for key in router.bind_keys:
+            engine = db.engines[key]
+            if engine.dialect.name != 'sqlite':
+                click.echo(f'Skipping {key}: not an SQLite database.')
+                continue
+            
+            target = engine.raw_connection()
+            try:
+                source.driver_connection.backup(target.driver_connection)
+            finally:
+                target.close()
+            click.echo(f'Synced primary to {key} ({engine.url}).')
+    finally:
+        source.close()
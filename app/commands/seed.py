@@ -0,0 +1,95 @@
+"""
+Fixture generation command for production-sized local datasets.
+"""
+from time import perf_counter
+import click
+from flask.cli import with_appcontext
+
+@click.command('seed')
+@click.option('--users', default=1000, show_default=True, help='Users to generate.')
+@click.option('--categories', default=12, show_default=True, help='Categories to generate.')
+@click.option('--posts', default=10000, show_default=True, help='Posts to generate.')
+@click.option('--seed', default=42, show_default=True, help='Random seed; equal seeds give equal datasets.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows per INSERT and commit.')
+@click.option('--min-words', default=150, show_default=True, help='Shortest post body.')
+@click.option('--max-words', default=1200, show_default=True, help='Longest post body.')
+@click.option('--publish-ratio', default=0.8, show_default=True, help='Fraction of posts published.')
+@click.option('--featured-ratio', default=0.02, show_default=True, help='Fraction of published posts featured.')
+@click.option('--views-alpha', default=1.2, show_default=True,
+              help='Pareto shape of view counts (lower is a longer tail).')
+@click.option('--views-scale', default=25, show_default=True, help='Typical view count of a published post.')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default='2025-01-01', show_default=True,
+              help='Newest creation date.')
+@click.option('--days', default=365, show_default=True, help='Days of history before --until.')
+@click.option('--password', default='password', show_default=True, help='Password of every generated user.')
+@click.option('--reset', is_flag=True, help='Drop and recreate all tables first.')
+@click.option('--yes', is_flag=True, help='Do not ask before --reset drops the tables.')
+@click.option('--defer-indexes/--keep-indexes', default=True, show_default=True,
+              help='Build non-unique indexes after loading each table.')
+@click.option('--analyze/--no-analyze', default=True, show_default=True,
+              help='Refresh planner statistics afterwards.')
+@with_appcontext
+def seed(users, categories, posts, seed, batch_size, min_words, max_words, publish_ratio,
+         featured_ratio, views_alpha, views_scale, until, days, password, reset, yes,
+         defer_indexes, analyze):
+    """Generate users, categories and posts with bulk inserts."""
+    from contextlib import nullcontext
+    from werkzeug.security import generate_password_hash
+    from app import db, surrogate_cache
+    from app.models import Category, Post, User
+    from app.models.archive import rebuild_archive
+    from app.utils.seeding import SeedOptions, bulk_load_settings, category_rows, deferred_indexes, \
+        insert_rows, next_id, post_rows, user_rows
+    
+    if reset:
+        if not yes:
+            click.confirm('Drop every table and its data?', abort=True)
+        db.drop_all()
+        db.create_all()
+    
+    options = SeedOptions(seed=seed, until=until, days=days, min_words=min_words, max_words=max_words,
+                          publish_ratio=publish_ratio, featured_ratio=featured_ratio,
+                          views_alpha=views_alpha, views_scale=views_scale)
+    user_table, category_table, post_table = User.__table__, Category.__table__, Post.__table__
+    started = perf_counter()
+    
+    def progress(label, total):
+        def report(inserted, elapsed):
+            click.echo(f'\r{label}: {inserted}/{total} ({inserted / max(elapsed, 1e-9):,.0f} rows/s)',
+                       nl=inserted >= total)
+        return report
+    
+    with db.engine.connect() as connection, bulk_load_settings(connection):
+        def load(table, rows, total):
+            if not total:
+                return
+            with deferred_indexes(connection, table) if defer_indexes else nullcontext():
+                insert_rows(connection, table, rows, batch_size, progress(table.name, total))
+        
+        load(user_table, user_rows(options, next_id(connection, user_table), users,
+                                   generate_password_hash(password)), users)
+        load(category_table, category_rows(options, next_id(connection, category_table), categories),
+             categories)
+        
+        if posts:
+            author_ids = connection.execute(db.select(User.id).order_by(User.id)).scalars().all()
+            category_ids = connection.execute(db.select(Category.id).order_by(Category.id)).scalars().all()
+            if not author_ids:
+                raise click.ClickException('Posts need at least one user (use --users).')
+            
+            load(post_table, post_rows(options, next_id(connection, post_table), posts,
+                                       author_ids, category_ids), posts)
+            
+            # Core inserts skip the ORM events that maintain the archive rollup
+            rebuild_archive(connection)
+            connection.commit()
+        
+        if analyze:
+            connection.exec_driver_sql('ANALYZE')
+            connection.commit()
+    
+    surrogate_cache.purge(['users', 'categories', 'posts'])
+    
+    elapsed = perf_counter() - started
+    total = users + categories + posts
+    click.echo(f'Seeded {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s).')
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Startup profiling command.
+"""
+import json
+import os
+import subprocess
+import sys
+import click
+
+# (kind, startup step name, module imported for it)
+PROFILED_COMPONENTS = [
+    ('extension', 'sqlalchemy', 'flask_sqlalchemy'),
+    ('extension', 'migrate', 'flask_migrate'),
+    ('extension', 'login', 'flask_login'),
+    ('extension', 'csrf', 'flask_wtf'),
+    ('blueprint', 'main', 'app.views'),
+    ('blueprint', 'auth', 'app.auth'),
+    ('blueprint', 'api', 'app.api'),
+    ('blueprint', 'admin', 'app.admin'),
+    ('package', 'models', 'app.models'),
+    ('package', 'forms', 'app.forms')
+]
+
+PROFILE_SCRIPT = (
+    'import json, sys\n'
+    'from app import create_app\n'
+    'app = create_app(sys.argv[1])\n'
+    'print(json.dumps(app.extensions["startup_profile"].to_dict()))\n'
+)
+
+@click.command('startup-profile')
+@click.option('--config', 'config_name', default=lambda: os.getenv('FLASK_ENV', 'development'),
+              help='Configuration name to boot the application with.')
+def startup_profile(config_name):
+    """Report import and init time per extension and blueprint."""
+    from app.utils.startup import parse_import_times
+    
+    # Boot in a fresh interpreter so imports are measured cold
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT, config_name],
+        capture_output=True,
+        text=True
+    )
+    
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        click.echo('\n'.join(errors), err=True)
+        raise click.ClickException('Application failed to start.')
+    
+    profile = json.loads(result.stdout.strip().splitlines()[-1])
+    import_times = parse_import_times(result.stderr, [c[2] for c in PROFILED_COMPONENTS])
+    init_times = {(step['kind'], step['name']): step['seconds'] for step in profile['steps']}
+    
+    click.echo(f'Startup profile ({config_name})')
+    click.echo(f'{"kind":<12}{"name":<14}{"import ms":>12}{"init ms":>12}')
+    
+    for kind, name, module in PROFILED_COMPONENTS:
+        init = init_times.pop((kind, name), None)
+        click.echo(f'{kind:<12}{name:<14}{_ms(import_times.get(module)):>12}{_ms(init):>12}')
+    
+    # Remaining steps have no import of their own (e.g. create_all)
+    for (kind, name), seconds in init_times.items():
+        click.echo(f'{kind:<12}{name:<14}{_ms(None):>12}{_ms(seconds):>12}')
+    
+    click.echo(f'create_app total: {_ms(profile["total"])} ms')
+
+def _ms(seconds):
+    """Format seconds as milliseconds for the report."""
+    if seconds is None:
+        return '-'
+    return f'{seconds * 1000:.1f}'
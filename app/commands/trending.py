@@ -0,0 +1,50 @@
+"""
+Trending score maintenance commands.
+"""
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+@click.group('trending')
+def trending():
+    """Maintain trending post scores."""
+
+@trending.command('show')
+@click.option('--limit', default=10, show_default=True, help='Posts to list.')
+@with_appcontext
+def show(limit):
+    """List the hottest posts with their decayed view counts."""
+    from app.models import Post
+    
+    for post, heat in Post.get_trending(limit=limit):
+        click.echo(f'{heat:10.2f}  {post.id:>7}  {post.title}')
+
+@trending.command('rebuild')
+@with_appcontext
+def rebuild():
+    """Recompute every score from the hour buckets (e.g. after changing the half-life)."""
+    from app import db
+    from app.models.trending import rebuild_scores
+    from app.utils.trending import get_trending_board
+    
+    with db.engine.begin() as connection:
+        scored = rebuild_scores(connection, current_app.config['TRENDING_HALF_LIFE_HOURS'])
+    get_trending_board().clear()
+    
+    click.echo(f'Rebuilt trending scores of {scored} posts.')
+
+@trending.command('prune')
+@click.option('--min-heat', default=0.001, show_default=True,
+              help='Drop scores that decayed below this many views.')
+@with_appcontext
+def prune(min_heat):
+    """Delete expired hour buckets and scores that decayed to nothing."""
+    from app import db
+    from app.models.trending import prune as prune_trending
+    
+    config = current_app.config
+    with db.engine.begin() as connection:
+        buckets, scores = prune_trending(connection, config['TRENDING_HALF_LIFE_HOURS'],
+                                         config['TRENDING_RETENTION_DAYS'], min_heat=min_heat)
+    
+    click.echo(f'Deleted {buckets} hour buckets and {scores} cold scores.')
\ No newline at end of file
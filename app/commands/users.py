@@ -0,0 +1,43 @@
+"""
+User maintenance commands.
+"""
+import click
+from flask.cli import with_appcontext
+
+@click.group('users')
+def users():
+    """Maintain stored user data."""
+
+@users.command('backfill-search-keys')
+@click.option('--batch-size', default=1000, show_default=True, help='Users updated per commit.')
+@with_appcontext
+def backfill_search_keys(batch_size):
+    """Fill the case-folded username/email columns used by the admin user search."""
+    from app import db
+    from app.models import User
+    from app.models.user import search_key
+    
+    query = db.session.query(User.id, User.username, User.email, User.updated_at)
+    last_id = 0
+    updated = 0
+    
+    while True:
+        rows = query.filter(User.id > last_id).order_by(User.id).limit(batch_size).all()
+        if not rows:
+            break
+        
+        last_id = rows[-1].id
+        updates = [{
+            'id': row.id,
+            'username_key': search_key(row.username),
+            'email_key': search_key(row.email),
+            'updated_at': row.updated_at
+        } for row in rows]
+        
+        db.session.execute(db.update(User), updates)
+        db.session.commit()
+        
+        updated += len(updates)
+        click.echo(f'Updated {updated} users...')
+    
+    click.echo(f'Backfilled search keys for {updated} users.')
\ No newline at end of file
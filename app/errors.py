@@ -3,6 +3,7 @@ Error handlers for the Flask application.
 """
 from flask import render_template, request, jsonify
 from werkzeug.exceptions import HTTPException
+from app.utils.metrics import record_error
 
 def register_error_handlers(app):
     """
@@ -15,6 +16,7 @@ def register_error_handlers(app):
     @app.errorhandler(400)
     def bad_request(error):
         """Handle 400 Bad Request errors."""
+        record_error('bad_request', 400)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': 'Bad Request',
@@ -27,6 +29,7 @@ def register_error_handlers(app):
     @app.errorhandler(401)
     def unauthorized(error):
         """Handle 401 Unauthorized errors."""
+        record_error('unauthorized', 401)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': 'Unauthorized',
@@ -39,6 +42,7 @@ def register_error_handlers(app):
     @app.errorhandler(403)
     def forbidden(error):
         """Handle 403 Forbidden errors."""
+        record_error('forbidden', 403)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': 'Forbidden',
@@ -51,6 +55,7 @@ def register_error_handlers(app):
     @app.errorhandler(404)
     def not_found(error):
         """Handle 404 Not Found errors."""
+        record_error('not_found', 404)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': 'Not Found',
@@ -63,6 +68,7 @@ def register_error_handlers(app):
     @app.errorhandler(405)
     def method_not_allowed(error):
         """Handle 405 Method Not Allowed errors."""
+        record_error('method_not_allowed', 405)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': 'Method Not Allowed',
@@ -72,9 +78,25 @@ def register_error_handlers(app):
         
         return render_template('errors/405.html'), 405
     
+    @app.errorhandler(429)
+    def too_many_requests(error):
+        """Handle 429 Too Many Requests errors."""
+        record_error('too_many_requests', 429)
+        headers = {'Retry-After': str(error.retry_after)} if getattr(error, 'retry_after', None) else {}
+        
+        if request.path.startswith('/api/'):
+            return jsonify({
+                'error': 'Too Many Requests',
+                'message': 'Rate limit exceeded. Please try again later.',
+                'status_code': 429
+            }), 429, headers
+        
+        return render_template('errors/generic.html', error=error), 429, headers
+    
     @app.errorhandler(500)
     def internal_server_error(error):
         """Handle 500 Internal Server Error."""
+        record_error('internal_server_error', 500)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': 'Internal Server Error',
@@ -87,6 +109,7 @@ def register_error_handlers(app):
     @app.errorhandler(HTTPException)
     def handle_http_exception(error):
         """Handle general HTTP exceptions."""
+        record_error('handle_http_exception', error.code)
         if request.path.startswith('/api/'):
             return jsonify({
                 'error': error.name,
@@ -99,6 +122,7 @@ def register_error_handlers(app):
     @app.errorhandler(Exception)
     def handle_exception(error):
         """Handle unhandled exceptions."""
+        record_error('handle_exception', 500)
         # Log the error here in production
         app.logger.error(f'Unhandled exception: {error}')
         
@@ -0,0 +1,6 @@
+"""
+Background jobs package.
+"""
+from .queue import JobQueue, QueueFull, Task
+
+__all__ = ['JobQueue', 'QueueFull', 'Task']
@@ -0,0 +1,537 @@
+"""
+In-process job queue with thread-pool and SQLite-backed backends.
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from flask import current_app
+
+# Sentinel telling a thread-pool worker to exit
+_STOP = object()
+
+class QueueFull(Exception):
+    """Raised when a job cannot be enqueued before the enqueue timeout."""
+
+class Task:
+    """A function registered with the job queue."""
+
+    def __init__(self, job_queue, func, name):
+        self.job_queue = job_queue
+        self.func = func
+        self.name = name
+        self.__doc__ = func.__doc__
+
+    def __call__(self, *args, **kwargs):
+        """Run the task synchronously."""
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Enqueue the task to run in the background."""
+        return self.job_queue.enqueue(self.name, *args, **kwargs)
+
+class JobMetrics:
+    """Thread-safe job counters, also exported as ``jobs_total`` on ``/metrics``."""
+
+    FIELDS = ('enqueued', 'completed', 'retried', 'failed', 'ran_inline')
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field):
+        """Increment one counter."""
+        with self._lock:
+            self.counts[field] += 1
+        metrics = self.backend.app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.inc('jobs_total', backend=self.backend.name, outcome=field)
+
+    def snapshot(self):
+        """Get a copy of the counters."""
+        with self._lock:
+            return dict(self.counts)
+
+class JobQueue:
+    """
+    Flask extension dispatching tasks to a background backend.
+
+    Backends are selected with ``JOBS_BACKEND``: ``thread`` (in-memory
+    bounded queue served by a thread pool), ``sqlite`` (durable queue in a
+    local SQLite file) or ``eager`` (run immediately, for tests).
+    """
+
+    def __init__(self, app=None):
+        self.tasks = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the configured backend for the app."""
+        backend_name = app.config['JOBS_BACKEND']
+        backends = {
+            'thread': ThreadBackend,
+            'sqlite': SQLiteBackend,
+            'eager': EagerBackend
+        }
+        if backend_name not in backends:
+            raise ValueError(f'Unknown JOBS_BACKEND: {backend_name}')
+
+        backend = backends[backend_name](app, self.tasks)
+        app.extensions['job_queue'] = backend
+
+        # Drain on interpreter exit (e.g. a server worker shutting down)
+        atexit.register(backend.shutdown, app.config['JOBS_SHUTDOWN_TIMEOUT'])
+
+    def task(self, name=None):
+        """
+        Register a function as a background task.
+
+        Args:
+            name (str): Task name (defaults to module.function)
+
+        Returns:
+            callable: Decorator returning a ``Task``
+        """
+        def decorator(func):
+            task_name = name or f'{func.__module__}.{func.__name__}'
+            task = Task(self, func, task_name)
+            self.tasks[task_name] = task
+            return task
+        return decorator
+
+    def enqueue(self, name, *args, **kwargs):
+        """
+        Enqueue a task by name for the current app.
+
+        When the queue stays full for ``JOBS_ENQUEUE_TIMEOUT`` seconds the
+        job runs inline in the caller instead, which slows producers down
+        without dropping work.
+
+        Args:
+            name (str): Registered task name
+            *args: Positional arguments (JSON-serializable)
+            **kwargs: Keyword arguments (JSON-serializable)
+        """
+        if name not in self.tasks:
+            raise KeyError(f'Unknown task: {name}')
+
+        backend = current_app.extensions['job_queue']
+        job = {'name': name, 'args': list(args), 'kwargs': kwargs, 'attempts': 0}
+
+        try:
+            backend.put(job)
+            backend.metrics.incr('enqueued')
+        except QueueFull:
+            current_app.logger.warning(f'Job queue full, running {name} inline')
+            backend.metrics.incr('ran_inline')
+            backend.execute(job, retry=False)
+
+    def instrument_metrics(self, app, metrics):
+        """
+        Export the depth of a queue shared by every process (read at scrape time).
+
+        In-memory queues report their own depth per process instead.
+
+        Args:
+            app: Flask application instance
+            metrics: Metrics extension
+        """
+        backend = app.extensions['job_queue']
+        if backend.shared:
+            metrics.register_gauge(app, 'jobs_queue_depth', backend.depth, backend=backend.name)
+
+    def stats(self, app=None):
+        """
+        Get queue metrics for an app.
+
+        With metrics enabled the counters and depth cover every process
+        of the running server; otherwise only this process.
+
+        Returns:
+            dict: Backend name, queue depth and job counters
+        """
+        app = app or current_app
+        backend = app.extensions['job_queue']
+        metrics = app.extensions.get('metrics')
+        if metrics is None or not metrics.enabled:
+            return {'backend': backend.name, 'depth': backend.depth(), **backend.metrics.snapshot()}
+
+        with app.app_context():
+            samples = metrics.collect()
+        depth = samples.get(metrics.sample_key('jobs_queue_depth', backend=backend.name), 0)
+        counts = {field: samples.get(metrics.sample_key('jobs_total', backend=backend.name, outcome=field), 0)
+                  for field in JobMetrics.FIELDS}
+        return {'backend': backend.name, 'depth': int(depth),
+                **{field: int(value) for field, value in counts.items()}}
+
+    def shutdown(self, app=None, timeout=None):
+        """Stop accepting jobs and drain the backend of an app."""
+        backend = (app or current_app).extensions['job_queue']
+        backend.shutdown(timeout if timeout is not None else backend.app.config['JOBS_SHUTDOWN_TIMEOUT'])
+
+class Backend:
+    """Shared job execution, retry and lifecycle logic."""
+
+    name = None
+
+    # Whether every process sees the same queue (its depth is read at scrape time)
+    shared = False
+
+    def __init__(self, app, tasks):
+        self.app = app
+        self.tasks = tasks
+        self.metrics = JobMetrics(self)
+        self.max_retries = app.config['JOBS_MAX_RETRIES']
+        self.retry_backoff = app.config['JOBS_RETRY_BACKOFF']
+        self.enqueue_timeout = app.config['JOBS_ENQUEUE_TIMEOUT']
+
+    def execute(self, job, retry=True):
+        """
+        Run a job inside an app context.
+
+        Args:
+            job (dict): Job record
+            retry (bool): Schedule a retry if the job fails
+
+        Returns:
+            bool: True if the job succeeded
+        """
+        task = self.tasks.get(job['name'])
+        try:
+            if task is None:
+                raise KeyError(f'Unknown task: {job["name"]}')
+            with self.app.app_context():
+                task(*job['args'], **job['kwargs'])
+        except Exception as e:
+            job['attempts'] += 1
+            if retry and task is not None and job['attempts'] <= self.max_retries:
+                delay = self.retry_backoff * 2 ** (job['attempts'] - 1)
+                self.app.logger.warning(f'Job {job["name"]} failed ({e}), retrying in {delay:.1f}s')
+                self.metrics.incr('retried')
+                self.schedule_retry(job, delay, str(e))
+            else:
+                self.app.logger.error(f'Job {job["name"]} failed permanently: {e}')
+                self.metrics.incr('failed')
+                self.discard(job, str(e))
+            return False
+
+        self.metrics.incr('completed')
+        return True
+
+    def schedule_retry(self, job, delay, error):
+        """Run a failed job again after ``delay`` seconds."""
+        raise NotImplementedError
+
+    def discard(self, job, error):
+        """Handle a job that ran out of retries."""
+
+    def put(self, job):
+        """Add a job to the queue or raise ``QueueFull``."""
+        raise NotImplementedError
+
+    def depth(self):
+        """Number of jobs waiting to run."""
+        return 0
+
+    def shutdown(self, timeout):
+        """Stop workers, draining queued jobs within ``timeout`` seconds."""
+
+class EagerBackend(Backend):
+    """Run jobs immediately in the caller."""
+
+    name = 'eager'
+
+    def put(self, job):
+        """Run the job right away."""
+        self.execute(job, retry=False)
+
+class WorkerPoolBackend(Backend):
+    """Backend served by worker threads started lazily in each process."""
+
+    def __init__(self, app, tasks):
+        super().__init__(app, tasks)
+        self.worker_count = app.config['JOBS_WORKERS']
+        self.accepting = True
+        self._threads = []
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def ensure_workers(self):
+        """Start worker threads, again after a fork (e.g. preloading servers)."""
+        if self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+
+            self.reset_after_fork()
+            self._threads = [
+                threading.Thread(target=self.work, name=f'job-worker-{i}', daemon=True)
+                for i in range(self.worker_count)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def reset_after_fork(self):
+        """Recreate state that must not be shared with a parent process."""
+
+    def work(self):
+        """Worker thread loop."""
+        raise NotImplementedError
+
+    def join_workers(self, deadline):
+        """Wait for worker threads to exit until ``deadline``."""
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+
+class ThreadBackend(WorkerPoolBackend):
+    """Bounded in-memory queue served by a thread pool."""
+
+    name = 'thread'
+
+    def __init__(self, app, tasks):
+        super().__init__(app, tasks)
+        self.max_size = app.config['JOBS_MAX_QUEUE']
+        self.queue = queue.Queue(maxsize=self.max_size)
+
+    def reset_after_fork(self):
+        """Start from an empty queue in a forked process."""
+        self.queue = queue.Queue(maxsize=self.max_size)
+
+    def put(self, job):
+        """Add a job, blocking up to the enqueue timeout while the queue is full."""
+        if not self.accepting:
+            raise QueueFull('Job queue is shutting down')
+
+        self.ensure_workers()
+        try:
+            self.queue.put(job, timeout=self.enqueue_timeout)
+        except queue.Full:
+            raise QueueFull(f'Job queue is full ({self.max_size} jobs)')
+        self.record_depth()
+
+    def depth(self):
+        """Number of jobs waiting in memory."""
+        return self.queue.qsize()
+
+    def record_depth(self):
+        """Publish this process's queue depth as a gauge."""
+        metrics = self.app.extensions.get('metrics')
+        if metrics is not None:
+            metrics.set('jobs_queue_depth', self.depth(), backend=self.name)
+
+    def work(self):
+        """Take jobs off the queue until told to stop."""
+        while True:
+            job = self.queue.get()
+            try:
+                if job is _STOP:
+                    return
+                self.record_depth()
+                self.execute(job)
+            finally:
+                self.queue.task_done()
+
+    def schedule_retry(self, job, delay, error):
+        """Put the job back on the queue after a delay."""
+        timer = threading.Timer(delay, self._requeue, args=(job,))
+        timer.daemon = True
+        timer.start()
+
+    def _requeue(self, job):
+        """Re-enqueue a retried job, running it inline if the queue stays full."""
+        try:
+            self.queue.put(job, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.execute(job)
+            return
+        self.record_depth()
+
+    def shutdown(self, timeout):
+        """Finish queued jobs, then stop the workers."""
+        if not self.accepting:
+            return
+        self.accepting = False
+        if self._pid != os.getpid():
+            return
+
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        for _ in self._threads:
+            try:
+                self.queue.put(_STOP, timeout=max(0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        self.join_workers(deadline)
+
+        if self.queue.unfinished_tasks:
+            self.app.logger.warning(f'Job queue stopped with {self.depth()} jobs left')
+
+class SQLiteBackend(WorkerPoolBackend):
+    """
+    Durable queue stored in a local SQLite file.
+
+    Jobs survive restarts and are shared by every process using the same
+    file. A claimed job is leased for ``JOBS_LEASE_SECONDS``; if its worker
+    dies the job becomes available again once the lease expires.
+    """
+
+    name = 'sqlite'
+    shared = True
+
+    SCHEMA = (
+        'CREATE TABLE IF NOT EXISTS jobs ('
+        ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+        ' name TEXT NOT NULL,'
+        ' payload TEXT NOT NULL,'
+        ' attempts INTEGER NOT NULL DEFAULT 0,'
+        ' run_at REAL NOT NULL,'
+        ' locked_until REAL,'
+        ' failed INTEGER NOT NULL DEFAULT 0,'
+        ' last_error TEXT)',
+        'CREATE INDEX IF NOT EXISTS ix_jobs_pending ON jobs (failed, run_at)'
+    )
+
+    def __init__(self, app, tasks):
+        super().__init__(app, tasks)
+        self.path = app.config['JOBS_SQLITE_PATH']
+        self.max_size = app.config['JOBS_MAX_QUEUE']
+        self.poll_interval = app.config['JOBS_POLL_INTERVAL']
+        self.lease = app.config['JOBS_LEASE_SECONDS']
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def connection(self):
+        """Get this thread's connection to the queue database."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def reset_after_fork(self):
+        """Drop connections and events inherited from a parent process."""
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def put(self, job):
+        """Insert a job, waiting up to the enqueue timeout while the queue is full."""
+        if not self.accepting:
+            raise QueueFull('Job queue is shutting down')
+
+        self.ensure_workers()
+        deadline = time.monotonic() + self.enqueue_timeout
+        while self.depth() >= self.max_size:
+            if time.monotonic() >= deadline:
+                raise QueueFull(f'Job queue is full ({self.max_size} jobs)')
+            time.sleep(min(0.05, self.enqueue_timeout))
+
+        self.connection().execute(
+            'INSERT INTO jobs (name, payload, attempts, run_at) VALUES (?, ?, ?, ?)',
+            (job['name'], json.dumps({'args': job['args'], 'kwargs': job['kwargs']}),
+             job['attempts'], time.time())
+        )
+        self._wakeup.set()
+
+    def depth(self):
+        """Number of pending jobs in the queue file."""
+        return self.connection().execute('SELECT COUNT(*) FROM jobs WHERE failed = 0').fetchone()[0]
+
+    def claim(self):
+        """
+        Lease the next due job.
+
+        Returns:
+            dict or None: Job record, or None if nothing is due
+        """
+        conn = self.connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id, name, payload, attempts FROM jobs '
+                'WHERE failed = 0 AND run_at <= ? AND (locked_until IS NULL OR locked_until < ?) '
+                'ORDER BY run_at, id LIMIT 1',
+                (now, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute('UPDATE jobs SET locked_until = ? WHERE id = ?', (now + self.lease, row[0]))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if row is None:
+            return None
+
+        payload = json.loads(row[2])
+        return {'id': row[0], 'name': row[1], 'args': payload['args'],
+                'kwargs': payload['kwargs'], 'attempts': row[3]}
+
+    def work(self):
+        """Claim and run jobs until shutdown."""
+        while not self._stopping.is_set():
+            job = self.claim()
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            if self.execute(job):
+                self.connection().execute('DELETE FROM jobs WHERE id = ?', (job['id'],))
+
+    def schedule_retry(self, job, delay, error):
+        """Release the lease and make the job due again after a delay."""
+        self.connection().execute(
+            'UPDATE jobs SET attempts = ?, run_at = ?, locked_until = NULL, last_error = ? WHERE id = ?',
+            (job['attempts'], time.time() + delay, error, job['id'])
+        )
+
+    def discard(self, job, error):
+        """Keep permanently failed jobs for inspection."""
+        if 'id' in job:
+            self.connection().execute(
+                'UPDATE jobs SET attempts = ?, failed = 1, locked_until = NULL, last_error = ? WHERE id = ?',
+                (job['attempts'], error, job['id'])
+            )
+
+    def shutdown(self, timeout):
+        """Let in-flight jobs finish; queued jobs stay in the file for the next start."""
+        if not self.accepting:
+            return
+        self.accepting = False
+        if self._pid != os.getpid():
+            return
+
+        self._stopping.set()
+        self._wakeup.set()
+        self.join_workers(time.monotonic() + timeout)
+
+    def run_forever(self):
+        """Run workers in the foreground (used by ``flask jobs work``)."""
+        self.ensure_workers()
+        try:
+            while any(thread.is_alive() for thread in self._threads):
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            self.shutdown(self.app.config['JOBS_SHUTDOWN_TIMEOUT'])
@@ -0,0 +1,76 @@
+"""
+Background tasks for side effects that requests do not need to wait for.
+"""
+from datetime import datetime
+from app import db, job_queue
+
+@job_queue.task('posts.record_view')
+def record_post_view(post_id, viewed_at=None):
+    """
+    Increment a post's view count without touching ``updated_at``, and
+    count the view towards the post's trending score.
+    """
+    from flask import current_app
+    from app.models import Post
+    from app.models.trending import record_view
+    from app.utils.trending import get_trending_board
+    
+    viewed_at = datetime.fromisoformat(viewed_at) if viewed_at else datetime.utcnow()
+    db.session.execute(
+        db.update(Post)
+          .where(Post.id == post_id)
+          .values(view_count=Post.view_count + 1, updated_at=Post.updated_at)
+    )
+    score = record_view(db.session.connection(), post_id, viewed_at,
+                        current_app.config['TRENDING_HALF_LIFE_HOURS'])
+    db.session.commit()
+    
+    get_trending_board().offer(post_id, score)
+
+@job_queue.task('users.record_login')
+def record_user_login(user_id, logged_in_at):
+    """Store the time of a user's last login."""
+    from app.models import User
+    
+    db.session.execute(
+        db.update(User)
+          .where(User.id == user_id)
+          .values(last_login=datetime.fromisoformat(logged_in_at), updated_at=User.updated_at)
+    )
+    db.session.commit()
+
+
+@job_queue.task('posts.render_content')
+def render_post_content(post_id):
+    """Store freshly rendered HTML, and the fields derived from its text, for a stale post."""
+    from app.models import Post
+    from app.models.post import derived_fields
+    from app.utils.rendering import RENDERER_VERSION, content_hash, html_text, render_markdown
+    
+    row = db.session.query(Post.content, Post.excerpt, Post.content_hash, Post.renderer_version)\
+                    .filter(Post.id == post_id).first()
+    if row is None:
+        return
+    
+    digest = content_hash(row.content)
+    if row.content_hash == digest and row.renderer_version == RENDERER_VERSION:
+        return
+    
+    # Rendering is derived data, not an edit, so updated_at is left alone
+    html = render_markdown(row.content)
+    db.session.execute(
+        db.update(Post)
+          .where(Post.id == post_id)
+          .values(content_html=html,
+                  content_hash=digest,
+                  renderer_version=RENDERER_VERSION,
+                  updated_at=Post.updated_at,
+                  **derived_fields(html_text(html), row.excerpt))
+    )
+    db.session.commit()
+
+@job_queue.task('cache.purge')
+def purge_surrogate_keys(keys):
+    """Purge surrogate keys from the reverse-proxy tier (retried on failure)."""
+    from flask import current_app
+    current_app.extensions['surrogate_cache'].purger.purge(keys)
\ No newline at end of file
@@ -4,5 +4,8 @@ Database models package.
 from .user import User
 from .post import Post
 from .category import Category
+from .archive import ArchiveMonth
+from .trending import PostViewBucket, TrendingScore
+from .post_event import PostEvent
 
-__all__ = ['User', 'Post', 'Category'] 
\ No newline at end of file
+__all__ = ['User', 'Post', 'Category', 'ArchiveMonth', 'PostViewBucket', 'TrendingScore', 'PostEvent'] 
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Monthly archive rollup of published post counts.
+"""
+from datetime import datetime
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+# Rollup rows with this category_id count every published post of the month
+ALL_CATEGORIES = 0
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+class ArchiveMonth(db.Model):
+    """Number of published posts per month, site-wide and per category."""
+
+    __tablename__ = 'archive_months'
+
+    # Primary key order serves the sidebar: one category's months, newest first
+    category_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    year = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    month = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    post_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String representation of the ArchiveMonth model."""
+        return f'<ArchiveMonth {self.year}-{self.month:02d} category={self.category_id}>'
+
+    def to_dict(self):
+        """Convert the month to a dictionary for API responses."""
+        return {
+            'year': self.year,
+            'month': self.month,
+            'post_count': self.post_count
+        }
+
+    @staticmethod
+    def months_query(category_id=None):
+        """Build the query for the archive months with posts, newest first."""
+        return ArchiveMonth.query.filter(ArchiveMonth.category_id == (category_id or ALL_CATEGORIES),
+                                         ArchiveMonth.post_count > 0)\
+                                 .order_by(ArchiveMonth.year.desc(), ArchiveMonth.month.desc())
+
+    @staticmethod
+    def get_months(category_id=None):
+        """Get the archive months with posts, newest first."""
+        return ArchiveMonth.months_query(category_id).all()
+
+    @staticmethod
+    def get_count(year, month, category_id=None):
+        """Get the number of published posts of a month."""
+        row = db.session.get(ArchiveMonth, (category_id or ALL_CATEGORIES, year, month))
+        return row.post_count if row else 0
+
+def month_range(year, month):
+    """
+    Get the creation time range of an archive month.
+
+    Returns:
+        tuple: (first instant of the month, first instant of the next month)
+    """
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+def archive_keys(is_published, created_at, category_id):
+    """
+    Get the rollup rows a post counts towards.
+
+    Returns:
+        list: (category_id, year, month) keys; empty for drafts
+    """
+    if not is_published or created_at is None:
+        return []
+    keys = [(ALL_CATEGORIES, created_at.year, created_at.month)]
+    if category_id:
+        keys.append((category_id, created_at.year, created_at.month))
+    return keys
+
+def archive_deltas(rows):
+    """
+    Sum the rollup changes of inserting post rows, e.g. a bulk import batch.
+
+    Args:
+        rows (list): ``posts`` column value dicts
+
+    Returns:
+        dict: (category_id, year, month) -> posts added
+    """
+    deltas = {}
+    for row in rows:
+        for key in archive_keys(row.get('is_published'), row.get('created_at'), row.get('category_id')):
+            deltas[key] = deltas.get(key, 0) + 1
+    return deltas
+
+def apply_archive_deltas(connection, deltas):
+    """
+    Add count changes to the rollup in the caller's transaction.
+
+    Args:
+        connection: Database connection
+        deltas (dict): (category_id, year, month) -> change in post count
+    """
+    table = ArchiveMonth.__table__
+    upsert = UPSERT_INSERTS.get(connection.dialect.name)
+
+    for (category_id, year, month), delta in deltas.items():
+        if not delta:
+            continue
+
+        if delta > 0 and upsert is not None:
+            statement = upsert(table).values(category_id=category_id, year=year, month=month,
+                                             post_count=delta)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.category_id, table.c.year, table.c.month],
+                set_={'post_count': table.c.post_count + delta}
+            ))
+            continue
+
+        result = connection.execute(
+            table.update()
+                 .where(table.c.category_id == category_id, table.c.year == year, table.c.month == month)
+                 .values(post_count=table.c.post_count + delta)
+        )
+        if result.rowcount == 0 and delta > 0:
+            connection.execute(table.insert().values(category_id=category_id, year=year, month=month,
+                                                     post_count=delta))
+
+def rebuild_archive(connection, months=None):
+    """
+    Recount rollup rows from the posts table.
+
+    Used after writes that bypass the ORM (bulk moderation, seeding) and
+    to fill the rollup of an existing database.
+
+    Args:
+        connection: Database connection
+        months (iterable): (year, month) pairs to recount (None for all)
+    """
+    from app.models.post import Post
+
+    table = ArchiveMonth.__table__
+    posts = Post.__table__
+    year = db.extract('year', posts.c.created_at)
+    month = db.extract('month', posts.c.created_at)
+
+    published = [posts.c.is_published == True, posts.c.created_at.isnot(None)]
+    delete = table.delete()
+    if months is not None:
+        months = sorted(set(months))
+        if not months:
+            return
+        delete = delete.where(db.or_(*[db.and_(table.c.year == y, table.c.month == m)
+                                       for y, m in months]))
+        # Ranges on created_at, so the published/created index serves the recount
+        published.append(db.or_(*[db.and_(posts.c.created_at >= start, posts.c.created_at < end)
+                                  for start, end in (month_range(y, m) for y, m in months)]))
+
+    connection.execute(delete)
+
+    totals = db.select(db.literal(ALL_CATEGORIES), year, month, db.func.count())\
+               .where(*published).group_by(year, month)
+    per_category = db.select(posts.c.category_id, year, month, db.func.count())\
+                     .where(*published, posts.c.category_id.isnot(None))\
+                     .group_by(posts.c.category_id, year, month)
+
+    columns = [table.c.category_id, table.c.year, table.c.month, table.c.post_count]
+    connection.execute(table.insert().from_select(columns, totals))
+    connection.execute(table.insert().from_select(columns, per_category))
+
+def months_of_posts(connection, ids, chunk_size=500):
+    """
+    Get the archive months of posts, e.g. the targets of a bulk action.
+
+    Returns:
+        set: (year, month) pairs
+    """
+    from app.models.post import Post
+
+    posts = Post.__table__
+    ids = list(ids)
+    months = set()
+    for start in range(0, len(ids), chunk_size):
+        rows = connection.execute(
+            db.select(posts.c.created_at).where(posts.c.id.in_(ids[start:start + chunk_size]))
+        ).scalars()
+        months.update((created_at.year, created_at.month) for created_at in rows if created_at)
+    return months
+
+def _old_value(state, name):
+    """Get an attribute's value from before the pending change."""
+    history = state.attrs[name].history
+    return history.deleted[0] if history.deleted else getattr(state.obj(), name)
+
+def _post_inserted(mapper, connection, post):
+    deltas = {}
+    for key in archive_keys(post.is_published, post.created_at, post.category_id):
+        deltas[key] = deltas.get(key, 0) + 1
+    apply_archive_deltas(connection, deltas)
+
+def _post_updated(mapper, connection, post):
+    state = inspect(post)
+    old = archive_keys(_old_value(state, 'is_published'), _old_value(state, 'created_at'),
+                       _old_value(state, 'category_id'))
+    new = archive_keys(post.is_published, post.created_at, post.category_id)
+    if old == new:
+        return
+
+    deltas = {}
+    for key in old:
+        deltas[key] = deltas.get(key, 0) - 1
+    for key in new:
+        deltas[key] = deltas.get(key, 0) + 1
+    apply_archive_deltas(connection, deltas)
+
+def _post_deleted(mapper, connection, post):
+    deltas = {}
+    for key in archive_keys(post.is_published, post.created_at, post.category_id):
+        deltas[key] = deltas.get(key, 0) - 1
+    apply_archive_deltas(connection, deltas)
+
+def keep_old_value(target, value, oldvalue, initiator):
+    """No-op set listener; registering it with active history loads the old value."""
+
+def register_archive_events(post_model):
+    """Keep the rollup current whenever the ORM inserts, updates or deletes a post."""
+    # Setting an expired attribute (e.g. after a commit) otherwise discards
+    # its old value, and the update handler could not tell which row to decrement
+    for name in ('is_published', 'created_at', 'category_id'):
+        event.listen(getattr(post_model, name), 'set', keep_old_value, active_history=True)
+    event.listen(post_model, 'after_insert', _post_inserted)
+    event.listen(post_model, 'after_update', _post_updated)
+    event.listen(post_model, 'after_delete', _post_deleted)
\ No newline at end of file
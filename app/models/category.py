@@ -8,6 +8,9 @@ class Category(db.Model):
     """Category model for organizing posts."""
     
     __tablename__ = 'categories'
+    __table_args__ = (
+        db.Index('ix_categories_active_name', 'is_active', 'name'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False, unique=True, index=True)
@@ -22,8 +25,16 @@ class Category(db.Model):
         """String representation of the Category model."""
         return f'<Category {self.name}>'
     
-    def to_dict(self):
-        """Convert category to dictionary for API responses."""
+    def to_dict(self, post_count=None):
+        """
+        Convert category to dictionary for API responses.
+        
+        Args:
+            post_count (int): Precomputed published post count (queried when omitted)
+        """
+        if post_count is None:
+            post_count = Category.get_post_counts([self.id]).get(self.id, 0)
+        
         return {
             'id': self.id,
             'name': self.name,
@@ -31,15 +42,37 @@ class Category(db.Model):
             'description': self.description,
             'color': self.color,
             'is_active': self.is_active,
-            'post_count': self.posts.count(),
+            'post_count': post_count,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    @staticmethod
+    def active_query():
+        """Build the query for active categories, by name."""
+        return Category.query.filter_by(is_active=True).order_by(Category.name)
+    
     @staticmethod
     def get_active_categories():
         """Get all active categories."""
-        return Category.query.filter_by(is_active=True).order_by(Category.name).all()
+        return Category.active_query().all()
+    
+    @staticmethod
+    def get_post_counts(category_ids):
+        """Get the number of published posts per category with a single grouped query."""
+        if not category_ids:
+            return {}
+        
+        return dict(Category.post_counts_query(category_ids).all())
+    
+    @staticmethod
+    def post_counts_query(category_ids):
+        """Build the grouped published post count query for some categories."""
+        from app.models.post import Post
+        
+        return db.session.query(Post.category_id, db.func.count(Post.id))\
+                         .filter(Post.category_id.in_(category_ids), Post.is_published == True)\
+                         .group_by(Post.category_id)
     
     @staticmethod
     def get_category_by_slug(slug):
@@ -3,17 +3,67 @@ Post model for blog posts and content management.
 """
 from datetime import datetime
 from app import db
+from app.models.archive import month_range, register_archive_events
+from app.utils.helpers import count_words, estimate_reading_time, truncate_text
+from app.utils.metrics import record_cache
+from app.utils.pagination import paginate
+from app.utils.rendering import RENDERER_VERSION, content_hash, html_text, render_markdown
+
+# Length of the summary derived from content when no excerpt is given
+SUMMARY_LENGTH = 200
+
+def derived_fields(text, excerpt=None):
+    """
+    Compute the summary, word count and reading time of a post.
+
+    Args:
+        text (str): Plain text of the rendered content (see ``html_text``)
+        excerpt (str): Author-written excerpt, used as the summary if given
+
+    Returns:
+        dict: 'summary', 'word_count' and 'reading_time' column values
+    """
+    word_count = count_words(text)
+    return {
+        'summary': excerpt or truncate_text(text, SUMMARY_LENGTH),
+        'word_count': word_count,
+        'reading_time': estimate_reading_time(word_count)
+    }
 
 class Post(db.Model):
     """Post model for blog posts and content management."""
     
     __tablename__ = 'posts'
+    __table_args__ = (
+        # Listing queries filter on these columns and read newest first, so
+        # each index serves both the WHERE clause and the ORDER BY
+        db.Index('ix_posts_published_created', 'is_published', 'created_at'),
+        db.Index('ix_posts_category_published_created', 'category_id', 'is_published', 'created_at'),
+        db.Index('ix_posts_author_published_created', 'author_id', 'is_published', 'created_at'),
+        db.Index('ix_posts_published_featured_created', 'is_published', 'is_featured', 'created_at'),
+        # Admin list filters, which also see drafts
+        db.Index('ix_posts_featured_created', 'is_featured', 'created_at'),
+        db.Index('ix_posts_author_created', 'author_id', 'created_at'),
+        db.Index('ix_posts_category_created', 'category_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False, index=True)
     slug = db.Column(db.String(200), unique=True, nullable=False, index=True)
-    content = db.Column(db.Text, nullable=False)
+    # Deferred so listings never load full post bodies; use undefer() for detail views
+    content = db.deferred(db.Column(db.Text, nullable=False))
     excerpt = db.Column(db.Text)
+    
+    # Derived from content at write time (see update_derived_fields)
+    summary = db.Column(db.Text)
+    word_count = db.Column(db.Integer, default=0)
+    reading_time = db.Column(db.Integer, default=0)
+    
+    # Rendered HTML cache, valid while content_hash and renderer_version match
+    content_html = db.deferred(db.Column(db.Text))
+    content_hash = db.Column(db.String(64))
+    renderer_version = db.Column(db.Integer)
+    
     featured_image = db.Column(db.String(200))
     is_published = db.Column(db.Boolean, default=False, index=True)
     is_featured = db.Column(db.Boolean, default=False)
@@ -31,47 +81,139 @@ class Post(db.Model):
         """String representation of the Post model."""
         return f'<Post {self.title}>'
     
-    def to_dict(self):
-        """Convert post to dictionary for API responses."""
-        return {
+    def update_derived_fields(self):
+        """Render the content, then recompute the summary, word count and reading time from its text."""
+        self.render_content()
+        for name, value in derived_fields(html_text(self.content_html), self.excerpt).items():
+            setattr(self, name, value)
+    
+    def render_content(self, force=False):
+        """
+        Render the content to HTML unless the stored HTML is current.
+        
+        Args:
+            force (bool): Render even if the stored HTML looks current
+            
+        Returns:
+            bool: True if the content was rendered
+        """
+        digest = content_hash(self.content)
+        if not force and self.content_hash == digest and self.renderer_version == RENDERER_VERSION:
+            return False
+        
+        self.content_html = render_markdown(self.content)
+        self.content_hash = digest
+        self.renderer_version = RENDERER_VERSION
+        return True
+    
+    def get_content_html(self):
+        """
+        Get the rendered HTML for display.
+        
+        Stale or missing HTML (e.g. after a renderer upgrade) is rendered on
+        the fly for this request and stored by a background job.
+        """
+        fresh = self.renderer_version == RENDERER_VERSION and self.content_html is not None
+        record_cache('content_html', fresh)
+        if fresh:
+            return self.content_html
+        
+        from app.jobs.tasks import render_post_content
+        render_post_content.delay(self.id)
+        return render_markdown(self.content)
+    
+    def to_dict(self, include_content=True, embed_related=True, category_post_counts=None):
+        """
+        Convert post to dictionary for API responses.
+        
+        Args:
+            include_content (bool): Include the full content (False for listings)
+            embed_related (bool): Embed author and category objects (False when
+                they are sent once in a compound document's ``included`` section)
+            category_post_counts (dict): Published post counts by category id,
+                computed once for a listing (the category counts its own when omitted)
+        """
+        data = {
             'id': self.id,
             'title': self.title,
             'slug': self.slug,
-            'content': self.content,
             'excerpt': self.excerpt,
+            'summary': self.summary,
+            'word_count': self.word_count,
+            'reading_time': self.reading_time,
             'featured_image': self.featured_image,
             'is_published': self.is_published,
             'is_featured': self.is_featured,
             'view_count': self.view_count,
-            'author': self.author.to_dict() if self.author else None,
-            'category': self.category.to_dict() if self.category else None,
+            'author_id': self.author_id,
+            'category_id': self.category_id,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
             'published_at': self.published_at.isoformat() if self.published_at else None
         }
+        
+        if include_content:
+            data['content'] = self.content
+            data['content_html'] = self.get_content_html()
+        
+        if embed_related:
+            data['author'] = self.author.to_dict() if self.author else None
+            if self.category is None:
+                data['category'] = None
+            elif category_post_counts is not None:
+                data['category'] = self.category.to_dict(post_count=category_post_counts.get(self.category_id, 0))
+            else:
+                data['category'] = self.category.to_dict()
+        
+        return data
     
     def increment_view_count(self):
-        """Increment the view count for this post."""
-        self.view_count += 1
-        db.session.commit()
+        """Increment the view count and trending score of this post in the background."""
+        from app.jobs.tasks import record_post_view
+        record_post_view.delay(self.id, datetime.utcnow().isoformat())
     
     @staticmethod
-    def get_published_posts(page=1, per_page=10):
-        """Get paginated published posts."""
-        return Post.query.filter_by(is_published=True)\
-                        .order_by(Post.created_at.desc())\
-                        .paginate(page=page, per_page=per_page, error_out=False)
+    def published_query(category_id=None, author_id=None):
+        """
+        Build the query for published posts, newest first.
+        
+        Args:
+            category_id (int): Only posts in this category
+            author_id (int): Only posts by this author
+        """
+        query = Post.query.filter_by(is_published=True)
+        
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        
+        if author_id:
+            query = query.filter_by(author_id=author_id)
+        
+        return query.order_by(Post.created_at.desc())
     
     @staticmethod
-    def get_featured_posts(limit=5):
-        """Get featured posts."""
+    def archive_query(year, month, category_id=None):
+        """
+        Build the query for the published posts of an archive month, newest first.
+        
+        Args:
+            year (int): Archive year
+            month (int): Archive month (1-12)
+            category_id (int): Only posts in this category
+        """
+        start, end = month_range(year, month)
+        query = Post.published_query(category_id=category_id)
+        return query.filter(Post.created_at >= start, Post.created_at < end)
+    
+    @staticmethod
+    def featured_query():
+        """Build the query for featured posts, newest first."""
         return Post.query.filter_by(is_published=True, is_featured=True)\
-                        .order_by(Post.created_at.desc())\
-                        .limit(limit).all()
+                        .order_by(Post.created_at.desc())
     
     @staticmethod
-    def search_posts(query, page=1, per_page=10):
-        """Search posts by title and content."""
+    def search_query(query):
+        """Build the query for published posts matching a search term."""
         search_term = f"%{query}%"
         return Post.query.filter(
             Post.is_published == True,
@@ -79,5 +221,62 @@ class Post(db.Model):
                 Post.title.ilike(search_term),
                 Post.content.ilike(search_term)
             )
-        ).order_by(Post.created_at.desc())\
-         .paginate(page=page, per_page=per_page, error_out=False) 
\ No newline at end of file
+        ).order_by(Post.created_at.desc())
+    
+    @staticmethod
+    def related_query(category_id, exclude_id):
+        """Build the query for other published posts in a category."""
+        return Post.query.filter(
+            Post.category_id == category_id,
+            Post.id != exclude_id,
+            Post.is_published == True
+        )
+    
+    @staticmethod
+    def get_published_posts(page=1, per_page=10, count=True):
+        """Get paginated published posts."""
+        return paginate(Post.published_query(), page=page, per_page=per_page, count=count)
+    
+    @staticmethod
+    def get_trending(limit=5):
+        """
+        Get the published posts with the most recent views, hottest first.
+        
+        Reads the in-memory trending board, then loads the posts by id.
+        
+        Returns:
+            list: (post, heat) pairs, heat being views decayed by their age
+        """
+        from flask import current_app
+        from app.models.trending import heat
+        from app.utils.trending import get_trending_board
+        
+        config = current_app.config
+        # Read past the limit, as drafts and deleted posts are dropped below
+        ranked = get_trending_board().top(config['TRENDING_BOARD_SIZE'], config['TRENDING_REFRESH_SECONDS'])
+        if not ranked:
+            return []
+        
+        posts = {post.id: post for post in Post.query.filter(Post.id.in_([post_id for post_id, _ in ranked]),
+                                                             Post.is_published == True)}
+        half_life = config['TRENDING_HALF_LIFE_HOURS']
+        return [(posts[post_id], heat(score, half_life)) for post_id, score in ranked
+                if post_id in posts][:limit]
+    
+    @staticmethod
+    def get_featured_posts(limit=5):
+        """Get featured posts."""
+        return Post.featured_query().limit(limit).all()
+    
+    @staticmethod
+    def get_related_posts(post, limit=3):
+        """Get other published posts in the same category as a post."""
+        return Post.related_query(post.category_id, post.id).limit(limit).all()
+    
+    @staticmethod
+    def search_posts(query, page=1, per_page=10, count=True):
+        """Search posts by title and content."""
+        return paginate(Post.search_query(query), page=page, per_page=per_page, count=count)
+
+# Keep the monthly archive rollup in step with every ORM write
+register_archive_events(Post)
\ No newline at end of file
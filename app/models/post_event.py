@@ -0,0 +1,117 @@
+"""
+Append-only log of post publications, read by the live post stream.
+
+A row is written in the same transaction that publishes a post, so an
+event exists exactly when the publication committed. Every worker polls
+the log with an id cursor (see ``app.utils.post_stream``) and pushes new
+rows to its connected clients; old rows are removed with
+``flask posts prune-events``.
+"""
+from datetime import datetime, timedelta
+from app import db
+
+class PostEvent(db.Model):
+    """A post became published."""
+
+    __tablename__ = 'post_events'
+    # Without AUTOINCREMENT SQLite reuses the ids of a log emptied by pruning,
+    # and pollers whose cursor is past them would skip the new events
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    post_id = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        """String representation of the PostEvent model."""
+        return f'<PostEvent {self.id} post={self.post_id}>'
+
+def record_publication(connection, post_id):
+    """
+    Log the publication of one post.
+
+    Args:
+        connection: Database connection of the publishing transaction
+        post_id (int): Published post
+    """
+    connection.execute(PostEvent.__table__.insert().values(post_id=post_id, created_at=datetime.utcnow()))
+
+def record_publications(connection, ids):
+    """
+    Log the publication of the drafts among ``ids``, before they are published in bulk.
+
+    Args:
+        connection: Database connection of the publishing transaction
+        ids (list): Posts about to be published
+
+    Returns:
+        int: Events recorded
+    """
+    from app.models.post import Post
+
+    posts = Post.__table__
+    drafts = db.select(posts.c.id, db.literal(datetime.utcnow()))\
+               .where(posts.c.id.in_(ids), db.or_(posts.c.is_published == False,
+                                                  posts.c.is_published.is_(None)))
+    table = PostEvent.__table__
+    return connection.execute(table.insert().from_select([table.c.post_id, table.c.created_at], drafts)).rowcount
+
+def events_after(connection, after_id, limit, until_id=None, include_ids=()):
+    """
+    Get logged publications with the posts they published, oldest first.
+
+    Without ``until_id`` the oldest ``limit`` events after the cursor are
+    returned (polling); with it, the newest ``limit`` events up to
+    ``until_id`` (replaying what a reconnecting client missed).
+
+    Args:
+        connection: Database connection
+        after_id (int): Cursor; only later events are returned
+        limit (int): Maximum events
+        until_id (int): Last event to return
+        include_ids (list): Earlier events to return too, if they have committed by now
+
+    Returns:
+        list: Rows of the event id and the post, author and category columns
+    """
+    from app.models.category import Category
+    from app.models.post import Post
+    from app.models.user import User
+
+    events = PostEvent.__table__
+    posts = Post.__table__
+    users = User.__table__
+    categories = Category.__table__
+    wanted = events.c.id > after_id
+    if include_ids:
+        wanted = db.or_(wanted, events.c.id.in_(include_ids))
+    query = db.select(events.c.id, posts.c.id.label('post_id'), posts.c.title, posts.c.slug,
+                      posts.c.summary, posts.c.is_published, posts.c.created_at, posts.c.published_at,
+                      users.c.username, categories.c.name.label('category_name'),
+                      categories.c.slug.label('category_slug'), categories.c.color.label('category_color'))\
+              .select_from(events.outerjoin(posts, posts.c.id == events.c.post_id)
+                                 .outerjoin(users, users.c.id == posts.c.author_id)
+                                 .outerjoin(categories, categories.c.id == posts.c.category_id))\
+              .where(wanted)\
+              .limit(limit)
+    if until_id is None:
+        return connection.execute(query.order_by(events.c.id)).all()
+    rows = connection.execute(query.where(events.c.id <= until_id).order_by(events.c.id.desc())).all()
+    return rows[::-1]
+
+def latest_event_id(connection):
+    """Get the id of the newest logged event (0 when the log is empty)."""
+    return connection.execute(db.select(db.func.max(PostEvent.__table__.c.id))).scalar() or 0
+
+def prune(connection, retention_hours, now=None):
+    """
+    Delete events older than the retention window.
+
+    Returns:
+        int: Events deleted
+    """
+    now = now or datetime.utcnow()
+    table = PostEvent.__table__
+    return connection.execute(
+        table.delete().where(table.c.created_at < now - timedelta(hours=retention_hours))
+    ).rowcount
\ No newline at end of file
@@ -0,0 +1,203 @@
+"""
+Hourly view buckets and time-decayed trending scores.
+
+A post's trending heat is the sum of its views, each weighted by
+``2 ** (-age / half_life)``. Decay shrinks every post's heat by the same
+factor, so scores are stored in log space relative to a fixed epoch:
+
+    score = log(sum(views * exp(rate * (hour - EPOCH))))
+
+A view adds one term (``log-add-exp``), older scores never need
+rewriting, and ordering by the stored score is ordering by current heat.
+"""
+import math
+from datetime import datetime, timedelta
+from app import db
+from app.models.archive import UPSERT_INSERTS
+
+# Reference time of the stored scores; any fixed instant works
+EPOCH = datetime(2024, 1, 1)
+
+# Optimistic score updates retried before giving up on a contended row
+SCORE_UPDATE_ATTEMPTS = 5
+
+class PostViewBucket(db.Model):
+    """Views of a post within one hour."""
+
+    __tablename__ = 'post_view_buckets'
+
+    post_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    hour = db.Column(db.DateTime, primary_key=True, index=True)
+    views = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        """String representation of the PostViewBucket model."""
+        return f'<PostViewBucket post={self.post_id} {self.hour:%Y-%m-%d %H}h views={self.views}>'
+
+class TrendingScore(db.Model):
+    """Decayed view score of a post, in log space (see module docstring)."""
+
+    __tablename__ = 'trending_scores'
+
+    post_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    score = db.Column(db.Float, nullable=False, index=True)
+
+    def __repr__(self):
+        """String representation of the TrendingScore model."""
+        return f'<TrendingScore post={self.post_id} score={self.score:.3f}>'
+
+def decay_rate(half_life_hours):
+    """Get the decay rate per hour of a half-life."""
+    return math.log(2) / half_life_hours
+
+def hour_of(moment):
+    """Truncate a time to the start of its hour bucket."""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def view_exponent(hour, half_life_hours):
+    """Get the log-space weight of one view in an hour bucket."""
+    return decay_rate(half_life_hours) * (hour - EPOCH).total_seconds() / 3600
+
+def log_add_exp(a, b):
+    """Compute ``log(exp(a) + exp(b))`` without overflow."""
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+def heat(score, half_life_hours, now=None):
+    """
+    Get a stored score's current heat: views weighted by their age.
+
+    Args:
+        score (float): Stored log-space score
+        half_life_hours (float): Half-life the score was built with
+        now (datetime): Time to decay to (default: now)
+
+    Returns:
+        float: Decayed view count
+    """
+    now = now or datetime.utcnow()
+    return math.exp(score - view_exponent(now, half_life_hours))
+
+def record_view(connection, post_id, viewed_at, half_life_hours):
+    """
+    Count a view in its hour bucket and fold it into the post's score.
+
+    The bucket is incremented atomically in SQL; the score, which needs
+    logarithms the database may not offer, is updated optimistically and
+    retried when another worker changed it in between.
+
+    Args:
+        connection: Database connection (the caller commits)
+        post_id (int): Viewed post
+        viewed_at (datetime): Time of the view
+        half_life_hours (float): Decay half-life
+
+    Returns:
+        float: The post's new score
+    """
+    hour = hour_of(viewed_at)
+    buckets = PostViewBucket.__table__
+    upsert = UPSERT_INSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        connection.execute(upsert(buckets).values(post_id=post_id, hour=hour, views=1)
+                           .on_conflict_do_update(index_elements=[buckets.c.post_id, buckets.c.hour],
+                                                  set_={'views': buckets.c.views + 1}))
+    else:
+        result = connection.execute(buckets.update()
+                                    .where(buckets.c.post_id == post_id, buckets.c.hour == hour)
+                                    .values(views=buckets.c.views + 1))
+        if result.rowcount == 0:
+            connection.execute(buckets.insert().values(post_id=post_id, hour=hour, views=1))
+
+    scores = TrendingScore.__table__
+    weight = view_exponent(hour, half_life_hours)
+    for _ in range(SCORE_UPDATE_ATTEMPTS):
+        old = connection.execute(db.select(scores.c.score).where(scores.c.post_id == post_id)).scalar()
+        if old is None:
+            if upsert is not None:
+                # Lost a race to insert the first score: loop and add to it
+                result = connection.execute(upsert(scores).values(post_id=post_id, score=weight)
+                                            .on_conflict_do_nothing(index_elements=[scores.c.post_id]))
+                if result.rowcount:
+                    return weight
+                continue
+            connection.execute(scores.insert().values(post_id=post_id, score=weight))
+            return weight
+
+        new = log_add_exp(old, weight)
+        result = connection.execute(scores.update()
+                                    .where(scores.c.post_id == post_id, scores.c.score == old)
+                                    .values(score=new))
+        if result.rowcount:
+            return new
+
+    raise RuntimeError(f'Trending score of post {post_id} kept changing; giving up after '
+                       f'{SCORE_UPDATE_ATTEMPTS} attempts')
+
+def rebuild_scores(connection, half_life_hours, batch_size=1000):
+    """
+    Recompute every score from the hour buckets, e.g. after changing the half-life.
+
+    Args:
+        connection: Database connection (the caller commits)
+        half_life_hours (float): Decay half-life
+        batch_size (int): Scores inserted per statement
+
+    Returns:
+        int: Posts scored
+    """
+    buckets = PostViewBucket.__table__
+    scores = TrendingScore.__table__
+    connection.execute(scores.delete())
+
+    rows = connection.execute(db.select(buckets.c.post_id, buckets.c.hour, buckets.c.views)
+                              .where(buckets.c.views > 0)
+                              .order_by(buckets.c.post_id))
+    batch = []
+    scored = 0
+    current_id, current = None, None
+    for post_id, hour, views in rows:
+        term = math.log(views) + view_exponent(hour, half_life_hours)
+        if post_id != current_id:
+            if current_id is not None:
+                batch.append({'post_id': current_id, 'score': current})
+            current_id, current = post_id, term
+        else:
+            current = log_add_exp(current, term)
+
+        if len(batch) >= batch_size:
+            connection.execute(scores.insert(), batch)
+            scored += len(batch)
+            batch = []
+
+    if current_id is not None:
+        batch.append({'post_id': current_id, 'score': current})
+    if batch:
+        connection.execute(scores.insert(), batch)
+        scored += len(batch)
+    return scored
+
+def prune(connection, half_life_hours, retention_days, min_heat=0.001, now=None):
+    """
+    Delete old buckets and scores that decayed to nothing.
+
+    Args:
+        connection: Database connection (the caller commits)
+        half_life_hours (float): Decay half-life
+        retention_days (int): Days of hour buckets to keep
+        min_heat (float): Scores with less heat than this are dropped
+        now (datetime): Reference time (default: now)
+
+    Returns:
+        tuple: (buckets deleted, scores deleted)
+    """
+    now = now or datetime.utcnow()
+    buckets = PostViewBucket.__table__
+    scores = TrendingScore.__table__
+    cutoff = view_exponent(now, half_life_hours) + math.log(min_heat)
+
+    deleted_buckets = connection.execute(
+        buckets.delete().where(buckets.c.hour < hour_of(now - timedelta(days=retention_days)))
+    ).rowcount
+    deleted_scores = connection.execute(scores.delete().where(scores.c.score < cutoff)).rowcount
+    return deleted_buckets, deleted_scores
\ No newline at end of file
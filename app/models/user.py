@@ -6,14 +6,37 @@ from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from app import db, login_manager
 
+def search_key(value):
+    """Case-fold a username or email for prefix search."""
+    return value.casefold() if value is not None else None
+
 class User(UserMixin, db.Model):
     """User model for authentication and user management."""
     
     __tablename__ = 'users'
+    __table_args__ = (
+        # Admin list filters read newest first, so each flag combination
+        # has an index that serves both the WHERE clause and the ORDER BY
+        db.Index('ix_users_active_created', 'is_active', 'created_at'),
+        db.Index('ix_users_admin_created', 'is_admin', 'created_at'),
+        db.Index('ix_users_active_admin_created', 'is_active', 'is_admin', 'created_at'),
+        # Prefix searches read username_key/email_key in order, under the same flags
+        db.Index('ix_users_active_username_key', 'is_active', 'username_key'),
+        db.Index('ix_users_admin_username_key', 'is_admin', 'username_key'),
+        db.Index('ix_users_active_admin_username_key', 'is_active', 'is_admin', 'username_key'),
+        db.Index('ix_users_active_email_key', 'is_active', 'email_key'),
+        db.Index('ix_users_admin_email_key', 'is_admin', 'email_key'),
+        db.Index('ix_users_active_admin_email_key', 'is_active', 'is_admin', 'email_key'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
+    
+    # Case-folded copies for prefix search (see search_key); kept in sync on assignment
+    username_key = db.Column(db.String(80), index=True)
+    email_key = db.Column(db.String(120), index=True)
+    
     password_hash = db.Column(db.String(128))
     first_name = db.Column(db.String(50))
     last_name = db.Column(db.String(50))
@@ -21,7 +44,7 @@ class User(UserMixin, db.Model):
     avatar = db.Column(db.String(200))
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_login = db.Column(db.DateTime)
     
@@ -32,6 +55,12 @@ class User(UserMixin, db.Model):
         """String representation of the User model."""
         return f'<User {self.username}>'
     
+    @db.validates('username', 'email')
+    def update_search_key(self, key, value):
+        """Keep the case-folded search column of username and email in sync."""
+        setattr(self, f'{key}_key', search_key(value))
+        return value
+    
     def set_password(self, password):
         """Hash and set the user's password."""
         self.password_hash = generate_password_hash(password)
@@ -214,51 +214,145 @@ document.addEventListener('DOMContentLoaded', function() {
         };
     }
     
-    // Live search functionality
+    // Live search suggestions, served from the in-memory typeahead index
     var searchInput = document.querySelector('#liveSearch');
     if (searchInput) {
-        var debouncedSearch = debounce(function(query) {
-            if (query.length >= 2) {
-                showLoading('#searchResults');
-                apiRequest(`/api/v1/search?q=${encodeURIComponent(query)}`)
+        var latestQuery = '';
+        var debouncedSuggest = debounce(function(query) {
+            latestQuery = query;
+            if (query.trim().length >= 2) {
+                apiRequest(`/api/v1/search/suggest?q=${encodeURIComponent(query)}&limit=8`)
                     .then(data => {
-                        updateSearchResults(data);
+                        // Ignore answers to queries typed over since
+                        if (query === latestQuery) {
+                            updateSuggestions(data.data);
+                        }
                     })
                     .catch(error => {
-                        console.error('Search failed:', error);
+                        console.error('Suggestions failed:', error);
                         hideLoading('#searchResults');
                     });
             } else {
                 hideLoading('#searchResults');
             }
-        }, 300);
+        }, 100);
         
         searchInput.addEventListener('input', function() {
-            debouncedSearch(this.value);
+            debouncedSuggest(this.value);
         });
     }
     
-    function updateSearchResults(data) {
+    function updateSuggestions(data) {
         var resultsContainer = document.querySelector('#searchResults');
-        if (resultsContainer && data.posts) {
+        if (resultsContainer && data && data.suggestions) {
             var html = '';
-            data.posts.forEach(post => {
-                html += `
-                    <div class="card mb-3">
-                        <div class="card-body">
-                            <h5 class="card-title">
-                                <a href="/post/${post.slug}" class="text-decoration-none">${post.title}</a>
-                            </h5>
-                            <p class="card-text">${post.excerpt || post.content.substring(0, 150)}...</p>
-                            <div class="text-muted small">
-                                By ${post.author.username} • ${new Date(post.created_at).toLocaleDateString()}
-                            </div>
-                        </div>
-                    </div>
-                `;
+            data.suggestions.forEach(suggestion => {
+                if (suggestion.type === 'author') {
+                    html += `
+                        <a href="/author/${encodeURIComponent(suggestion.username)}" class="list-group-item list-group-item-action">
+                            <i class="fas fa-user me-2"></i>${escapeHtml(suggestion.username)}
+                            <small class="text-muted ms-2">${suggestion.post_count} posts</small>
+                        </a>
+                    `;
+                } else {
+                    html += `
+                        <a href="/post/${encodeURIComponent(suggestion.slug)}" class="list-group-item list-group-item-action">
+                            <i class="fas fa-file-alt me-2"></i>${escapeHtml(suggestion.title)}
+                            <small class="text-muted ms-2">${escapeHtml(suggestion.author || '')}</small>
+                        </a>
+                    `;
+                }
+            });
+            resultsContainer.innerHTML = html ? `<div class="list-group">${html}</div>` : '';
+        }
+    }
+    
+    // Escape text before inserting it into HTML
+    function escapeHtml(text) {
+        var div = document.createElement('div');
+        div.textContent = text == null ? '' : text;
+        return div.innerHTML;
+    }
+    
+    // Live stream of newly published posts, prepended to the recent posts
+    var recentPosts = document.querySelector('#recentPosts');
+    if (recentPosts && recentPosts.dataset.streamUrl && 'EventSource' in window) {
+        var pageSize = recentPosts.children.length;
+        var postStream = null;
+        var lastEventId = null;
+        var reconnectTimer = null;
+        
+        function openPostStream() {
+            var url = recentPosts.dataset.streamUrl;
+            if (lastEventId) {
+                url += (url.indexOf('?') === -1 ? '?' : '&') + 'last_event_id=' + encodeURIComponent(lastEventId);
+            }
+            // Reconnects after a stream ends (with Last-Event-ID) are handled by the browser
+            postStream = new EventSource(url);
+            postStream.addEventListener('post-published', function(e) {
+                lastEventId = e.lastEventId || lastEventId;
+                var post = JSON.parse(e.data);
+                if (recentPosts.querySelector(`[data-post-id="${post.id}"]`)) {
+                    return;
+                }
+                recentPosts.insertAdjacentHTML('afterbegin', renderPostCard(post));
+                while (pageSize && recentPosts.children.length > pageSize) {
+                    recentPosts.lastElementChild.remove();
+                }
             });
-            resultsContainer.innerHTML = html;
+            postStream.addEventListener('error', function() {
+                // The browser gives up on error responses (e.g. 503 from a busy
+                // server); try again later, spread out so clients do not return together
+                if (postStream.readyState === EventSource.CLOSED && !reconnectTimer) {
+                    reconnectTimer = setTimeout(function() {
+                        reconnectTimer = null;
+                        openPostStream();
+                    }, 20000 + Math.random() * 20000);
+                }
+            });
+        }
+        
+        openPostStream();
+        window.addEventListener('pagehide', function() {
+            clearTimeout(reconnectTimer);
+            postStream.close();
+        });
+    }
+    
+    function renderPostCard(post) {
+        var summary = post.summary || '';
+        if (summary.length > 200) {
+            summary = summary.slice(0, 197) + '...';
         }
+        var category = '';
+        if (post.category) {
+            category = `
+                            <span class="ms-2">
+                                <span class="category-badge" style="background-color: ${escapeHtml(post.category.color || '#667eea')}">
+                                    ${escapeHtml(post.category.name)}
+                                </span>
+                            </span>`;
+        }
+        return `
+            <div class="col-md-6 mb-4" data-post-id="${post.id}">
+                <div class="card h-100">
+                    <div class="card-body">
+                        <h5 class="card-title">
+                            <a href="/post/${encodeURIComponent(post.slug)}" class="text-decoration-none">${escapeHtml(post.title)}</a>
+                            <span class="badge bg-success ms-2">New</span>
+                        </h5>
+                        <p class="card-text">${escapeHtml(summary)}</p>
+                        <div class="post-meta">
+                            <small>
+                                <i class="fas fa-user me-1"></i>${escapeHtml(post.author)}
+                                <i class="fas fa-calendar me-1 ms-2"></i>${new Date(post.created_at).toLocaleDateString()}
+                                <i class="fas fa-eye me-1 ms-2"></i>0 views${category}
+                            </small>
+                        </div>
+                    </div>
+                </div>
+            </div>
+        `;
     }
     
     // Initialize any additional functionality
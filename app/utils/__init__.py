@@ -1,7 +1,14 @@
 """
 Utility functions and helpers.
 """
-from .helpers import generate_slug, format_date, truncate_text
+from .helpers import generate_slug, format_date, truncate_text, count_words, estimate_reading_time
 from .template_filters import register_template_filters
 
-__all__ = ['generate_slug', 'format_date', 'truncate_text', 'register_template_filters'] 
\ No newline at end of file
+__all__ = [
+    'generate_slug',
+    'format_date',
+    'truncate_text',
+    'count_words',
+    'estimate_reading_time',
+    'register_template_filters'
+] 
\ No newline at end of file
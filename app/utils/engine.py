@@ -0,0 +1,114 @@
+"""
+Database engine configuration helpers.
+"""
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+def is_sqlite_uri(uri):
+    """
+    Check whether a database URI points at SQLite.
+
+    Args:
+        uri (str): SQLAlchemy database URI
+
+    Returns:
+        bool: True for SQLite databases
+    """
+    return bool(uri) and make_url(uri).get_backend_name() == 'sqlite'
+
+def build_engine_options(config, uri=None):
+    """
+    Build SQLAlchemy engine options from the app configuration.
+
+    Server databases get a tuned connection pool. SQLite keeps the default
+    pool and relies on the pragmas applied by ``apply_sqlite_pragmas``.
+
+    Args:
+        config: Flask config mapping
+        uri (str): Database URI to build options for (defaults to the primary)
+
+    Returns:
+        dict: Keyword arguments for ``create_engine``
+    """
+    uri = uri or config.get('SQLALCHEMY_DATABASE_URI')
+
+    if is_sqlite_uri(uri):
+        # Let the driver wait on locks as long as SQLite itself would
+        busy_timeout = config['SQLITE_PRAGMAS'].get('busy_timeout', 5000)
+        return {'connect_args': {'timeout': busy_timeout / 1000}}
+
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING']
+    }
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run PRAGMA statements on every new SQLite connection of an engine.
+
+    Args:
+        engine: SQLAlchemy engine
+        pragmas (dict): Pragma names mapped to their values
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    statements = [f'PRAGMA {name}={value}' for name, value in pragmas.items()]
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+def configure_engine_options(app):
+    """
+    Set ``SQLALCHEMY_ENGINE_OPTIONS`` from the structured engine settings.
+
+    Must run before ``db.init_app``. Explicit ``SQLALCHEMY_ENGINE_OPTIONS``
+    entries take precedence over the generated ones.
+
+    Args:
+        app: Flask application instance
+    """
+    options = build_engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+def configure_engine_events(app, db):
+    """
+    Attach connect-time hooks to every engine created for the app.
+
+    Must run after ``db.init_app``, before any connection is opened.
+
+    Args:
+        app: Flask application instance
+        db: Flask-SQLAlchemy extension
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config['SQLITE_PRAGMAS'])
+
+def dispose_inherited_pools(db):
+    """
+    Build a callback dropping the pooled connections a worker inherited at fork.
+
+    A preloaded app may have connected in the server master; sharing those
+    sockets between workers corrupts the protocol stream. ``close=False``
+    leaves the parent's connections open for the parent.
+
+    Args:
+        db: Flask-SQLAlchemy extension
+
+    Returns:
+        callable: Lifecycle callback taking the app
+    """
+    def dispose(app):
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    return dispose
\ No newline at end of file
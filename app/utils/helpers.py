@@ -66,6 +66,37 @@ def truncate_text(text, length=100, suffix='...'):
     
     return text[:length].rsplit(' ', 1)[0] + suffix
 
+def count_words(text):
+    """
+    Count the words in a piece of text.
+    
+    Args:
+        text (str): The text to count
+        
+    Returns:
+        int: Number of whitespace-separated words
+    """
+    if not text:
+        return 0
+    
+    return len(text.split())
+
+def estimate_reading_time(word_count, words_per_minute=200):
+    """
+    Estimate reading time from a word count.
+    
+    Args:
+        word_count (int): Number of words
+        words_per_minute (int): Assumed reading speed
+        
+    Returns:
+        int: Reading time in minutes (at least 1 for non-empty text)
+    """
+    if not word_count:
+        return 0
+    
+    return max(1, round(word_count / words_per_minute))
+
 def allowed_file(filename, allowed_extensions):
     """
     Check if a file has an allowed extension.
@@ -0,0 +1,379 @@
+"""
+Streaming post import from JSON lines or CSV exports.
+
+Records are read one at a time with their byte offsets, so memory stays
+flat whatever the file size and an import can resume from the offset
+stored in its checkpoint. Authors and categories are resolved through
+lookup maps loaded once; slugs are allocated per batch with one
+``slug IN (...)`` query per round of candidates.
+
+Record fields: ``title`` and ``content`` (required), ``slug``, ``excerpt``,
+``author`` (username or email), ``category`` (name or slug),
+``is_published``, ``is_featured``, ``view_count``, ``created_at`` and
+``published_at`` (ISO 8601).
+"""
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from app.utils.helpers import count_words, estimate_reading_time, generate_slug, truncate_text
+
+# Suffixed slugs tried per round for each colliding slug
+SLUG_CANDIDATES_PER_ROUND = 5
+
+# Values per slug IN (...) query, well under SQLite's bound parameter limit
+SLUG_QUERY_CHUNK = 500
+
+class RecordError(ValueError):
+    """Raised for a record that cannot be imported."""
+
+def detect_format(path):
+    """Get the input format from a file extension ('jsonl' or 'csv')."""
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+def _lines(f, offset):
+    """Yield (line, offset after the line) from a binary file, starting at ``offset``."""
+    f.seek(offset)
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        # A byte order mark can only start the file
+        text = line.decode('utf-8-sig' if offset == 0 else 'utf-8')
+        offset += len(line)
+        yield text, offset
+
+def read_records(path, fmt, offset=0):
+    """
+    Stream the records of an export file.
+
+    Args:
+        path (str): Input file
+        fmt (str): 'jsonl' or 'csv' (first row is the header)
+        offset (int): Byte offset to resume from (0 for the start)
+
+    Yields:
+        tuple: (record dict or RecordError, byte offset after the record)
+    """
+    with open(path, 'rb') as f:
+        if fmt == 'jsonl':
+            for line, end in _lines(f, offset):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield RecordError(f'invalid JSON: {e}'), end
+                    continue
+                yield (record if isinstance(record, dict) else RecordError('not a JSON object')), end
+            return
+
+        header_lines = _lines(f, 0)
+        header_line, header_end = next(header_lines, ('', 0))
+        fieldnames = next(csv.reader([header_line]), [])
+        position = {'offset': max(offset, header_end)}
+
+        def tracked(lines):
+            # csv.reader pulls exactly the lines of one record, so the
+            # offset after each record is the end of the last line pulled
+            for line, end in lines:
+                position['offset'] = end
+                yield line
+
+        reader = csv.DictReader(tracked(_lines(f, position['offset'])), fieldnames=fieldnames)
+        for record in reader:
+            yield record, position['offset']
+
+def _text(value):
+    """Normalize an optional text value."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def _flag(value, default=False):
+    """Parse a boolean value from JSON or CSV."""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on', 'y')
+
+def _datetime(value, field):
+    """Parse an ISO 8601 timestamp into naive UTC."""
+    value = _text(value)
+    if value is None:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise RecordError(f'invalid {field}: {value!r}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+class Lookups:
+    """In-memory author and category maps, loaded once per import."""
+
+    def __init__(self, connection, default_author=None, create_categories=False):
+        from app.models import Category, User
+
+        self.connection = connection
+        self.create_categories = create_categories
+        self.authors = {}
+        for user_id, username, email in connection.execute(
+                User.__table__.select().with_only_columns(User.id, User.username, User.email)):
+            self.authors[username.casefold()] = user_id
+            self.authors[email.casefold()] = user_id
+
+        self.categories = {}
+        for category_id, name, slug in connection.execute(
+                Category.__table__.select().with_only_columns(Category.id, Category.name, Category.slug)):
+            self.categories[name.casefold()] = category_id
+            self.categories[slug] = category_id
+        self.categories_created = 0
+
+        self.default_author_id = None
+        if default_author:
+            self.default_author_id = self.authors.get(default_author.casefold())
+            if self.default_author_id is None:
+                raise ValueError(f'Unknown default author: {default_author}')
+
+    def author_id(self, value):
+        """Resolve a username or email (case-insensitive) to a user id."""
+        value = _text(value)
+        if value is None:
+            if self.default_author_id is None:
+                raise RecordError('missing author')
+            return self.default_author_id
+        author_id = self.authors.get(value.casefold())
+        if author_id is None:
+            if self.default_author_id is None:
+                raise RecordError(f'unknown author: {value!r}')
+            return self.default_author_id
+        return author_id
+
+    def category_id(self, value):
+        """Resolve a category name or slug to an id, creating it when allowed."""
+        value = _text(value)
+        if value is None:
+            return None
+        category_id = self.categories.get(value.casefold()) or self.categories.get(generate_slug(value))
+        if category_id is not None:
+            return category_id
+        if not self.create_categories:
+            raise RecordError(f'unknown category: {value!r}')
+
+        from app.models import Category
+
+        now = datetime.utcnow()
+        result = self.connection.execute(Category.__table__.insert().values(
+            name=value, slug=generate_slug(value), is_active=True, created_at=now, updated_at=now))
+        category_id = result.inserted_primary_key[0]
+        self.categories[value.casefold()] = self.categories[generate_slug(value)] = category_id
+        self.categories_created += 1
+        return category_id
+
+def build_row(record, lookups):
+    """
+    Turn an export record into ``posts`` column values.
+
+    Rendered HTML is left empty; posts render on first view or with
+    ``flask posts rerender``.
+
+    Args:
+        record (dict): Parsed record
+        lookups (Lookups): Author and category maps
+
+    Returns:
+        dict: Column values, with ``slug`` holding the requested slug base
+    """
+    from app.models.post import SUMMARY_LENGTH
+
+    title = _text(record.get('title'))
+    content = record.get('content')
+    if not title:
+        raise RecordError('missing title')
+    if not content or not str(content).strip():
+        raise RecordError('missing content')
+    content = str(content)
+
+    created_at = _datetime(record.get('created_at'), 'created_at') or datetime.utcnow()
+    is_published = _flag(record.get('is_published'))
+    published_at = _datetime(record.get('published_at'), 'published_at')
+    excerpt = _text(record.get('excerpt'))
+    word_count = count_words(content)
+    try:
+        view_count = int(record.get('view_count') or 0)
+    except (TypeError, ValueError):
+        raise RecordError(f'invalid view_count: {record.get("view_count")!r}')
+
+    return {
+        'title': title[:200],
+        'slug': generate_slug(_text(record.get('slug')) or title)[:190] or 'post',
+        'content': content,
+        'excerpt': excerpt,
+        'summary': excerpt or truncate_text(content, SUMMARY_LENGTH),
+        'word_count': word_count,
+        'reading_time': estimate_reading_time(word_count),
+        'is_published': is_published,
+        'is_featured': _flag(record.get('is_featured')),
+        'view_count': max(view_count, 0),
+        'author_id': lookups.author_id(record.get('author')),
+        'category_id': lookups.category_id(record.get('category')),
+        'created_at': created_at,
+        'updated_at': created_at,
+        'published_at': published_at or (created_at if is_published else None)
+    }
+
+def allocate_slugs(connection, rows):
+    """
+    Give every row a slug that is unique in the table and within the batch.
+
+    The first round checks every requested slug of the batch in one query;
+    each later round checks the next few suffixed candidates (``slug-2``,
+    ``slug-3``...) of the rows that still collide, again in one query.
+
+    Args:
+        connection: Database connection
+        rows (list): Rows from ``build_row``; their ``slug`` is replaced
+    """
+    from app.models import Post
+
+    slug_column = Post.__table__.c.slug
+    used = set()
+    pending = [(row, row['slug']) for row in rows]
+    first = 1
+
+    while pending:
+        if first == 1:
+            candidates = {id(row): [base] for row, base in pending}
+            next_first = 2
+        else:
+            candidates = {id(row): [f'{base}-{n}' for n in range(first, first + SLUG_CANDIDATES_PER_ROUND)]
+                          for row, base in pending}
+            next_first = first + SLUG_CANDIDATES_PER_ROUND
+
+        wanted = sorted({slug for slugs in candidates.values() for slug in slugs} - used)
+        taken = set()
+        for start in range(0, len(wanted), SLUG_QUERY_CHUNK):
+            chunk = wanted[start:start + SLUG_QUERY_CHUNK]
+            taken.update(connection.execute(
+                slug_column.table.select().with_only_columns(slug_column).where(slug_column.in_(chunk))
+            ).scalars())
+
+        still_pending = []
+        for row, base in pending:
+            for slug in candidates[id(row)]:
+                if slug not in taken and slug not in used:
+                    row['slug'] = slug
+                    used.add(slug)
+                    break
+            else:
+                still_pending.append((row, base))
+
+        pending = still_pending
+        first = next_first
+
+class Checkpoint:
+    """
+    Progress of an import, stored next to the input file.
+
+    Before a batch is committed the checkpoint is marked pending with the
+    batch's offsets and one of its slugs. After a crash, finding that slug
+    in the table tells whether the batch committed, so no batch is lost or
+    imported twice.
+    """
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.size = os.path.getsize(source)
+        self.offset = 0
+        self.imported = 0
+        self.rejected = 0
+        self.pending = None
+
+    @classmethod
+    def load(cls, path, source):
+        """
+        Load the checkpoint of an import, or start a new one.
+
+        Raises:
+            ValueError: If the checkpoint belongs to another or a changed file
+        """
+        checkpoint = cls(path, source)
+        if not os.path.exists(path):
+            return checkpoint
+
+        with open(path, encoding='utf-8') as f:
+            state = json.load(f)
+        if state['source'] != checkpoint.source or state['size'] != checkpoint.size:
+            raise ValueError(f'Checkpoint {path} was written for a different version of the input; '
+                             'use --restart to import from the beginning.')
+
+        checkpoint.offset = state['offset']
+        checkpoint.imported = state['imported']
+        checkpoint.rejected = state['rejected']
+        checkpoint.pending = state.get('pending')
+        return checkpoint
+
+    def recover(self, connection):
+        """
+        Settle a batch left pending by a crash.
+
+        Returns:
+            bool: True if the pending batch had been committed
+        """
+        if not self.pending:
+            return False
+
+        from app.models import Post
+
+        slug_column = Post.__table__.c.slug
+        committed = connection.execute(
+            slug_column.table.select().with_only_columns(slug_column)
+            .where(slug_column == self.pending['slug'])
+        ).first() is not None
+        if committed:
+            self.offset = self.pending['offset']
+            self.imported += self.pending['imported']
+            self.rejected += self.pending['rejected']
+        self.pending = None
+        self.save()
+        return committed
+
+    def begin(self, offset, slug, imported, rejected):
+        """Mark a batch as pending before it is committed."""
+        self.pending = {'offset': offset, 'slug': slug, 'imported': imported, 'rejected': rejected}
+        self.save()
+
+    def advance(self, offset, imported, rejected):
+        """Record a batch (or a run of rejected records) as done."""
+        self.offset = offset
+        self.imported += imported
+        self.rejected += rejected
+        self.pending = None
+        self.save()
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        state = {
+            'source': self.source,
+            'size': self.size,
+            'offset': self.offset,
+            'imported': self.imported,
+            'rejected': self.rejected,
+            'pending': self.pending
+        }
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+
+    def remove(self):
+        """Delete the checkpoint after a completed import."""
+        if os.path.exists(self.path):
+            os.remove(self.path)
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Server and worker lifecycle hooks for pre-forking servers.
+
+Extensions register callbacks for three events, which ``gunicorn.conf.py``
+fires from the matching server hooks:
+
+- ``server_ready``: once in the master, after the app is preloaded and
+  before any worker is forked. Without preloading the master never loads
+  the app, so it runs in each worker instead (including replacements of
+  recycled workers); callbacks must then be safe to repeat, e.g. act once
+  per ``SERVER_PID`` (the master's pid, set in the environment)
+- ``worker_start``: in each worker, right after the fork
+- ``worker_exit``: in each worker as it shuts down (including recycling
+  after ``max_requests``)
+
+Every callback receives the app and runs inside an app context.
+"""
+
+EVENTS = ('server_ready', 'worker_start', 'worker_exit')
+
+class ServerLifecycle:
+    """Flask extension collecting lifecycle callbacks per app."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the app's callback registry."""
+        app.extensions['server_lifecycle'] = {event: [] for event in EVENTS}
+
+    def on(self, app, event, callback):
+        """
+        Register a callback for a lifecycle event.
+
+        Args:
+            app: Flask application instance
+            event (str): One of ``EVENTS``
+            callback (callable): Called with the app
+        """
+        if event not in EVENTS:
+            raise ValueError(f'Unknown lifecycle event: {event}')
+        app.extensions['server_lifecycle'][event].append(callback)
+
+    def fire(self, app, event):
+        """
+        Run the callbacks of an event in registration order.
+
+        A failing callback is logged and does not stop the others, so one
+        extension cannot keep a worker from starting or exiting cleanly.
+
+        Args:
+            app: Flask application instance
+            event (str): One of ``EVENTS``
+        """
+        with app.app_context():
+            for callback in app.extensions['server_lifecycle'][event]:
+                try:
+                    callback(app)
+                except Exception:
+                    app.logger.exception(f'Lifecycle callback {callback!r} failed on {event}')
\ No newline at end of file
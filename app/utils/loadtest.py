@@ -0,0 +1,452 @@
+"""
+Concurrent HTTP load generator for release checks.
+
+Virtual users replay scenarios against a running server (e.g. gunicorn
+with seeded data) through a small asyncio HTTP/1.1 client with keep-alive
+and cookies, and every request is recorded per route for throughput,
+latency and error reports.
+"""
+import asyncio
+import json
+import random
+import re
+import ssl
+import time
+from collections import Counter
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Default share of virtual users running each scenario
+DEFAULT_MIX = {'browse': 70, 'search': 20, 'author': 5, 'admin': 5}
+
+# Delay after which app.js fires a search suggestion request (milliseconds)
+LIVE_SEARCH_DEBOUNCE = 100
+
+# Suggestions app.js asks for per request
+LIVE_SEARCH_LIMIT = 8
+
+CSRF_INPUT = re.compile(r'name="csrf_token"[^>]*value="([^"]+)"|value="([^"]+)"[^>]*name="csrf_token"')
+
+class HTTPError(Exception):
+    """Raised when a response cannot be read."""
+
+class Response:
+    """A parsed HTTP response."""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @property
+    def text(self):
+        """Body decoded as UTF-8."""
+        return self.body.decode('utf-8', 'replace')
+
+    def json(self):
+        """Body parsed as JSON."""
+        return json.loads(self.body)
+
+class HTTPClient:
+    """Minimal keep-alive HTTP/1.1 client holding one connection and a cookie jar."""
+
+    def __init__(self, base_url, timeout=30):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.tls = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.tls else 80)
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.cookies = {}
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        """Close the connection."""
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, params=None, form=None, json_body=None, headers=None):
+        """
+        Send a request and read the whole response (redirects are not followed).
+
+        Args:
+            method (str): HTTP method
+            path (str): Path below the base URL
+            params (dict): Query string parameters
+            form (dict): Form fields to send url-encoded
+            json_body: Object to send as JSON
+            headers (dict): Extra request headers
+
+        Returns:
+            Response: The response
+        """
+        body = b''
+        request_headers = {'Host': self.host, 'Connection': 'keep-alive', 'Accept': '*/*'}
+        if form is not None:
+            body = urlencode(form).encode()
+            request_headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            body = json.dumps(json_body).encode()
+            request_headers['Content-Type'] = 'application/json'
+        if body or method not in ('GET', 'HEAD'):
+            request_headers['Content-Length'] = str(len(body))
+        if self.cookies:
+            request_headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        request_headers.update(headers or {})
+
+        target = self.prefix + path + (f'?{urlencode(params)}' if params else '')
+        head = f'{method} {target} HTTP/1.1\r\n' + \
+               ''.join(f'{k}: {v}\r\n' for k, v in request_headers.items()) + '\r\n'
+
+        reused = self.writer is not None
+        try:
+            return await asyncio.wait_for(self._exchange(head.encode() + body, method), self.timeout)
+        except (ConnectionError, asyncio.IncompleteReadError, HTTPError):
+            await self.close()
+            if not reused:
+                raise
+            # The server closed an idle keep-alive connection; retry once on a new one
+            return await asyncio.wait_for(self._exchange(head.encode() + body, method), self.timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise
+
+    async def _exchange(self, payload, method):
+        """Write a request on the (re)opened connection and read its response."""
+        if self.writer is None:
+            context = ssl.create_default_context() if self.tls else None
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+
+        self.writer.write(payload)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise HTTPError('Connection closed before the response')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').rstrip('\r\n')
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            name = name.strip().lower()
+            value = value.strip()
+            if name == 'set-cookie':
+                self._store_cookie(value)
+            headers[name] = value
+
+        if method == 'HEAD' or status in (204, 304):
+            body = b''
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = await self._read_chunked()
+        elif 'content-length' in headers:
+            body = await self.reader.readexactly(int(headers['content-length']))
+        else:
+            body = await self.reader.read()
+            headers['connection'] = 'close'
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        return Response(status, headers, body)
+
+    async def _read_chunked(self):
+        """Read a chunked transfer-encoded body."""
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                while (await self.reader.readline()) not in (b'\r\n', b''):
+                    pass
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    def _store_cookie(self, header):
+        """Remember a cookie from a Set-Cookie header."""
+        cookie = SimpleCookie()
+        cookie.load(header)
+        for name, morsel in cookie.items():
+            if morsel['expires'] and not morsel.value:
+                self.cookies.pop(name, None)
+            else:
+                self.cookies[name] = morsel.value
+
+class RouteStats:
+    """Latencies, status codes and errors recorded for one route."""
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+
+    def record(self, latency, status=None, ok=True):
+        """
+        Record one request.
+
+        Args:
+            latency (float): Seconds the request took
+            status (int): Response status, None for transport failures
+            ok (bool): False if the request counts as an error
+        """
+        self.latencies.append(latency * 1000)
+        self.statuses[status if status is not None else 'error'] += 1
+        if not ok:
+            self.errors += 1
+
+    @property
+    def requests(self):
+        """Number of requests recorded."""
+        return len(self.latencies)
+
+    @property
+    def error_rate(self):
+        """Share of requests that failed."""
+        return self.errors / self.requests if self.requests else 0.0
+
+    def percentile(self, q):
+        """Get a latency percentile in milliseconds (nearest rank)."""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))]
+
+    def histogram(self):
+        """
+        Count requests per latency bucket.
+
+        Returns:
+            list: (upper bound in ms or None for the overflow bucket, count) pairs
+        """
+        counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        for latency in self.latencies:
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+        return list(zip(list(LATENCY_BUCKETS) + [None], counts))
+
+class LoadTest:
+    """
+    Run a mix of scenarios against a server with concurrent virtual users.
+
+    Scenarios:
+        browse: anonymous visitor reading the home page and posts
+        search: live search keystrokes against /api/v1/search/suggest
+        author: logged-in author creating posts through the API
+        admin: admin loading the dashboard and admin lists
+    """
+
+    def __init__(self, base_url, users=10, duration=30, mix=None, author=None, admin=None,
+                 think_time=0.5, timeout=30, seed=None):
+        self.base_url = base_url.rstrip('/')
+        self.users = users
+        self.duration = duration
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.credentials = {'author': author, 'admin': admin}
+        self.think_time = think_time
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self.stats = {}
+        self.sessions = {}
+        self.slugs = []
+        self.words = []
+        self.deadline = 0.0
+
+    def client(self, cookies=None):
+        """Create a client, optionally sharing a logged-in session."""
+        client = HTTPClient(self.base_url, timeout=self.timeout)
+        client.cookies.update(cookies or {})
+        return client
+
+    async def request(self, client, route, method, path, expect=(200,), **kwargs):
+        """
+        Send a request and record it under a route label.
+
+        Args:
+            client (HTTPClient): Virtual user's client
+            route (str): Label the request is reported under
+            method (str): HTTP method
+            path (str): Request path
+            expect (tuple): Status codes that count as success
+
+        Returns:
+            Response or None: The response, or None on transport failure
+        """
+        stats = self.stats.setdefault(route, RouteStats())
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, HTTPError, ValueError):
+            stats.record(time.perf_counter() - started, ok=False)
+            return None
+
+        stats.record(time.perf_counter() - started, response.status, response.status in expect)
+        return response
+
+    async def pause(self, scale=1.0):
+        """Wait a randomised think time between page views."""
+        if self.think_time:
+            await asyncio.sleep(self.random.uniform(0.5, 1.5) * self.think_time * scale)
+
+    async def setup(self):
+        """Discover seeded posts and log in the author and admin accounts."""
+        client = self.client()
+        try:
+            response = await client.request('GET', '/api/v1/posts',
+                                            params={'per_page': 100, 'count': 'false'})
+            posts = response.json()['data']['posts'] if response.status == 200 else []
+        finally:
+            await client.close()
+
+        self.slugs = [post['slug'] for post in posts]
+        self.words = sorted({word.lower() for post in posts
+                             for word in re.findall(r'[A-Za-z]{4,}', post['title'])})
+        if not self.slugs:
+            raise RuntimeError('No published posts found; seed the database first.')
+
+        for role, credentials in self.credentials.items():
+            if self.mix.get(role) and credentials:
+                self.sessions[role] = await self.login(*credentials)
+
+    async def login(self, username, password):
+        """
+        Log in once through the login form.
+
+        Returns:
+            dict: Session cookies and CSRF token shared by the role's virtual users
+        """
+        client = self.client()
+        try:
+            page = await client.request('GET', '/auth/login')
+            token = _csrf_token(page.text)
+            form = {'username': username, 'password': password}
+            if token:
+                form['csrf_token'] = token
+            response = await client.request('POST', '/auth/login', form=form)
+            if response.status != 302 or response.headers.get('location', '').endswith('/auth/login'):
+                raise RuntimeError(f'Login failed for {username} (status {response.status}).')
+            return {'cookies': dict(client.cookies), 'csrf_token': token}
+        finally:
+            await client.close()
+
+    async def browse(self, client):
+        """Anonymous visitor: home page, a few posts, sometimes the next page."""
+        await self.request(client, 'GET /', 'GET', '/')
+        await self.pause()
+        for slug in self.random.sample(self.slugs, min(len(self.slugs), self.random.randint(1, 3))):
+            await self.request(client, 'GET /post/<slug>', 'GET', f'/post/{slug}')
+            await self.pause()
+        if self.random.random() < 0.3:
+            await self.request(client, 'GET /?page=2', 'GET', '/', params={'page': 2})
+            await self.pause()
+
+    async def search(self, client):
+        """Live search: type a word and fire requests as app.js debounces them."""
+        word = self.random.choice(self.words) if self.words else 'post'
+        typed = ''
+        for index, char in enumerate(word):
+            typed += char
+            gap = self.random.uniform(0.05, 0.45)
+            last = index == len(word) - 1
+            if len(typed) >= 2 and (gap * 1000 >= LIVE_SEARCH_DEBOUNCE or last):
+                await self.request(client, 'GET /api/v1/search/suggest', 'GET', '/api/v1/search/suggest',
+                                   params={'q': typed, 'limit': LIVE_SEARCH_LIMIT})
+            if not last:
+                await asyncio.sleep(gap)
+        await self.pause(2)
+
+    async def author(self, client):
+        """Logged-in author: create a post through the API, then view it."""
+        session = self.sessions.get('author') or {}
+        title = f'Load test post {self.random.getrandbits(48):x}'
+        headers = {'X-CSRFToken': session['csrf_token']} if session.get('csrf_token') else None
+        response = await self.request(client, 'POST /api/v1/posts', 'POST', '/api/v1/posts',
+                                      expect=(201,), headers=headers,
+                                      json_body={'title': title, 'is_published': True,
+                                                 'content': '\n\n'.join(self.random.choice(self.words or ['text'])
+                                                                        for _ in range(50))})
+        if response is not None and response.status == 201:
+            await self.request(client, 'GET /post/<slug>', 'GET', f"/post/{response.json()['data']['slug']}")
+        await self.pause(3)
+
+    async def admin(self, client):
+        """Admin: dashboard and the user and post lists."""
+        await self.request(client, 'GET /admin/', 'GET', '/admin/')
+        await self.pause()
+        await self.request(client, 'GET /admin/posts', 'GET', '/admin/posts')
+        await self.pause()
+        await self.request(client, 'GET /admin/users', 'GET', '/admin/users')
+        await self.pause(2)
+
+    async def run_user(self, scenario):
+        """Repeat a scenario until the test ends."""
+        session = self.sessions.get(scenario) or {}
+        client = self.client(session.get('cookies'))
+        step = getattr(self, scenario)
+        try:
+            while time.perf_counter() < self.deadline:
+                await step(client)
+        finally:
+            await client.close()
+
+    def assign_scenarios(self):
+        """Spread the virtual users over the scenarios by their weights."""
+        available = {name: weight for name, weight in self.mix.items()
+                     if weight > 0 and (name not in self.credentials or name in self.sessions)}
+        if not available:
+            raise RuntimeError('No runnable scenarios (authenticated ones need credentials).')
+        names = list(available)
+        return [self.random.choices(names, weights=[available[n] for n in names])[0]
+                for _ in range(self.users)]
+
+    async def _run(self):
+        await self.setup()
+        scenarios = self.assign_scenarios()
+        started = time.perf_counter()
+        self.deadline = started + self.duration
+        await asyncio.gather(*(self.run_user(scenario) for scenario in scenarios))
+        return time.perf_counter() - started, Counter(scenarios)
+
+    def run(self):
+        """
+        Run the load test.
+
+        Returns:
+            dict: Elapsed seconds, users per scenario and per-route stats
+        """
+        elapsed, scenarios = asyncio.run(self._run())
+        return {'elapsed': elapsed, 'scenarios': dict(scenarios), 'routes': self.stats}
+
+def parse_mix(value):
+    """
+    Parse a scenario mix such as ``'browse=70,search=20,author=5,admin=5'``.
+
+    Returns:
+        dict: Scenario -> weight
+    """
+    mix = {}
+    for part in filter(None, (part.strip() for part in value.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise ValueError(f'Unknown scenario: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+def _csrf_token(html):
+    """Find the CSRF token of a rendered form."""
+    match = CSRF_INPUT.search(html)
+    return (match.group(1) or match.group(2)) if match else None
\ No newline at end of file
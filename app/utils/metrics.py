@@ -0,0 +1,540 @@
+"""
+Prometheus metrics shared by every worker process.
+
+Each process writes its samples into its own memory-mapped file under
+``METRICS_DIR``, so recording never takes a cross-process lock. The
+``/metrics`` view reads and sums the files of the whole directory, so
+scraping any worker reports the process group. Gauges of exited processes
+are dropped; their counters and histograms are folded into one file of
+exited processes (as a worker exits, or at the next scrape if it died), so
+the directory does not grow with every recycled worker. Wipe the directory
+when the server starts.
+"""
+import glob
+import mmap
+import os
+import re
+import struct
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# name -> (type, help)
+FAMILIES = {
+    'http_requests_total': ('counter', 'HTTP requests by endpoint, method and status.'),
+    'http_request_duration_seconds': ('histogram', 'HTTP request latency by endpoint.'),
+    'db_statements_total': ('counter', 'SQL statements executed, by engine and statement type.'),
+    'db_pool_wait_seconds': ('histogram', 'Time spent getting a connection from the pool, opening one included.'),
+    'db_pool_size': ('gauge', 'Connections kept in the pool, summed over live workers.'),
+    'db_pool_checked_out': ('gauge', 'Connections currently checked out, summed over live workers.'),
+    'db_pool_overflow': ('gauge', 'Overflow connections currently open, summed over live workers.'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit or miss).'),
+    'app_errors_total': ('counter', 'Errors handled by the application error handlers.'),
+    'jobs_total': ('counter', 'Background jobs by backend and outcome (enqueued, completed, retried, failed, ran_inline).'),
+    'jobs_queue_depth': ('gauge', 'Background jobs waiting to run.')
+}
+
+# Histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FILE_PATTERN = 'metrics_{pid}.bin'
+FILE_PID = re.compile(r'metrics_(\d+)\.bin$')
+# Counters and histograms of exited processes; matches FILE_PATTERN without a pid
+EXITED_FILE = 'metrics_exited.bin'
+# Held shared while reading the directory and exclusively while folding files
+LOCK_FILE = 'metrics.lock'
+# Pid of the server whose start last emptied the directory
+SERVER_FILE = 'server.pid'
+BUCKET_LABEL = re.compile(r'(?:,)?le="([^"]+)"\}$')
+HISTOGRAM_SUFFIXES = ('_bucket', '_sum', '_count')
+
+class MetricFile:
+    """
+    Append-only table of ``key -> float64`` samples in a memory-mapped file.
+
+    Layout: an 8-byte used-length header, then entries of
+    ``[uint32 key length][key][padding to 8 bytes][float64 value]``.
+    Only the owning process writes; readers parse up to the used length.
+    """
+
+    HEADER = struct.Struct('<Q')
+    LENGTH = struct.Struct('<I')
+    VALUE = struct.Struct('<d')
+
+    def __init__(self, path, initial_size=65536):
+        self.path = path
+        self.positions = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        self.size = max(os.fstat(self.fd).st_size, initial_size)
+        os.ftruncate(self.fd, self.size)
+        self.map = mmap.mmap(self.fd, self.size)
+        self.used = self.HEADER.unpack_from(self.map, 0)[0] or self.HEADER.size
+        for key, position in _entries(self.map, self.used):
+            self.positions[key] = position
+
+    def _position(self, key):
+        """Get the offset of a key's value, appending the key if it is new."""
+        position = self.positions.get(key)
+        if position is not None:
+            return position
+
+        encoded = key.encode('utf-8')
+        entry = (self.LENGTH.size + len(encoded) + 7) & ~7
+        if self.used + entry + self.VALUE.size > self.size:
+            self._grow(self.used + entry + self.VALUE.size)
+
+        self.LENGTH.pack_into(self.map, self.used, len(encoded))
+        self.map[self.used + self.LENGTH.size:self.used + self.LENGTH.size + len(encoded)] = encoded
+        position = self.used + entry
+        self.VALUE.pack_into(self.map, position, 0.0)
+        # Publish the entry only once it is complete
+        self.used = position + self.VALUE.size
+        self.HEADER.pack_into(self.map, 0, self.used)
+        self.positions[key] = position
+        return position
+
+    def _grow(self, needed):
+        """Enlarge the file and map it again."""
+        while self.size < needed:
+            self.size *= 2
+        self.map.close()
+        os.ftruncate(self.fd, self.size)
+        self.map = mmap.mmap(self.fd, self.size)
+
+    def inc(self, key, amount=1.0):
+        """Add to a sample."""
+        position = self._position(key)
+        self.VALUE.pack_into(self.map, position, self.VALUE.unpack_from(self.map, position)[0] + amount)
+
+    def set(self, key, value):
+        """Overwrite a sample."""
+        self.VALUE.pack_into(self.map, self._position(key), value)
+
+    def close(self):
+        """Unmap and close the file."""
+        self.map.close()
+        os.close(self.fd)
+
+def _entries(buffer, used):
+    """Yield ``(key, value offset)`` for each entry of a metric file buffer."""
+    offset = MetricFile.HEADER.size
+    while offset + MetricFile.LENGTH.size <= used:
+        length = MetricFile.LENGTH.unpack_from(buffer, offset)[0]
+        entry = (MetricFile.LENGTH.size + length + 7) & ~7
+        if offset + entry + MetricFile.VALUE.size > used:
+            break
+        key = bytes(buffer[offset + MetricFile.LENGTH.size:offset + MetricFile.LENGTH.size + length])
+        yield key.decode('utf-8'), offset + entry
+        offset += entry + MetricFile.VALUE.size
+
+def read_metric_file(path):
+    """
+    Read every sample of a metric file.
+
+    Args:
+        path (str): File written by a worker
+
+    Returns:
+        dict: Sample key -> value
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MetricFile.HEADER.size:
+        return {}
+
+    used = min(MetricFile.HEADER.unpack_from(data, 0)[0], len(data))
+    return {key: MetricFile.VALUE.unpack_from(data, position)[0]
+            for key, position in _entries(data, used)}
+
+def _file_pid(path):
+    """Get the pid a metric file belongs to (None for the exited file)."""
+    match = FILE_PID.search(path)
+    return int(match.group(1)) if match else None
+
+def pid_alive(pid):
+    """Check whether a process still exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _escape(value):
+    """Escape a label value for the text exposition format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _family(name):
+    """Get the metric family a sample name belongs to."""
+    if name in FAMILIES:
+        return name
+    for suffix in HISTOGRAM_SUFFIXES:
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return None
+
+def clear_metrics_dir(path):
+    """Delete the metric files of previous server runs."""
+    for filename in glob.glob(os.path.join(path, FILE_PATTERN.format(pid='*'))):
+        os.remove(filename)
+
+class _DirectoryLock:
+    """``flock`` on the metrics directory's lock file (a no-op without fcntl)."""
+
+    def __init__(self, directory, exclusive):
+        self.path = os.path.join(directory, LOCK_FILE)
+        self.exclusive = exclusive
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        return self
+
+    def __exit__(self, *exc_info):
+        os.close(self.fd)
+
+def fold_metric_files(directory, paths):
+    """
+    Add the counters and histograms of exited processes to the exited file and delete their files.
+
+    Must be called with the directory lock held exclusively.
+
+    Args:
+        directory (str): Metrics directory
+        paths (list): Metric files of processes that have exited (or are exiting)
+    """
+    exited = None
+    try:
+        for path in paths:
+            try:
+                samples = read_metric_file(path)
+            except FileNotFoundError:
+                continue
+            for key, value in samples.items():
+                family = _family(key.split('{', 1)[0])
+                if family is None or FAMILIES[family][0] == 'gauge' or not value:
+                    continue
+                if exited is None:
+                    exited = MetricFile(os.path.join(directory, EXITED_FILE))
+                exited.inc(key, value)
+            os.remove(path)
+    finally:
+        if exited is not None:
+            exited.close()
+
+class Metrics:
+    """Flask extension recording request, database, cache and error metrics."""
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.enabled = False
+        self._file = None
+        self._pid = None
+        self._keys = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Register the request hooks and the ``/metrics`` view."""
+        self.enabled = app.config['METRICS_ENABLED']
+        self.directory = app.config['METRICS_DIR']
+        app.extensions['metrics'] = self
+
+        if not self.enabled:
+            return
+
+        app.before_request(self._start_timer)
+        app.after_request(self._record_request)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+    def reset(self, app):
+        """
+        Delete the metric files of previous server runs (on server start).
+
+        When every worker calls this (no preloading), only the first call of
+        a server run, as told by ``SERVER_PID``, empties the directory.
+        """
+        if not self.enabled:
+            return
+
+        server = os.environ.get('SERVER_PID')
+        marker = os.path.join(self.directory, SERVER_FILE)
+        with _DirectoryLock(self.directory, exclusive=True):
+            if server and os.path.exists(marker):
+                with open(marker, encoding='utf-8') as f:
+                    if f.read().strip() == server:
+                        return
+            clear_metrics_dir(self.directory)
+            if server:
+                with open(marker, 'w', encoding='utf-8') as f:
+                    f.write(server)
+
+    def retire(self, app):
+        """Fold this process's counters into the exited file as the worker exits."""
+        if not self.enabled or self._pid != os.getpid():
+            return
+        with self._lock, _DirectoryLock(self.directory, exclusive=True):
+            self._file.close()
+            self._file = self._pid = None
+            fold_metric_files(self.directory, [os.path.join(self.directory, FILE_PATTERN.format(pid=os.getpid()))])
+
+    def instrument_engines(self, app, db):
+        """
+        Count statements and time pool checkouts on every engine of the app.
+
+        Args:
+            app: Flask application instance
+            db: Flask-SQLAlchemy extension
+        """
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            for key, engine in db.engines.items():
+                self._instrument_engine(engine, key or 'primary')
+
+    def _instrument_engine(self, engine, label):
+        """Attach the statement and pool listeners to one engine."""
+        @event.listens_for(engine, 'before_cursor_execute')
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+            self.inc('db_statements_total', engine=label, type=kind)
+
+        # Pool events only fire once a connection is handed out, so the wait
+        # is timed around the engine's checkout call; wrapping the engine
+        # rather than its pool survives the pool being recreated by dispose()
+        raw_connection = engine.raw_connection
+
+        def timed_raw_connection():
+            started = perf_counter()
+            connection = raw_connection()
+            self.observe('db_pool_wait_seconds', perf_counter() - started, engine=label)
+            return connection
+
+        engine.raw_connection = timed_raw_connection
+
+        @event.listens_for(engine.pool, 'checkout')
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            self._record_pool(engine.pool, label)
+
+        @event.listens_for(engine.pool, 'checkin')
+        def on_checkin(dbapi_connection, connection_record):
+            self._record_pool(engine.pool, label)
+
+    def register_gauge(self, app, name, callback, **labels):
+        """
+        Report a gauge read at scrape time, for state every process shares.
+
+        Args:
+            app: Flask application instance
+            name (str): Gauge family
+            callback (callable): Returns the current value
+            **labels: Sample labels
+        """
+        if self.enabled:
+            app.extensions.setdefault('metrics_gauges', []).append((self._key(name, labels), callback))
+
+    def sample_key(self, name, **labels):
+        """Get the key of a sample in ``collect()`` results."""
+        return self._key(name, labels)
+
+    def _record_pool(self, pool, label):
+        """Write the pool gauges (only pools with a fixed size report them)."""
+        if hasattr(pool, 'checkedout'):
+            self.set('db_pool_size', pool.size(), engine=label)
+            self.set('db_pool_checked_out', pool.checkedout(), engine=label)
+            self.set('db_pool_overflow', max(pool.overflow(), 0), engine=label)
+
+    def _metric_file(self):
+        """Get this process's metric file (a new one after a fork)."""
+        pid = os.getpid()
+        if self._pid != pid:
+            self._file = MetricFile(os.path.join(self.directory, FILE_PATTERN.format(pid=pid)))
+            self._pid = pid
+        return self._file
+
+    def _key(self, name, labels):
+        """Build (and remember) the sample key for a name and label set."""
+        cache_key = (name, tuple(labels.items()))
+        key = self._keys.get(cache_key)
+        if key is None:
+            rendered = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            key = f'{name}{{{rendered}}}' if rendered else name
+            self._keys[cache_key] = key
+        return key
+
+    def inc(self, name, amount=1.0, **labels):
+        """Increment a counter."""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._metric_file().inc(key, amount)
+
+    def set(self, name, value, **labels):
+        """Set a gauge for this process."""
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._metric_file().set(key, value)
+
+    def observe(self, name, value, **labels):
+        """Record a histogram observation."""
+        if not self.enabled:
+            return
+        index = bisect_left(LATENCY_BUCKETS, value)
+        bound = LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else '+Inf'
+        bucket = self._key(f'{name}_bucket', {**labels, 'le': bound})
+        total = self._key(f'{name}_sum', labels)
+        count = self._key(f'{name}_count', labels)
+        with self._lock:
+            metric_file = self._metric_file()
+            metric_file.inc(bucket)
+            metric_file.inc(total, value)
+            metric_file.inc(count)
+
+    def _start_timer(self):
+        g.metrics_started = perf_counter()
+
+    def _record_request(self, response):
+        started = g.pop('metrics_started', None)
+        endpoint = request.endpoint or 'unmatched'
+        self.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                 status=response.status_code)
+        if started is not None:
+            self.observe('http_request_duration_seconds', perf_counter() - started, endpoint=endpoint)
+        return response
+
+    def collect(self):
+        """
+        Sum the samples of every process.
+
+        Returns:
+            dict: Sample key -> value
+        """
+        pattern = os.path.join(self.directory, FILE_PATTERN.format(pid='*'))
+        dead = [path for path in glob.glob(pattern) if _file_pid(path) and not pid_alive(_file_pid(path))]
+        if dead:
+            # Workers that died without exiting cleanly (killed, timed out)
+            with _DirectoryLock(self.directory, exclusive=True):
+                fold_metric_files(self.directory, [path for path in dead if os.path.exists(path)])
+
+        totals = {}
+        with _DirectoryLock(self.directory, exclusive=False):
+            for path in glob.glob(pattern):
+                pid = _file_pid(path)
+                alive = pid is not None and pid_alive(pid)
+                try:
+                    samples = read_metric_file(path)
+                except FileNotFoundError:
+                    continue
+                for key, value in samples.items():
+                    family = _family(key.split('{', 1)[0])
+                    if family is None or (FAMILIES[family][0] == 'gauge' and not alive):
+                        continue
+                    totals[key] = totals.get(key, 0.0) + value
+
+        if has_app_context():
+            for key, callback in current_app.extensions.get('metrics_gauges', ()):
+                try:
+                    totals[key] = float(callback())
+                except Exception:
+                    current_app.logger.exception(f'Reading metric {key} failed')
+        return totals
+
+    def render(self):
+        """
+        Render the aggregated samples in the Prometheus text format.
+
+        Returns:
+            str: Exposition text
+        """
+        series = {}
+        for key, value in self.collect().items():
+            name, _, labels = key.partition('{')
+            family = _family(name)
+            series.setdefault(family, []).append((name, '{' + labels if labels else '', value))
+
+        lines = []
+        for family in sorted(series):
+            kind, help_text = FAMILIES[family]
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {kind}')
+            if kind == 'histogram':
+                lines.extend(_render_histogram(family, series[family]))
+            else:
+                lines.extend(f'{name}{labels} {_number(value)}' for name, labels, value in sorted(series[family]))
+        return '\n'.join(lines) + '\n'
+
+    def view(self):
+        """Serve the metrics of the whole process group."""
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Unauthorized\n', status=401, mimetype='text/plain')
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+def _render_histogram(family, samples):
+    """Render cumulative buckets, sum and count per label set of a histogram."""
+    buckets = {}
+    lines = []
+    for name, labels, value in samples:
+        if name.endswith('_bucket'):
+            match = BUCKET_LABEL.search(labels)
+            base = labels[:match.start()] + '}' if match else labels
+            base = '' if base == '{}' else base
+            bound = match.group(1) if match else '+Inf'
+            buckets.setdefault(base, {})[bound] = value
+
+    totals = {(name, labels): value for name, labels, value in samples if not name.endswith('_bucket')}
+    for base in sorted(set(buckets) | {labels for _, labels in totals}):
+        counts = buckets.get(base, {})
+        inner = base[1:-1] if base else ''
+        running = 0.0
+        for bound in [str(b) for b in LATENCY_BUCKETS] + ['+Inf']:
+            running += counts.get(bound, 0.0)
+            le = f'{inner},le="{bound}"' if inner else f'le="{bound}"'
+            lines.append(f'{family}_bucket{{{le}}} {_number(running)}')
+        lines.append(f'{family}_sum{base} {_number(totals.get((family + "_sum", base), 0.0))}')
+        lines.append(f'{family}_count{base} {_number(totals.get((family + "_count", base), 0.0))}')
+    return lines
+
+def _number(value):
+    """Format a sample value."""
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+def record_cache(cache, hit):
+    """
+    Count a cache lookup.
+
+    Args:
+        cache (str): Cache name
+        hit (bool): True for a hit
+    """
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.inc('cache_requests_total', cache=cache, result='hit' if hit else 'miss')
+
+def record_error(handler, code):
+    """
+    Count an error passing through an error handler.
+
+    Args:
+        handler (str): Error handler name
+        code (int): Response status code
+    """
+    metrics = current_app.extensions.get('metrics')
+    if metrics is not None:
+        metrics.inc('app_errors_total', handler=handler, code=code)
\ No newline at end of file
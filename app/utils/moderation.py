@@ -0,0 +1,318 @@
+"""
+Admin list filters and bulk moderation of posts and users.
+
+Every filter combination of the admin lists is served by an index that
+also yields the list order, so the lists page by keyset without sorting.
+Username and email searches are prefix matches on case-folded columns,
+run as index range scans.
+
+A bulk action targets explicit ids or every row matching the admin list
+filters. Ids are processed in batches, each applied with a single
+``UPDATE ... WHERE id IN (...)`` and committed on its own, and the caches
+derived from the changed rows are invalidated once per action.
+"""
+import sys
+from datetime import datetime
+from flask import current_app
+from app import db, surrogate_cache, typeahead
+from app.models import Post, User
+from app.models.archive import months_of_posts, rebuild_archive
+from app.models.post_event import record_publications
+from app.models.user import search_key
+from app.utils.pagination import clear_count_cache
+from app.utils.surrogate import row_keys
+
+# Column changes per bulk action; published_at is only set on first publication
+POST_ACTIONS = {
+    'publish': lambda: {'is_published': True,
+                        'published_at': db.func.coalesce(Post.published_at, datetime.utcnow())},
+    'unpublish': lambda: {'is_published': False},
+    'feature': lambda: {'is_featured': True},
+    'unfeature': lambda: {'is_featured': False}
+}
+
+USER_ACTIONS = {
+    'activate': lambda: {'is_active': True},
+    'deactivate': lambda: {'is_active': False},
+    'grant_admin': lambda: {'is_admin': True},
+    'revoke_admin': lambda: {'is_admin': False}
+}
+
+class BulkActionError(ValueError):
+    """Raised for an unknown action or an empty selection."""
+
+def _flag(value):
+    """Parse an optional boolean filter value ('true'/'false', '1'/'0')."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def _int(value):
+    """Parse an optional integer filter value."""
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+def _text(value):
+    """Parse an optional text filter value."""
+    value = value.strip() if isinstance(value, str) else ''
+    return value or None
+
+def post_filters(source):
+    """
+    Read the admin post list filters from request args, form data or JSON.
+
+    Args:
+        source (dict): Mapping holding the filter values
+
+    Returns:
+        dict: Filters understood by ``filter_posts``
+    """
+    status = source.get('status')
+    return {
+        'status': status if status in ('published', 'draft') else None,
+        'featured': _flag(source.get('featured')),
+        'author_id': _int(source.get('author_id')),
+        'author': _text(source.get('author')),
+        'category_id': _int(source.get('category_id'))
+    }
+
+def user_filters(source):
+    """
+    Read the admin user list filters from request args, form data or JSON.
+
+    Args:
+        source (dict): Mapping holding the filter values
+
+    Returns:
+        dict: Filters understood by ``filter_users``
+    """
+    return {
+        'username': _text(source.get('username')),
+        'email': _text(source.get('email')),
+        'active': _flag(source.get('active')),
+        'admin': _flag(source.get('admin'))
+    }
+
+def filter_args(filters):
+    """
+    Turn parsed filters back into query string arguments for links and redirects.
+
+    Args:
+        filters (dict): Filters from ``post_filters`` or ``user_filters``
+
+    Returns:
+        dict: Arguments for ``url_for``, unset filters left out
+    """
+    return {name: ('true' if value else 'false') if isinstance(value, bool) else value
+            for name, value in filters.items() if value is not None}
+
+def prefix_match(column, prefix):
+    """
+    Match values starting with a prefix as an index range.
+
+    ``column >= 'abc' AND column < 'abd'`` uses a plain b-tree index on any
+    database, unlike ``LIKE 'abc%'`` which depends on collation settings.
+
+    Args:
+        column: Case-folded column
+        prefix (str): Search prefix
+
+    Returns:
+        SQL condition
+    """
+    prefix = search_key(prefix)
+    if ord(prefix[-1]) == sys.maxunicode:
+        return column >= prefix
+    return db.and_(column >= prefix, column < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+
+def post_list_keys(filters):
+    """
+    Get the keyset columns of the admin post list.
+
+    Returns:
+        tuple: (columns ending with the primary key, True if newest first)
+    """
+    return [Post.created_at, Post.id], True
+
+def user_list_keys(filters):
+    """
+    Get the keyset columns of the admin user list.
+
+    A prefix search is listed in username or email order, the order of the
+    index it reads; otherwise users are listed newest first.
+
+    Returns:
+        tuple: (columns ending with the primary key, True if descending)
+    """
+    if filters.get('username'):
+        return [User.username_key, User.id], False
+    if filters.get('email'):
+        return [User.email_key, User.id], False
+    return [User.created_at, User.id], True
+
+def filter_posts(query, filters):
+    """Apply admin post list filters to a query."""
+    if filters.get('status') == 'published':
+        query = query.filter(Post.is_published == True)
+    elif filters.get('status') == 'draft':
+        query = query.filter(Post.is_published == False)
+    if filters.get('featured') is not None:
+        query = query.filter(Post.is_featured == filters['featured'])
+    if filters.get('author_id'):
+        query = query.filter(Post.author_id == filters['author_id'])
+    if filters.get('author'):
+        # Exact username, resolved through the username_key index
+        author_id = db.select(User.id).where(User.username_key == search_key(filters['author']))\
+                      .limit(1).scalar_subquery()
+        query = query.filter(Post.author_id == author_id)
+    if filters.get('category_id'):
+        query = query.filter(Post.category_id == filters['category_id'])
+    return query
+
+def filter_users(query, filters):
+    """Apply admin user list filters to a query."""
+    if filters.get('username'):
+        query = query.filter(prefix_match(User.username_key, filters['username']))
+    if filters.get('email'):
+        query = query.filter(prefix_match(User.email_key, filters['email']))
+    if filters.get('active') is not None:
+        query = query.filter(User.is_active == filters['active'])
+    if filters.get('admin') is not None:
+        query = query.filter(User.is_admin == filters['admin'])
+    return query
+
+def _id_batches(model, ids=None, filters=None, apply_filters=None, batch_size=500):
+    """
+    Yield batches of target ids, in id order.
+
+    Explicit ids are chunked as given; a filter selection is walked with
+    keyset pagination on the primary key, so no OFFSET scans are needed.
+    """
+    if ids is not None:
+        ids = sorted({int(i) for i in ids})
+        for start in range(0, len(ids), batch_size):
+            yield ids[start:start + batch_size]
+        return
+
+    last_id = 0
+    while True:
+        query = apply_filters(db.session.query(model.id), filters)\
+                    .filter(model.id > last_id)\
+                    .order_by(model.id)\
+                    .limit(batch_size)
+        batch = [row_id for (row_id,) in query]
+        if not batch:
+            return
+        last_id = batch[-1]
+        yield batch
+
+def bulk_update(model, values, ids=None, filters=None, apply_filters=None,
+                exclude_ids=(), batch_size=500, before_batch=None):
+    """
+    Apply column values to many rows, one UPDATE per batch of ids.
+
+    Rows that already hold the new values are left untouched, so
+    ``updated_at`` only moves for rows that change.
+
+    Args:
+        model: Model class to update
+        values (dict): Column name -> new value (or SQL expression)
+        ids (list): Explicit target ids (None to use the filters)
+        filters (dict): Admin list filters selecting the targets
+        apply_filters (callable): Applies ``filters`` to a query
+        exclude_ids (iterable): Ids never touched (e.g. the acting admin)
+        batch_size (int): Ids per UPDATE statement
+        before_batch (callable): Called with the session connection and each
+            batch of ids before its UPDATE, in the same transaction
+
+    Returns:
+        tuple: (rows changed, ids the UPDATE statements targeted)
+    """
+    exclude_ids = set(exclude_ids)
+    flags = [(getattr(model, column), value) for column, value in values.items() if isinstance(value, bool)]
+    needs_change = db.or_(*[db.or_(column != value, column.is_(None)) for column, value in flags]) \
+        if flags else None
+    changed = 0
+    touched = []
+
+    for batch in _id_batches(model, ids, filters, apply_filters, batch_size):
+        batch = [row_id for row_id in batch if row_id not in exclude_ids]
+        if not batch:
+            continue
+
+        if before_batch is not None:
+            before_batch(db.session.connection(), batch)
+        statement = db.update(model).where(model.id.in_(batch))
+        if needs_change is not None:
+            statement = statement.where(needs_change)
+        result = db.session.execute(statement.values(**values)
+                                    .execution_options(synchronize_session=False))
+        db.session.commit()
+        changed += result.rowcount
+        touched.extend(batch)
+
+    return changed, touched
+
+def run_bulk_action(kind, action, ids=None, filters=None, exclude_ids=(), batch_size=500):
+    """
+    Run a bulk moderation action on posts or users.
+
+    Args:
+        kind (str): 'posts' or 'users'
+        action (str): Action name from ``POST_ACTIONS`` or ``USER_ACTIONS``
+        ids (list): Explicit target ids; None selects every row matching ``filters``
+        filters (dict): Admin list filters (see ``post_filters``/``user_filters``)
+        exclude_ids (iterable): Ids that must not be changed
+        batch_size (int): Ids per UPDATE statement
+
+    Returns:
+        int: Number of rows changed
+    """
+    if kind == 'posts':
+        model, actions, apply_filters = Post, POST_ACTIONS, filter_posts
+    elif kind == 'users':
+        model, actions, apply_filters = User, USER_ACTIONS, filter_users
+    else:
+        raise BulkActionError(f'Unknown bulk target: {kind}')
+
+    if action not in actions:
+        raise BulkActionError(f'Unknown action: {action}')
+    if ids is not None and not ids:
+        raise BulkActionError('No rows selected.')
+
+    # Log publications for the live post stream, which Core UPDATEs would not trigger
+    publishing = model is Post and action == 'publish'
+    changed, touched = bulk_update(model, actions[action](), ids=ids, filters=filters or {},
+                                   apply_filters=apply_filters, exclude_ids=exclude_ids,
+                                   batch_size=batch_size,
+                                   before_batch=record_publications if publishing else None)
+    if changed:
+        invalidate_after_bulk(model, touched)
+        if publishing:
+            current_app.extensions['post_stream'].notify()
+    return changed
+
+def invalidate_after_bulk(model, ids):
+    """
+    Drop the caches derived from changed rows, once per bulk action.
+
+    Cached list totals are cleared, proxy-cached pages of the rows and their
+    listings are purged, the search suggestions are rebuilt on next use, and
+    for posts the archive months are recounted.
+
+    Args:
+        model: Model class that changed
+        ids (list): Ids that were candidates for the change
+    """
+    clear_count_cache()
+
+    # Core UPDATEs skip the session and mapper hooks, so purge and recount here
+    surrogate_cache.purge(row_keys(model.__tablename__, ids) + [model.__tablename__])
+    typeahead.mark_stale()
+    if model is Post:
+        with db.engine.begin() as connection:
+            rebuild_archive(connection, months_of_posts(connection, ids))
\ No newline at end of file
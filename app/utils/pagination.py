@@ -0,0 +1,381 @@
+"""
+Pagination with cached, estimated or skipped total counts.
+
+``paginate`` replaces ``Query.paginate()``. It fetches ``per_page + 1``
+rows so ``has_next`` never needs the total, reuses totals per filter
+signature for ``PAGINATION_COUNT_TTL`` seconds, and on tables larger than
+``PAGINATION_ESTIMATE_THRESHOLD`` rows (per the database's statistics)
+reports an estimated total instead of counting the whole filtered set.
+
+``keyset_paginate`` pages by the last row seen instead of an offset, for
+lists too large to count or skip through (the admin lists).
+"""
+import json
+import math
+import threading
+from collections import OrderedDict
+from time import monotonic
+import sqlalchemy as sa
+from flask import current_app
+from app.utils.metrics import record_cache
+
+# Catalog tables holding row statistics
+SQLITE_STAT = sa.table('sqlite_stat1', sa.column('tbl'), sa.column('idx'), sa.column('stat'))
+SQLITE_MASTER = sa.table('sqlite_master', sa.column('type'), sa.column('name'))
+PG_CLASS = sa.table('pg_class', sa.column('relname'), sa.column('reltuples'))
+
+class Pagination:
+    """One page of results, compatible with Flask-SQLAlchemy's pagination object."""
+
+    def __init__(self, items, page, per_page, total, has_next, total_estimated=False):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.has_next = has_next
+        self.total_estimated = total_estimated
+
+    @property
+    def pages(self):
+        """Number of pages (known pages only when the total was not counted)."""
+        if self.total is None:
+            return self.page + 1 if self.has_next else self.page
+        return max(math.ceil(self.total / self.per_page), self.page + 1 if self.has_next else 0)
+
+    @property
+    def has_prev(self):
+        """True if there is a page before this one."""
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        """Number of the previous page, if any."""
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        """Number of the next page, if any."""
+        return self.page + 1 if self.has_next else None
+
+    def iter_pages(self, left_edge=2, left_current=2, right_current=4, right_edge=2):
+        """
+        Yield page numbers for a pagination widget, with None for gaps.
+
+        Args:
+            left_edge (int): Pages shown at the start
+            left_current (int): Pages shown before the current page
+            right_current (int): Pages shown after the current page
+            right_edge (int): Pages shown at the end
+        """
+        pages_end = self.pages + 1
+        if pages_end == 1:
+            return
+
+        left_end = min(1 + left_edge, pages_end)
+        yield from range(1, left_end)
+        if left_end == pages_end:
+            return
+
+        mid_start = max(left_end, self.page - left_current)
+        mid_end = min(self.page + right_current + 1, pages_end)
+        if mid_start - left_end > 0:
+            yield None
+        yield from range(mid_start, mid_end)
+        if mid_end == pages_end:
+            return
+
+        right_start = max(mid_end, pages_end - right_edge)
+        if right_start - mid_end > 0:
+            yield None
+        yield from range(right_start, pages_end)
+
+    def to_dict(self):
+        """Convert the page metadata to a dictionary for API responses."""
+        return {
+            'page': self.page,
+            'pages': self.pages if self.total is not None else None,
+            'per_page': self.per_page,
+            'total': self.total,
+            'total_estimated': self.total_estimated,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev
+        }
+
+class CountCache:
+    """Per-process cache of total counts keyed by filter signature."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl):
+        """
+        Get a cached value that is younger than ``ttl`` seconds.
+
+        Returns:
+            Cached value, or None when missing or expired
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or monotonic() - entry[0] >= ttl:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entry when full."""
+        with self._lock:
+            self.entries[key] = (monotonic(), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        """Forget every cached count."""
+        with self._lock:
+            self.entries.clear()
+
+def get_count_cache():
+    """Get the count cache of the current app."""
+    return current_app.extensions.setdefault('pagination_counts', CountCache())
+
+def clear_count_cache():
+    """Drop cached totals so the next listing counts again (e.g. after bulk writes)."""
+    get_count_cache().clear()
+
+def query_signature(query):
+    """
+    Get a key identifying a query's filters (the SQL and its parameters).
+
+    Args:
+        query: SQLAlchemy query
+
+    Returns:
+        str: Signature
+    """
+    compiled = query.order_by(None).statement.compile()
+    return f'{compiled}|{sorted(compiled.params.items(), key=lambda item: item[0])!r}'
+
+def estimate_table_rows(session, table):
+    """
+    Read a table's row count from the database statistics.
+
+    SQLite only has statistics after ``ANALYZE`` (or ``PRAGMA optimize``);
+    PostgreSQL keeps ``pg_class.reltuples`` current through autovacuum.
+
+    Args:
+        session: Database session
+        table (str): Table name
+
+    Returns:
+        int or None: Estimated rows, or None when there are no statistics
+    """
+    dialect = session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        has_stats = session.execute(
+            sa.select(SQLITE_MASTER.c.name).where(SQLITE_MASTER.c.type == 'table',
+                                                  SQLITE_MASTER.c.name == 'sqlite_stat1')
+        ).first()
+        if not has_stats:
+            return None
+        stat = session.execute(
+            sa.select(SQLITE_STAT.c.stat).where(SQLITE_STAT.c.tbl == table).limit(1)
+        ).scalar()
+        return int(stat.split()[0]) if stat else None
+
+    if dialect == 'postgresql':
+        rows = session.execute(
+            sa.select(PG_CLASS.c.reltuples).where(PG_CLASS.c.relname == table)
+        ).scalar()
+        return int(rows) if rows is not None and rows >= 0 else None
+
+    return None
+
+def estimate_count(session, query, cap):
+    """
+    Estimate the number of rows a query returns without a full count.
+
+    PostgreSQL reports the planner's row estimate; other databases count at
+    most ``cap`` rows, so the cost stays bounded however large the set is.
+
+    Args:
+        session: Database session
+        query: SQLAlchemy query
+        cap (int): Largest number of rows to count
+
+    Returns:
+        int: Estimated rows
+    """
+    bind = session.get_bind()
+    if bind.dialect.name == 'postgresql':
+        sql = query.order_by(None).statement.compile(dialect=bind.dialect,
+                                                     compile_kwargs={'literal_binds': True})
+        plan = session.connection().exec_driver_sql(f'EXPLAIN (FORMAT JSON) {sql}').scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+
+    capped = query.order_by(None).with_entities(sa.literal(1)).limit(cap).subquery()
+    return session.execute(sa.select(sa.func.count()).select_from(capped)).scalar()
+
+def count_total(query):
+    """
+    Get a query's total, cached per filter signature.
+
+    Args:
+        query: SQLAlchemy query
+
+    Returns:
+        tuple: (total, True if the total is an estimate)
+    """
+    config = current_app.config
+    ttl = config['PAGINATION_COUNT_TTL']
+    threshold = config['PAGINATION_ESTIMATE_THRESHOLD']
+    cache = get_count_cache()
+    session = query.session
+
+    key = query_signature(query)
+    cached = cache.get(key, ttl)
+    record_cache('pagination_count', cached is not None)
+    if cached is not None:
+        return cached
+
+    estimated = False
+    table = query.column_descriptions[0]['entity'].__table__.name if threshold else None
+    if table:
+        table_key = f'table-rows:{table}'
+        table_rows = cache.get(table_key, ttl)
+        if table_rows is None:
+            table_rows = estimate_table_rows(session, table) or 0
+            cache.set(table_key, table_rows)
+        estimated = table_rows > threshold
+
+    if estimated:
+        total = estimate_count(session, query, threshold)
+    else:
+        total = query.order_by(None).count()
+
+    cache.set(key, (total, estimated))
+    return total, estimated
+
+def paginate(query, page=1, per_page=10, count=True, total=None):
+    """
+    Fetch one page of a query.
+
+    Args:
+        query: SQLAlchemy query (with its ORDER BY)
+        page (int): Page number, starting at 1
+        per_page (int): Items per page
+        count (bool): Also report the total (False only answers ``has_next``)
+        total (int): Total already known, e.g. from a rollup table (skips counting)
+
+    Returns:
+        Pagination: The page
+    """
+    page = max(page or 1, 1)
+    per_page = max(per_page or 1, 1)
+    offset = (page - 1) * per_page
+
+    rows = query.limit(per_page + 1).offset(offset).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    estimated = False
+    if total is not None:
+        total = max(total, offset + len(items) + (1 if has_next else 0))
+    elif not has_next and (items or page == 1):
+        # The last page tells the exact total for free
+        total = offset + len(items)
+    elif count:
+        total, estimated = count_total(query)
+        if items:
+            # A cached or estimated total never undercuts the rows already seen
+            total = max(total, offset + len(items) + (1 if has_next else 0))
+
+    return Pagination(items, page, per_page, total, has_next, total_estimated=estimated)
+
+class KeysetPage:
+    """One page of a keyset-paginated listing; cursors are row ids."""
+    
+    def __init__(self, items, per_page, has_next, has_prev, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+    
+    def to_dict(self):
+        """Convert the page metadata to a dictionary for API responses."""
+        return {
+            'per_page': self.per_page,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor
+        }
+
+def keyset_query(query, keys, descending=True, anchor=None, backwards=False):
+    """
+    Order a query by its keyset columns, starting after an anchor row.
+    
+    Args:
+        query: SQLAlchemy query
+        keys (list): Ordering columns, ending with the primary key
+        descending (bool): Listing order of every key
+        anchor (tuple): Key values of the row to start after (None for the first page)
+        backwards (bool): Read the rows before the anchor instead (in reverse order)
+        
+    Returns:
+        Query ordered by ``keys`` and limited to rows past the anchor
+    """
+    reverse = descending != backwards
+    if anchor is not None:
+        row = sa.tuple_(*keys)
+        values = sa.tuple_(*anchor)
+        query = query.filter(row < values if reverse else row > values)
+    return query.order_by(None).order_by(*[key.desc() if reverse else key.asc() for key in keys])
+
+def keyset_paginate(query, keys, descending=True, per_page=20, after=None, before=None):
+    """
+    Fetch one page of a query by keyset, so deep pages cost the same as the first.
+    
+    With an index on ``keys`` (the filter columns first), each page is a
+    single index range read; no total is counted.
+    
+    Args:
+        query: SQLAlchemy query (its ORDER BY is replaced)
+        keys (list): Ordering columns, ending with the primary key
+        descending (bool): Listing order of every key
+        per_page (int): Items per page
+        after: Id of the row before this page (``next_cursor`` of the previous page)
+        before: Id of the row after this page (``prev_cursor`` of the next page)
+        
+    Returns:
+        KeysetPage: The page
+    """
+    per_page = max(per_page or 1, 1)
+    id_key = keys[-1]
+    cursor = before if before is not None else after
+    
+    anchor = None
+    if cursor is not None:
+        # An unknown cursor (e.g. a deleted row) restarts from the first page
+        anchor = query.session.query(*keys).filter(id_key == cursor).first()
+    backwards = anchor is not None and before is not None
+    
+    rows = keyset_query(query, keys, descending, anchor, backwards).limit(per_page + 1).all()
+    more = len(rows) > per_page
+    items = rows[:per_page]
+    
+    if backwards:
+        items.reverse()
+        has_next, has_prev = True, more
+    else:
+        has_next, has_prev = more, anchor is not None
+    
+    return KeysetPage(items, per_page, has_next, has_prev,
+                      next_cursor=getattr(items[-1], id_key.key) if items and has_next else None,
+                      prev_cursor=getattr(items[0], id_key.key) if items and has_prev else None)
\ No newline at end of file
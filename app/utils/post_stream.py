@@ -0,0 +1,404 @@
+"""
+Server-sent events stream of newly published posts.
+
+Publishing a post writes a ``post_events`` row in the same transaction
+(ORM writes through the mapper hooks below, bulk moderation through
+``record_publications``). Each worker process runs one poller thread that
+reads the log with an id cursor and broadcasts new events to the streams
+it serves, so a post published by any worker reaches every client, and
+the database sees one small query per process per poll interval however
+many clients are connected. A commit in this process wakes its poller
+right away.
+
+Idle streams only wait on a shared condition. Under the gevent worker
+class (``GUNICORN_WORKER_CLASS=gevent``) they are greenlets, so a worker
+holds thousands of them; thread-based workers need one thread per open
+stream. ``POSTS_STREAM_MAX_CLIENTS`` caps the streams of each process, so
+they cannot take every thread away from ordinary requests; clients over
+the cap are turned away with ``StreamsBusy`` and retry later.
+
+Log ids are taken when a publication is written, not when it commits,
+so with concurrent writers (PostgreSQL) a lower id can commit after the
+cursor has passed it. The poller remembers the ids it skipped and looks
+for them again for ``POSTS_STREAM_GAP_SECONDS``; streams follow the order
+in which events were read, not their ids. Event ids are the log ids: a
+reconnecting ``EventSource`` sends the last one in ``Last-Event-ID`` and
+receives what this process read after it.
+"""
+import json
+import os
+import threading
+from collections import deque
+from time import monotonic
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from werkzeug.wsgi import ClosingIterator
+
+EVENT_NAME = 'post-published'
+
+# Events read per poll; a longer backlog is caught up over several polls
+POLL_BATCH_SIZE = 500
+
+# Skipped ids looked for again, at most (more are sequence jumps, not open transactions)
+MAX_GAPS = 1000
+
+class StreamsBusy(Exception):
+    """Raised when a worker already serves ``POSTS_STREAM_MAX_CLIENTS`` streams."""
+
+def event_payload(row):
+    """Build the JSON body of a stream event from an ``events_after`` row."""
+    return json.dumps({
+        'id': row.post_id,
+        'title': row.title,
+        'slug': row.slug,
+        'summary': row.summary,
+        'author': row.username,
+        'category': {'name': row.category_name, 'slug': row.category_slug,
+                     'color': row.category_color} if row.category_name else None,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'published_at': row.published_at.isoformat() if row.published_at else None
+    })
+
+def format_event(event_id, data):
+    """Encode one server-sent event."""
+    return f'id: {event_id}\nevent: {EVENT_NAME}\ndata: {data}\n\n'
+
+class PostEventBroadcaster:
+    """Per-process fan-out of the publication log to open streams."""
+
+    def __init__(self, app):
+        self.app = app
+        self.poll_interval = app.config['POSTS_STREAM_POLL_SECONDS']
+        self.backlog = app.config['POSTS_STREAM_BACKLOG']
+        self.gap_seconds = app.config['POSTS_STREAM_GAP_SECONDS']
+        self.max_clients = app.config['POSTS_STREAM_MAX_CLIENTS']
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def reset_after_fork(self):
+        """Drop the poller state inherited from a parent process."""
+        # (sequence, event id, encoded payload) of recent events in the order
+        # they were read; streams wait on the sequence. Every event read with
+        # an id above ``floor`` is held here
+        self.events = deque(maxlen=self.backlog)
+        self.sequence = 0
+        self.cursor = 0
+        self.floor = 0
+        # Ids the cursor skipped whose transactions may still commit: expiry time
+        self.gaps = {}
+        self.clients = 0
+        self._condition = threading.Condition()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+
+    def ensure_poller(self):
+        """Start the poller thread, again after a fork (e.g. preloading servers)."""
+        if self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+
+            self.reset_after_fork()
+            from app import db
+            with self.app.app_context(), db.engine.connect() as connection:
+                from app.models.post_event import latest_event_id
+                self.cursor = self.floor = latest_event_id(connection)
+            threading.Thread(target=self.run, name='post-stream-poller', daemon=True).start()
+            self._pid = os.getpid()
+
+    def run(self):
+        """Poller thread loop."""
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                while self.poll() == POLL_BATCH_SIZE:
+                    pass
+            except Exception:
+                self.app.logger.exception('Polling the post event log failed')
+            self._wakeup.wait(self.poll_interval)
+
+    def poll(self):
+        """
+        Read events after the cursor, and skipped ids committed since, and wake the streams.
+
+        Returns:
+            int: Events read
+        """
+        from app import db
+        from app.models.post_event import events_after, latest_event_id
+
+        now = monotonic()
+        self.gaps = {event_id: expiry for event_id, expiry in self.gaps.items() if expiry > now}
+        with self.app.app_context(), db.engine.connect() as connection:
+            rows = events_after(connection, self.cursor, POLL_BATCH_SIZE, include_ids=list(self.gaps))
+            rewound = not rows and latest_event_id(connection) < self.cursor
+        if rewound:
+            self.rewind()
+            return self.poll()
+        if not rows:
+            return 0
+
+        fresh = []
+        cursor = self.cursor
+        for row in rows:
+            if row.id <= self.cursor:
+                # Its transaction took the id before the cursor passed it
+                self.gaps.pop(row.id, None)
+            else:
+                self._skipped(cursor, row.id, now)
+                cursor = row.id
+            # Posts deleted or unpublished since the event have nothing to show
+            if row.title and row.is_published:
+                fresh.append((row.id, event_payload(row)))
+
+        with self._condition:
+            for event_id, payload in fresh:
+                if len(self.events) == self.events.maxlen:
+                    self.floor = max(self.floor, self.events[0][1])
+                self.sequence += 1
+                self.events.append((self.sequence, event_id, payload))
+            self.cursor = cursor
+            self._condition.notify_all()
+        return len(rows)
+
+    def rewind(self):
+        """
+        Read the log from the start again after its ids went back below the cursor.
+
+        That happens when a log table created without AUTOINCREMENT is
+        emptied by pruning (or the database is restored): the events left
+        were all logged since. Open streams keep their positions, which
+        count events read rather than log ids.
+        """
+        self.app.logger.warning('Post event ids restarted below the stream cursor %s', self.cursor)
+        self.gaps = {}
+        with self._condition:
+            self.events.clear()
+            self.cursor = self.floor = 0
+
+    def _skipped(self, previous, event_id, now):
+        """Remember the ids between two consecutive events read, until they expire."""
+        for missing in range(max(previous + 1, event_id - MAX_GAPS), event_id):
+            self.gaps[missing] = now + self.gap_seconds
+        for oldest in list(self.gaps)[:len(self.gaps) - MAX_GAPS]:
+            del self.gaps[oldest]
+
+    def notify(self):
+        """Poll now instead of at the next interval (a post was just published here)."""
+        if self._pid == os.getpid():
+            self._wakeup.set()
+
+    def replay(self, after_id):
+        """
+        Get the events a reconnecting client missed.
+
+        When the client's last event is in the backlog, everything read
+        after it is replayed, including lower ids that committed late;
+        otherwise the events with higher ids are.
+
+        Args:
+            after_id (int): Last event id the client received
+
+        Returns:
+            tuple: (events as (id, payload) pairs, position to wait from)
+        """
+        from app import db
+        from app.models.post_event import events_after, latest_event_id
+
+        with self._condition:
+            if self.cursor < after_id:
+                # Another worker sent it before this poller read it (or the log restarted)
+                self._condition.wait_for(lambda: self.cursor >= after_id or self._stopping.is_set(),
+                                         self.poll_interval * 2)
+            position, cursor, floor = self.sequence, self.cursor, self.floor
+            entries = list(self.events)
+
+        for index, entry in enumerate(entries):
+            if entry[1] == after_id:
+                return [(event_id, payload) for _, event_id, payload in entries[index + 1:]], position
+        if after_id > cursor:
+            with db.engine.connect() as connection:
+                if latest_event_id(connection) >= after_id:
+                    # This poller is behind; what it reads next may repeat a few events
+                    return [], position
+            # The log restarted below the client's id (see ``rewind``)
+            after_id = 0
+        if after_id >= floor:
+            return [(event_id, payload) for _, event_id, payload in entries if event_id > after_id], position
+
+        # Older than the in-memory backlog: read the newest missed events from the log
+        with db.engine.connect() as connection:
+            rows = events_after(connection, after_id, self.backlog, until_id=cursor)
+        return [(row.id, event_payload(row)) for row in rows if row.title and row.is_published], position
+
+    def wait(self, position, timeout):
+        """
+        Block until events are read after ``position``, or ``timeout`` passes.
+
+        Args:
+            position (int): Sequence number the stream has sent up to
+
+        Returns:
+            tuple: (new (id, payload) pairs in read order; position to wait from next)
+        """
+        with self._condition:
+            if self.sequence <= position and not self._stopping.is_set():
+                self._condition.wait(timeout)
+            return ([(event_id, payload) for sequence, event_id, payload in self.events if sequence > position],
+                    self.sequence)
+
+    def connect(self):
+        """
+        Count a new stream, unless this process already serves the maximum.
+
+        Raises:
+            StreamsBusy: If ``POSTS_STREAM_MAX_CLIENTS`` streams are open
+        """
+        with self._condition:
+            if self.clients >= self.max_clients:
+                raise StreamsBusy(f'{self.clients} streams open')
+            self.clients += 1
+
+    def disconnect(self):
+        """Count a stream as closed."""
+        with self._condition:
+            self.clients -= 1
+
+    def position(self):
+        """Get the sequence number of the newest event read."""
+        with self._condition:
+            return self.sequence
+
+    def stopping(self):
+        """Check whether the process is shutting down."""
+        return self._pid == os.getpid() and self._stopping.is_set()
+
+    def shutdown(self):
+        """Stop the poller and end the open streams."""
+        if self._pid != os.getpid():
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        with self._condition:
+            self._condition.notify_all()
+
+class PostStream:
+    """Flask extension serving the live stream of published posts."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the app's broadcaster (its poller starts with the first stream)."""
+        app.extensions['post_stream'] = PostEventBroadcaster(app)
+
+    def instrument_models(self, session_class, post_model):
+        """
+        Log publications made through the ORM and wake the poller when they commit.
+
+        Args:
+            session_class: Session class whose commits are watched
+            post_model: Post model class
+        """
+        from app.models.archive import keep_old_value
+
+        # Load the old value of an expired flag when it is set, so re-saving
+        # a published post does not count as publishing it (the archive
+        # rollup registers the same listener)
+        if not event.contains(post_model.is_published, 'set', keep_old_value):
+            event.listen(post_model.is_published, 'set', keep_old_value, active_history=True)
+        if not event.contains(post_model, 'after_insert', _post_inserted):
+            event.listen(post_model, 'after_insert', _post_inserted)
+            event.listen(post_model, 'after_update', _post_updated)
+        if not event.contains(session_class, 'after_commit', _notify_committed):
+            event.listen(session_class, 'after_commit', _notify_committed)
+            event.listen(session_class, 'after_rollback', _forget_published)
+
+    def stream(self, last_event_id=None):
+        """
+        Create the event stream of one client.
+
+        The generator runs outside the request context, so an idle stream
+        holds no database connection. It ends after
+        ``POSTS_STREAM_MAX_SECONDS`` (the browser reconnects and resumes
+        from its last event id) or when the worker shuts down.
+
+        Args:
+            last_event_id (int): Last event the client received, if reconnecting
+
+        Returns:
+            iterable: Encoded server-sent events
+
+        Raises:
+            StreamsBusy: If this process serves ``POSTS_STREAM_MAX_CLIENTS`` streams
+        """
+        broadcaster = current_app.extensions['post_stream']
+        broadcaster.ensure_poller()
+        broadcaster.connect()
+        config = current_app.config
+        heartbeat = config['POSTS_STREAM_HEARTBEAT_SECONDS']
+        max_seconds = config['POSTS_STREAM_MAX_SECONDS']
+        retry_ms = config['POSTS_STREAM_RETRY_MS']
+
+        try:
+            if last_event_id is None:
+                missed, position = [], broadcaster.position()
+            else:
+                missed, position = broadcaster.replay(last_event_id)
+        except Exception:
+            broadcaster.disconnect()
+            raise
+
+        def generate():
+            # Tell the browser the reconnect delay; also sends the headers right away
+            yield f'retry: {retry_ms}\n\n'
+            events = missed
+            deadline = monotonic() + max_seconds
+            while True:
+                if events:
+                    yield ''.join(format_event(event_id, data) for event_id, data in events)
+                remaining = deadline - monotonic()
+                if remaining <= 0 or broadcaster.stopping():
+                    return
+                events, position = broadcaster.wait(position, min(heartbeat, remaining))
+                if not events:
+                    yield ': keepalive\n\n'
+
+        # The server closes the response however the stream ends, even
+        # when the client left before the first event was sent
+        return ClosingIterator(generate(), [broadcaster.disconnect])
+
+    def shutdown(self, app=None):
+        """Stop the poller of an app and end its streams."""
+        (app or current_app).extensions['post_stream'].shutdown()
+
+def _was_published(state):
+    """Check whether a flushed update published a draft."""
+    history = state.attrs.is_published.history
+    return bool(history.added and history.added[0]) and not (history.deleted and history.deleted[0])
+
+def _post_inserted(mapper, connection, post):
+    if post.is_published:
+        _log_publication(connection, post)
+
+def _post_updated(mapper, connection, post):
+    if _was_published(inspect(post)):
+        _log_publication(connection, post)
+
+def _log_publication(connection, post):
+    from app.models.post_event import record_publication
+    record_publication(connection, post.id)
+    session = inspect(post).session
+    if session is not None:
+        session.info['post_stream_published'] = True
+
+def _notify_committed(session):
+    """Wake this process's poller after publications commit."""
+    if session.info.pop('post_stream_published', False) and has_app_context():
+        current_app.extensions['post_stream'].notify()
+
+def _forget_published(session):
+    session.info.pop('post_stream_published', None)
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+EXPLAIN QUERY PLAN checks for the model query builders.
+
+Plans are taken on an empty in-memory SQLite database created from the
+models, so they reflect the declared indexes rather than local data.
+"""
+import re
+from datetime import datetime
+import sqlalchemy as sa
+
+# A table read without any index, e.g. "SCAN posts"
+FULL_SCAN = re.compile(r'^SCAN (?!.* USING (?:COVERING )?(?:INDEX|INTEGER PRIMARY KEY))')
+
+# Sorting or grouping rows in a temporary b-tree instead of reading an index in order
+TEMP_BTREE = 'USE TEMP B-TREE'
+
+def hot_queries():
+    """
+    Get the queries behind the public pages and API listings.
+
+    Returns:
+        dict: Query name -> SQLAlchemy query
+    """
+    from app.models import Post, Category, ArchiveMonth, TrendingScore
+
+    return {
+        'Post.published_query()': Post.published_query(),
+        'Post.published_query(category_id)': Post.published_query(category_id=1),
+        'Post.published_query(author_id)': Post.published_query(author_id=1),
+        'Post.published_query(category_id, author_id)': Post.published_query(category_id=1, author_id=1),
+        'Post.featured_query()': Post.featured_query(),
+        'Post.search_query()': Post.search_query('flask'),
+        'Post.related_query()': Post.related_query(1, 1),
+        'Post.archive_query()': Post.archive_query(2024, 1),
+        'Post.archive_query(category_id)': Post.archive_query(2024, 1, category_id=1),
+        'ArchiveMonth.months_query()': ArchiveMonth.months_query(),
+        'ArchiveMonth.months_query(category_id)': ArchiveMonth.months_query(1),
+        'TrendingBoard.load()': TrendingScore.query.order_by(TrendingScore.score.desc()),
+        'Category.active_query()': Category.active_query(),
+        'Category.post_counts_query()': Category.post_counts_query([1, 2, 3]),
+        **admin_list_queries()
+    }
+
+def admin_list_queries():
+    """
+    Get the admin list queries for every filter combination, past a keyset anchor.
+
+    Returns:
+        dict: Query name -> SQLAlchemy query
+    """
+    from itertools import product
+    from app.models import Post, User
+    from app.utils.moderation import filter_posts, filter_users, post_list_keys, user_list_keys
+    from app.utils.pagination import keyset_query
+
+    post_values = {'status': 'published', 'featured': True, 'author': 'alice', 'category_id': 1}
+    user_values = {'username': 'ali', 'email': 'ali', 'active': True, 'admin': False}
+    anchor = (datetime(2024, 1, 1), 1)
+    queries = {}
+
+    for model, values, apply_filters, list_keys in (
+            (Post, post_values, filter_posts, post_list_keys),
+            (User, user_values, filter_users, user_list_keys)):
+        for used in product((False, True), repeat=len(values)):
+            filters = {name: value for (name, value), on in zip(values.items(), used) if on}
+            keys, descending = list_keys(filters)
+            anchor_values = ('ali', 1) if keys[0] is not model.created_at else anchor
+            query = keyset_query(apply_filters(model.query, filters), keys, descending, anchor_values)
+            queries[f'admin {model.__tablename__}({", ".join(filters)})'] = query
+
+    return queries
+
+def explain(engine, query):
+    """
+    Get the SQLite query plan of a query.
+
+    Args:
+        engine: SQLite engine holding the schema
+        query: SQLAlchemy query
+
+    Returns:
+        list: Plan step details, outermost first
+    """
+    sql = query.statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    return [row[-1] for row in rows]
+
+def plan_problems(details):
+    """
+    Find the plan steps that regress a query to a full scan or a sort.
+
+    Args:
+        details (list): Plan step details from ``explain``
+
+    Returns:
+        list: Offending plan steps
+    """
+    return [detail for detail in details if FULL_SCAN.match(detail) or TEMP_BTREE in detail]
+
+def check_query_plans(metadata, queries):
+    """
+    Explain each query against a fresh schema.
+
+    Args:
+        metadata: Model metadata to create the schema from
+        queries (dict): Query name -> SQLAlchemy query
+
+    Returns:
+        dict: Query name -> (plan steps, offending steps)
+    """
+    engine = sa.create_engine('sqlite://')
+    try:
+        metadata.create_all(engine)
+        results = {}
+        for name, query in queries.items():
+            details = explain(engine, query)
+            results[name] = (details, plan_problems(details))
+        return results
+    finally:
+        engine.dispose()
\ No newline at end of file
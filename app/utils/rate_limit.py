@@ -0,0 +1,219 @@
+"""
+Token-bucket rate limiting shared across server worker processes.
+"""
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import wraps
+from flask import current_app, request
+from flask_login import current_user
+from werkzeug.exceptions import TooManyRequests
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+PERIODS = {
+    'second': 1,
+    'minute': 60,
+    'hour': 3600,
+    'day': 86400
+}
+
+def parse_limit(limit):
+    """
+    Parse a limit such as ``'5/minute'`` or ``'100/hour'``.
+
+    Args:
+        limit (str): Requests per period
+
+    Returns:
+        tuple: (capacity, seconds per period)
+    """
+    amount, _, period = limit.partition('/')
+    period = period.strip().rstrip('s')
+    if period not in PERIODS:
+        raise ValueError(f'Invalid rate limit period: {limit}')
+    return int(amount), PERIODS[period]
+
+def _refill(tokens, updated, now, capacity, rate, cost):
+    """
+    Apply a token-bucket step.
+
+    Returns:
+        tuple: (allowed, tokens left, seconds until enough tokens)
+    """
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+class MemoryBucketStore:
+    """Per-process token buckets (development and tests)."""
+
+    def __init__(self):
+        self.buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, cost=1):
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key (str): Bucket key
+            capacity (int): Bucket size
+            rate (float): Tokens added per second
+            cost (int): Tokens this request costs
+
+        Returns:
+            tuple: (allowed, retry_after seconds)
+        """
+        now = time.time()
+        with self._lock:
+            tokens, updated = self.buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _refill(tokens, updated, now, capacity, rate, cost)
+            self.buckets[key] = (tokens, now)
+        return allowed, retry_after
+
+class MmapBucketStore:
+    """
+    Token buckets in a memory-mapped file shared by all worker processes.
+
+    The file is a fixed-size open-addressing hash table of
+    ``(key hash, tokens, updated)`` slots, so every check is O(1): one
+    hash, a short probe and an exclusive ``flock`` on the file. When the
+    probe window is full the least recently used slot is recycled, which
+    at worst resets an idle client's bucket to full.
+    """
+
+    SLOT = struct.Struct('<Qdd')
+    PROBES = 8
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.slots = slots
+        self.size = slots * self.SLOT.size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._open()
+
+    def _open(self):
+        """Open and map the file (again in each forked process, for flock)."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < self.size:
+            os.ftruncate(self.fd, self.size)
+        self.map = mmap.mmap(self.fd, self.size)
+        self._pid = os.getpid()
+
+    def consume(self, key, capacity, rate, cost=1):
+        """
+        Take tokens from a bucket.
+
+        Args:
+            key (str): Bucket key
+            capacity (int): Bucket size
+            rate (float): Tokens added per second
+            cost (int): Tokens this request costs
+
+        Returns:
+            tuple: (allowed, retry_after seconds)
+        """
+        if self._pid != os.getpid():
+            self._open()
+
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') or 1
+        start = key_hash % self.slots
+        now = time.time()
+        slot_size = self.SLOT.size
+
+        with self._lock:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                target = None
+                oldest = None
+                for probe in range(self.PROBES):
+                    offset = ((start + probe) % self.slots) * slot_size
+                    stored_hash, tokens, updated = self.SLOT.unpack_from(self.map, offset)
+                    if stored_hash == key_hash:
+                        target = (offset, tokens, updated)
+                        break
+                    if stored_hash == 0:
+                        target = (offset, capacity, now)
+                        break
+                    if oldest is None or updated < oldest[2]:
+                        oldest = (offset, capacity, updated)
+
+                if target is None:
+                    target = (oldest[0], capacity, now)
+
+                offset, tokens, updated = target
+                allowed, tokens, retry_after = _refill(tokens, updated, now, capacity, rate, cost)
+                self.SLOT.pack_into(self.map, offset, key_hash, tokens, now)
+            finally:
+                if fcntl:
+                    fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+        return allowed, retry_after
+
+class RateLimiter:
+    """Flask extension providing per-route rate-limit decorators."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the bucket store configured for the app."""
+        storage = app.config['RATELIMIT_STORAGE']
+        if storage == 'mmap':
+            store = MmapBucketStore(app.config['RATELIMIT_STORAGE_PATH'], app.config['RATELIMIT_SLOTS'])
+        elif storage == 'memory':
+            store = MemoryBucketStore()
+        else:
+            raise ValueError(f'Unknown RATELIMIT_STORAGE: {storage}')
+
+        app.extensions['rate_limiter'] = store
+
+    def limit(self, limit, key='ip', scope=None, methods=None):
+        """
+        Decorator limiting how often a client may call a route.
+
+        Args:
+            limit (str): Requests per period, e.g. '5/minute'
+            key (str): 'ip' for per-address buckets, 'user' for per-user
+                buckets (anonymous callers fall back to their address)
+            scope (str): Bucket namespace (defaults to the endpoint name)
+            methods (list): Only limit these HTTP methods (default: all)
+
+        Returns:
+            callable: Route decorator
+        """
+        capacity, period = parse_limit(limit)
+        rate = capacity / period
+
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if current_app.config['RATELIMIT_ENABLED'] and \
+                   (methods is None or request.method in methods):
+                    bucket = f'{scope or request.endpoint}:{self._identity(key)}'
+                    store = current_app.extensions['rate_limiter']
+                    allowed, retry_after = store.consume(bucket, capacity, rate)
+                    if not allowed:
+                        raise TooManyRequests(retry_after=max(1, int(retry_after + 0.999)))
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+
+    @staticmethod
+    def _identity(key):
+        """Get the client identity a bucket belongs to."""
+        if key == 'user' and current_user.is_authenticated:
+            return f'user:{current_user.id}'
+        return f'ip:{request.remote_addr}'
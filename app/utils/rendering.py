@@ -0,0 +1,114 @@
+"""
+Markdown rendering pipeline for post content.
+"""
+import hashlib
+from html.parser import HTMLParser
+
+# Bump whenever the rendering output, or the fields derived from its text,
+# change so stored HTML is re-rendered (version 2: summaries from rendered text)
+RENDERER_VERSION = 2
+
+ALLOWED_TAGS = [
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'del', 'div', 'em', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 'span',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'ul'
+]
+
+ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title'],
+    'abbr': ['title'],
+    'img': ['src', 'alt', 'title'],
+    'code': ['class'],
+    'div': ['class'],
+    'pre': ['class'],
+    'span': ['class'],
+    'td': ['align'],
+    'th': ['align']
+}
+
+MARKDOWN_EXTENSIONS = ['fenced_code', 'codehilite', 'tables', 'sane_lists']
+
+MARKDOWN_EXTENSION_CONFIGS = {
+    'codehilite': {'css_class': 'highlight', 'guess_lang': False}
+}
+
+def content_hash(text):
+    """
+    Hash post content to detect when stored HTML is stale.
+
+    Args:
+        text (str): Raw post content
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+def render_markdown(text):
+    """
+    Render Markdown to sanitized HTML with syntax-highlighted code blocks.
+
+    Args:
+        text (str): Raw Markdown content
+
+    Returns:
+        str: Safe HTML
+    """
+    # Imported here so workers that never render do not pay for them at startup
+    import bleach
+    import markdown
+
+    html = markdown.markdown(
+        text or '',
+        extensions=MARKDOWN_EXTENSIONS,
+        extension_configs=MARKDOWN_EXTENSION_CONFIGS,
+        output_format='html'
+    )
+    return bleach.clean(html, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+class _TextExtractor(HTMLParser):
+    """Collect the text of an HTML fragment, keeping words of adjacent elements apart."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        self.parts.append(' ')
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+def html_text(html):
+    """
+    Get the plain text readers see in rendered HTML (no markup or Markdown syntax).
+
+    Args:
+        html (str): Sanitized HTML from ``render_markdown``
+
+    Returns:
+        str: Text with whitespace collapsed to single spaces
+    """
+    extractor = _TextExtractor()
+    extractor.feed(html or '')
+    extractor.close()
+    return ' '.join(''.join(extractor.parts).split())
+
+def render_content_batch(items):
+    """
+    Render a batch of posts (used by worker processes for bulk re-renders).
+
+    Args:
+        items (list): (post_id, content) tuples
+
+    Returns:
+        list: (post_id, content hash, html, plain text) tuples
+    """
+    results = []
+    for post_id, content in items:
+        html = render_markdown(content)
+        results.append((post_id, content_hash(content), html, html_text(html)))
+    return results
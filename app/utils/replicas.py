@@ -0,0 +1,154 @@
+"""
+Read/write splitting across the primary database and read replicas.
+"""
+import threading
+from time import monotonic, time
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+SAFE_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS'])
+
+# Flask session key holding the end of the read-your-writes window
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+class RoutingSession(Session):
+    """
+    Session that sends reads of read-only requests to a replica.
+
+    Flushes, DML statements and everything after them in the same session
+    go to the primary bind.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.use_primary = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        """Pick a replica engine for reads, otherwise defer to Flask-SQLAlchemy."""
+        if bind is None and not self.use_primary:
+            if self._flushing or _is_write(clause):
+                self.use_primary = True
+                if has_request_context():
+                    g.db_wrote = True
+            else:
+                router = current_app.extensions.get('replica_router')
+                engine = router.read_engine() if router else None
+                if engine is not None:
+                    return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def _is_write(clause):
+    """Check whether a statement has to run on the primary."""
+    if clause is None:
+        return False
+    # Raw SQL cannot be classified, so it is treated as a write
+    return isinstance(clause, (sa.sql.dml.UpdateBase, sa.sql.elements.TextClause))
+
+class ReplicaRouter:
+    """Round-robin selection of healthy read replicas."""
+
+    def __init__(self, db, bind_keys, health_check_interval=30, read_your_writes=5):
+        self.db = db
+        self.bind_keys = list(bind_keys)
+        self.health_check_interval = health_check_interval
+        self.read_your_writes = read_your_writes
+        self._health = {key: (True, float('-inf')) for key in self.bind_keys}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Register the router and its request hooks with the app."""
+        app.extensions['replica_router'] = self
+        app.after_request(self._remember_write)
+
+    def read_engine(self):
+        """
+        Get a replica engine for the current request, if it may use one.
+
+        Returns:
+            Engine or None: Replica engine, or None to use the primary
+        """
+        if not self.bind_keys or not has_request_context():
+            return None
+
+        if request.method not in SAFE_METHODS:
+            return None
+
+        if session.get(PRIMARY_UNTIL_KEY, 0) > time():
+            return None
+
+        engines = self.db.engines
+        for _ in range(len(self.bind_keys)):
+            with self._lock:
+                key = self.bind_keys[self._next % len(self.bind_keys)]
+                self._next += 1
+
+            if self.is_healthy(key, engines[key]):
+                return engines[key]
+
+        return None
+
+    def is_healthy(self, key, engine, force=False):
+        """
+        Check a replica, re-probing it once the last result is stale.
+
+        Args:
+            key (str): Bind key of the replica
+            engine: Replica engine
+            force (bool): Probe even if the last result is still fresh
+
+        Returns:
+            bool: True if the replica answered its last health check
+        """
+        healthy, checked_at = self._health[key]
+        if not force and monotonic() - checked_at < self.health_check_interval:
+            return healthy
+
+        try:
+            with engine.connect() as connection:
+                connection.execute(sa.text('SELECT 1'))
+            healthy = True
+        except sa.exc.DBAPIError:
+            current_app.logger.warning(f'Read replica {key} failed its health check')
+            healthy = False
+
+        self._health[key] = (healthy, monotonic())
+        return healthy
+
+    def status(self):
+        """Get the last known health of every replica."""
+        return {key: healthy for key, (healthy, _) in self._health.items()}
+
+    def _remember_write(self, response):
+        """Pin the user's session to the primary for a while after a write."""
+        if g.get('db_wrote') and request.method not in SAFE_METHODS and self.read_your_writes:
+            session[PRIMARY_UNTIL_KEY] = time() + self.read_your_writes
+        return response
+
+def replica_bind_key(index):
+    """Get the ``SQLALCHEMY_BINDS`` key for the replica at ``index``."""
+    return f'replica_{index}'
+
+def configure_replica_binds(app, engine_options):
+    """
+    Add one ``SQLALCHEMY_BINDS`` entry per configured replica URL.
+
+    Args:
+        app: Flask application instance
+        engine_options (callable): Builds engine options for a URI
+
+    Returns:
+        list: Bind keys of the replicas
+    """
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    keys = []
+
+    for index, url in enumerate(app.config['DATABASE_REPLICA_URLS']):
+        key = replica_bind_key(index)
+        binds[key] = {'url': url, **engine_options(app.config, url)}
+        keys.append(key)
+
+    app.config['SQLALCHEMY_BINDS'] = binds
+    return keys
@@ -0,0 +1,315 @@
+"""
+Deterministic fixture generation for large local datasets.
+
+Rows are built as plain dictionaries and written with Core ``insert()``
+in ``executemany`` batches, one commit per batch, bypassing the ORM unit
+of work. Every table draws from its own random stream derived from the
+seed, so the same options always produce the same dataset.
+"""
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from time import perf_counter
+import sqlalchemy as sa
+from app.utils.helpers import estimate_reading_time, generate_slug, truncate_text
+
+# Vocabulary for titles and content
+WORDS = (
+    'flask python database index query cache server request response template '
+    'deploy docker worker thread process memory latency throughput benchmark '
+    'profile session cookie token login password security api endpoint route '
+    'blueprint model schema migration column table row batch stream queue job '
+    'search filter page cursor offset count view post author category draft '
+    'publish feature admin user content markdown render html style script '
+    'performance scale replica primary shard pool connection timeout retry '
+    'error logging metrics trace debug test fixture seed data import export '
+    'archive trend summary design pattern practice guide tutorial tips notes'
+).split()
+
+FILLER = (
+    'the a of and to in is for with on that this as by we it from at or can '
+    'when how why more most each every your our into over under about'
+).split()
+
+FIRST_NAMES = (
+    'Alice Bob Carol Dave Erin Frank Grace Heidi Ivan Judy Karl Laura Mallory '
+    'Niaj Olivia Peggy Quinn Rupert Sybil Trent Uma Victor Wendy Xavier Yara Zoe'
+).split()
+
+LAST_NAMES = (
+    'Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez '
+    'Lopez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Thompson'
+).split()
+
+CATEGORY_NAMES = (
+    'Technology', 'Programming', 'Databases', 'DevOps', 'Security', 'Design',
+    'Performance', 'Testing', 'Career', 'Tutorials', 'News', 'Opinion'
+)
+
+CATEGORY_COLORS = ('#007bff', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#6f42c1')
+
+# Paragraphs generated once per run; post bodies are drawn from this pool
+PARAGRAPH_POOL_SIZE = 512
+
+class SeedOptions:
+    """Shape of a generated dataset."""
+
+    def __init__(self, seed=42, until=datetime(2025, 1, 1), days=365, min_words=150,
+                 max_words=1200, publish_ratio=0.8, featured_ratio=0.02, views_alpha=1.2,
+                 views_scale=25, inactive_ratio=0.03):
+        self.seed = seed
+        self.until = until
+        self.days = days
+        self.min_words = min_words
+        self.max_words = max(max_words, min_words)
+        self.publish_ratio = publish_ratio
+        self.featured_ratio = featured_ratio
+        self.views_alpha = views_alpha
+        self.views_scale = views_scale
+        self.inactive_ratio = inactive_ratio
+
+    @property
+    def since(self):
+        """Start of the window the generated rows were created in."""
+        return self.until - timedelta(days=self.days)
+
+    def random(self, stream):
+        """Get the random generator of one table, independent of the others."""
+        return random.Random(f'{self.seed}:{stream}')
+
+def _timestamps(rng, since, until, count):
+    """Yield ``count`` increasing creation times spread over a window."""
+    step = (until - since).total_seconds() / max(count, 1)
+    for index in range(count):
+        yield since + timedelta(seconds=(index + rng.random()) * step)
+
+def user_rows(options, first_id, count, password_hash):
+    """
+    Generate user rows.
+
+    The first user of an empty table is ``admin``; every user shares one
+    password hash, so no hashing is done per row.
+
+    Args:
+        options (SeedOptions): Dataset shape
+        first_id (int): Id of the first generated user
+        count (int): Users to generate
+        password_hash (str): Hash stored for every user
+
+    Yields:
+        dict: Column values
+    """
+    rng = options.random('users')
+    created = _timestamps(rng, options.since, options.until, count)
+    for user_id, created_at in zip(range(first_id, first_id + count), created):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        is_admin = user_id == 1
+        username = 'admin' if is_admin else f'{first_name}{last_name}{user_id}'.lower()
+        email = f'{username}@example.com'
+        yield {
+            'id': user_id,
+            'username': username,
+            'username_key': username.casefold(),
+            'email': email,
+            'email_key': email.casefold(),
+            'password_hash': password_hash,
+            'first_name': first_name,
+            'last_name': last_name,
+            'is_active': is_admin or rng.random() >= options.inactive_ratio,
+            'is_admin': is_admin,
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+def category_rows(options, first_id, count):
+    """
+    Generate category rows.
+
+    Args:
+        options (SeedOptions): Dataset shape
+        first_id (int): Id of the first generated category
+        count (int): Categories to generate
+
+    Yields:
+        dict: Column values
+    """
+    for category_id in range(first_id, first_id + count):
+        cycle, index = divmod(category_id - 1, len(CATEGORY_NAMES))
+        name = CATEGORY_NAMES[index] + (f' {cycle + 1}' if cycle else '')
+        yield {
+            'id': category_id,
+            'name': name,
+            'slug': generate_slug(name),
+            'description': f'Posts about {name.lower()}.',
+            'color': CATEGORY_COLORS[category_id % len(CATEGORY_COLORS)],
+            'is_active': True,
+            'created_at': options.since,
+            'updated_at': options.since
+        }
+
+def _paragraphs(rng):
+    """Build the paragraph pool as (text, word count) pairs."""
+    pool = []
+    for _ in range(PARAGRAPH_POOL_SIZE):
+        words = [rng.choice(WORDS) if rng.random() < 0.6 else rng.choice(FILLER)
+                 for _ in range(rng.randint(30, 120))]
+        text = ' '.join(words).capitalize() + '.'
+        pool.append((text, len(words)))
+    return pool
+
+def _skewed_weights(rng, count, alpha=1.5):
+    """Get cumulative Pareto weights, so a few rows get most of the picks."""
+    total = 0.0
+    weights = []
+    for _ in range(count):
+        total += rng.paretovariate(alpha)
+        weights.append(total)
+    return weights
+
+def post_rows(options, first_id, count, author_ids, category_ids):
+    """
+    Generate post rows.
+
+    Authors and categories are picked with a long-tail distribution and
+    view counts follow a Pareto distribution. Rendered HTML is left empty;
+    posts render on first view or with ``flask posts rerender``.
+
+    Args:
+        options (SeedOptions): Dataset shape
+        first_id (int): Id of the first generated post
+        count (int): Posts to generate
+        author_ids (list): Ids of the users to attribute posts to
+        category_ids (list): Ids of the categories to file posts under
+
+    Yields:
+        dict: Column values
+    """
+    from app.models.post import SUMMARY_LENGTH
+
+    rng = options.random('posts')
+    pool = _paragraphs(rng)
+    author_weights = _skewed_weights(rng, len(author_ids))
+    category_weights = _skewed_weights(rng, len(category_ids)) if category_ids else None
+    created = _timestamps(rng, options.since, options.until, count)
+
+    # Draws use random() directly; randint/randrange cost several calls each
+    draw = rng.random
+    word_span = options.max_words - options.min_words + 1
+
+    for post_id, created_at in zip(range(first_id, first_id + count), created):
+        title_words = rng.choices(WORDS, k=3 + int(draw() * 6))
+        title = ' '.join(title_words).title()
+
+        target = options.min_words + int(draw() * word_span)
+        paragraphs = []
+        word_count = 0
+        while word_count < target:
+            text, words = pool[int(draw() * PARAGRAPH_POOL_SIZE)]
+            paragraphs.append(text)
+            word_count += words
+        content = '\n\n'.join(paragraphs)
+
+        is_published = draw() < options.publish_ratio
+        yield {
+            'id': post_id,
+            'title': title,
+            # WORDS are lowercase ASCII, so the slug needs no normalizing
+            'slug': f'{"-".join(title_words)}-{post_id}',
+            'content': content,
+            'summary': truncate_text(content, SUMMARY_LENGTH),
+            'word_count': word_count,
+            'reading_time': estimate_reading_time(word_count),
+            'is_published': is_published,
+            'is_featured': is_published and draw() < options.featured_ratio,
+            'view_count': int((rng.paretovariate(options.views_alpha) - 1) * options.views_scale)
+                          if is_published else 0,
+            'author_id': rng.choices(author_ids, cum_weights=author_weights)[0],
+            'category_id': rng.choices(category_ids, cum_weights=category_weights)[0]
+                           if category_ids else None,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'published_at': created_at + timedelta(minutes=int(draw() * 120)) if is_published else None
+        }
+
+def insert_rows(connection, table, rows, batch_size=5000, progress=None):
+    """
+    Insert rows with one ``executemany`` and one commit per batch.
+
+    Args:
+        connection: Database connection (committed after every batch)
+        table: Table to insert into
+        rows: Iterable of column value dicts
+        batch_size (int): Rows per statement and commit
+        progress (callable): Called with (rows inserted, seconds elapsed) per batch
+
+    Returns:
+        int: Rows inserted
+    """
+    statement = table.insert()
+    inserted = 0
+    started = perf_counter()
+    batch = []
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            connection.execute(statement, batch)
+            connection.commit()
+            inserted += len(batch)
+            batch = []
+            if progress:
+                progress(inserted, perf_counter() - started)
+
+    if batch:
+        connection.execute(statement, batch)
+        connection.commit()
+        inserted += len(batch)
+        if progress:
+            progress(inserted, perf_counter() - started)
+
+    return inserted
+
+def next_id(connection, table):
+    """Get the id following the largest one in a table."""
+    return (connection.execute(sa.select(sa.func.max(table.c.id))).scalar() or 0) + 1
+
+@contextmanager
+def bulk_load_settings(connection):
+    """
+    Relax durability on a SQLite connection for the length of a bulk load.
+
+    ``synchronous=OFF`` skips the fsync of every commit; an application
+    crash cannot corrupt the file, a power loss mid-load can (reseed then).
+    Other databases are left as they are.
+    """
+    if connection.dialect.name != 'sqlite':
+        yield
+        return
+
+    previous = connection.exec_driver_sql('PRAGMA synchronous').scalar()
+    connection.exec_driver_sql('PRAGMA synchronous=OFF')
+    try:
+        yield
+    finally:
+        connection.exec_driver_sql(f'PRAGMA synchronous={int(previous)}')
+
+@contextmanager
+def deferred_indexes(connection, table):
+    """
+    Drop a table's non-unique indexes during a bulk load and rebuild them after.
+
+    Building an index once from the loaded rows is far cheaper than keeping
+    it current through millions of inserts in random key order. Unique
+    indexes stay, so duplicates are still rejected row by row.
+    """
+    indexes = [index for index in table.indexes if not index.unique]
+    for index in indexes:
+        index.drop(connection)
+    connection.commit()
+    try:
+        yield
+    finally:
+        for index in indexes:
+            index.create(connection)
+        connection.commit()
\ No newline at end of file
@@ -0,0 +1,397 @@
+"""
+Slow query log with captured query plans.
+
+Statements slower than ``SLOW_QUERY_THRESHOLD`` are written as JSON lines
+with their parameters, the endpoint that ran them, the application call
+site and the database's ``EXPLAIN`` output. Each process writes and rotates
+its own file (``slow_queries.<pid>.log`` next to ``SLOW_QUERY_LOG``), as
+rotating one file shared by several processes loses records. The admin slow
+query page reads every file and aggregates them by statement fingerprint.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import traceback
+from collections import Counter
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from time import perf_counter
+from flask import has_request_context, request
+from sqlalchemy import event
+from app.utils.metrics import pid_alive
+
+# EXPLAIN prefix per dialect (none of these run the statement)
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN '
+}
+
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+# Savepoint isolating the EXPLAIN from the transaction of the explained statement
+EXPLAIN_SAVEPOINT = 'slow_query_explain'
+
+# Application frames kept in the call site, innermost last
+CALL_SITE_DEPTH = 4
+
+MAX_STATEMENT_LENGTH = 5000
+MAX_PARAMS_LENGTH = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|(?<!:):\w+|\$\d+')
+_VALUE_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_statement(statement):
+    """
+    Reduce a statement to its shape: literals, placeholders and IN lists collapsed.
+
+    Args:
+        statement (str): SQL statement
+
+    Returns:
+        str: Normalized statement
+    """
+    sql = _STRING_LITERAL.sub('?', statement)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _VALUE_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+def fingerprint(statement):
+    """
+    Get a short id shared by statements of the same shape.
+
+    Args:
+        statement (str): SQL statement
+
+    Returns:
+        str: 12-character hex fingerprint
+    """
+    return hashlib.sha1(normalize_statement(statement).encode('utf-8')).hexdigest()[:12]
+
+def explain(dialect, connection, statement, parameters):
+    """
+    Capture the query plan of a statement on the connection that ran it.
+
+    Args:
+        dialect (str): SQLAlchemy dialect name
+        connection: Pool-proxied DBAPI connection
+        statement (str): SQL statement as sent to the driver
+        parameters: Driver parameters
+
+    Returns:
+        list: Plan lines (empty when the statement cannot be explained)
+    """
+    prefix = EXPLAIN_PREFIXES.get(dialect)
+    if prefix is None or not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return []
+
+    # A failed statement aborts the whole transaction on PostgreSQL, so
+    # the EXPLAIN runs in a savepoint that is rolled back when it fails
+    isolated = dialect != 'sqlite'
+    cursor = connection.cursor()
+    try:
+        if isolated:
+            try:
+                cursor.execute(f'SAVEPOINT {EXPLAIN_SAVEPOINT}')
+            except Exception as e:
+                return [f'EXPLAIN skipped, no savepoint: {type(e).__name__}: {e}']
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        except Exception as e:
+            if isolated:
+                cursor.execute(f'ROLLBACK TO SAVEPOINT {EXPLAIN_SAVEPOINT}')
+            return [f'EXPLAIN failed: {type(e).__name__}: {e}']
+        if isolated:
+            cursor.execute(f'RELEASE SAVEPOINT {EXPLAIN_SAVEPOINT}')
+    finally:
+        cursor.close()
+
+    # SQLite puts the step description last; PostgreSQL and MySQL first
+    column = -1 if dialect == 'sqlite' else 0
+    return [str(row[column]) for row in rows]
+
+def call_site(root, depth=CALL_SITE_DEPTH):
+    """
+    Get the application frames that led to the current statement.
+
+    Args:
+        root (str): Directory of the application package
+        depth (int): Frames to keep
+
+    Returns:
+        list: 'path:line in function' entries, innermost last
+    """
+    base = os.path.dirname(root)
+    frames = [frame for frame in traceback.extract_stack()[:-1]
+              if frame.filename.startswith(root) and frame.filename != __file__]
+    return [f'{os.path.relpath(frame.filename, base)}:{frame.lineno} in {frame.name}'
+            for frame in frames[-depth:]]
+
+def process_log_path(path, pid):
+    """
+    Get the log file of one process.
+
+    Args:
+        path (str): Configured log path, e.g. ``instance/slow_queries.log``
+        pid (int): Process id
+
+    Returns:
+        str: e.g. ``instance/slow_queries.1234.log``
+    """
+    root, ext = os.path.splitext(path)
+    return f'{root}.{pid}{ext}'
+
+def process_log_files(path):
+    """
+    Find the per-process log files of a configured log path.
+
+    Args:
+        path (str): Configured log path
+
+    Returns:
+        dict: pid -> log file (rotated backups not included)
+    """
+    root, ext = os.path.splitext(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    pattern = re.compile(re.escape(os.path.basename(root)) + r'\.(\d+)' + re.escape(ext) + '$')
+    if not os.path.isdir(directory):
+        return {}
+
+    files = {}
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            files[int(match.group(1))] = os.path.join(directory, name)
+    return files
+
+def prune_process_logs(path, backups, keep):
+    """
+    Delete the logs of exited processes beyond the ``keep`` most recently written.
+
+    Args:
+        path (str): Configured log path
+        backups (int): Rotated files kept next to each log
+        keep (int): Logs of exited processes to keep
+    """
+    exited = [filename for pid, filename in process_log_files(path).items() if not pid_alive(pid)]
+    exited.sort(key=lambda filename: os.path.getmtime(filename) if os.path.exists(filename) else 0,
+                reverse=True)
+    for filename in exited[keep:]:
+        for index in range(backups + 1):
+            try:
+                os.remove(f'{filename}.{index}' if index else filename)
+            except FileNotFoundError:
+                pass
+
+def read_log_file(path, backups=0):
+    """
+    Read the records of one log file and its rotated files, oldest first.
+
+    Args:
+        path (str): Log file
+        backups (int): Rotated files kept next to it
+
+    Returns:
+        list: Records
+    """
+    records = []
+    for index in range(backups, -1, -1):
+        filename = f'{path}.{index}' if index else path
+        try:
+            with open(filename, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            continue
+    return records
+
+def read_slow_queries(path, backups=0):
+    """
+    Read the records of every process's log, oldest first.
+
+    Args:
+        path (str): Configured log path
+        backups (int): Rotated files kept next to each log
+
+    Returns:
+        list: Records
+    """
+    records = read_log_file(path, backups)  # written by earlier versions
+    for filename in process_log_files(path).values():
+        records.extend(read_log_file(filename, backups))
+    records.sort(key=lambda record: record['time'])
+    return records
+
+def aggregate_slow_queries(records):
+    """
+    Group slow query records by fingerprint, slowest total time first.
+
+    Args:
+        records (list): Records from ``read_slow_queries``
+
+    Returns:
+        list: One summary dict per fingerprint
+    """
+    groups = {}
+    for record in records:
+        group = groups.get(record['fingerprint'])
+        if group is None:
+            group = groups[record['fingerprint']] = {
+                'fingerprint': record['fingerprint'],
+                'statement': normalize_statement(record['statement']),
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'last_seen': None,
+                'endpoints': Counter(),
+                'slowest': None
+            }
+        group['count'] += 1
+        group['total_ms'] += record['duration_ms']
+        group['last_seen'] = max(group['last_seen'] or record['time'], record['time'])
+        group['endpoints'][record['endpoint']] += 1
+        if record['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = record['duration_ms']
+            group['slowest'] = record
+
+    for group in groups.values():
+        group['avg_ms'] = group['total_ms'] / group['count']
+        group['endpoints'] = group['endpoints'].most_common(5)
+
+    return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
+
+class SlowQueryLog:
+    """Flask extension logging statements slower than a threshold."""
+
+    def __init__(self, app=None):
+        self.threshold = 0
+        self.capture_plans = True
+        self.root = None
+        self.path = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger('app.slow_queries')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Read the log settings of the app (each process opens its file on its first record)."""
+        self.threshold = app.config['SLOW_QUERY_THRESHOLD']
+        self.capture_plans = app.config['SLOW_QUERY_EXPLAIN']
+        self.root = app.root_path
+        self.path = app.config['SLOW_QUERY_LOG']
+        self.max_bytes = app.config['SLOW_QUERY_LOG_MAX_BYTES']
+        self.backups = app.config['SLOW_QUERY_LOG_BACKUPS']
+        self.max_files = app.config['SLOW_QUERY_LOG_MAX_FILES']
+        app.extensions['slow_query_log'] = self
+        self._close_handlers()
+
+    def _close_handlers(self):
+        """Detach the log files opened so far."""
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+            handler.close()
+        self._pid = None
+
+    def _ensure_handler(self):
+        """Open this process's rotating log file, again after a fork."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+
+        with self._lock:
+            if self._pid == pid:
+                return
+
+            self._close_handlers()
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            prune_process_logs(self.path, self.backups, self.max_files)
+            handler = RotatingFileHandler(process_log_path(self.path, pid), maxBytes=self.max_bytes,
+                                          backupCount=self.backups, encoding='utf-8', delay=True)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+            self._pid = pid
+
+    def instrument_engines(self, app, db):
+        """
+        Time the statements of every engine of the app.
+
+        Args:
+            app: Flask application instance
+            db: Flask-SQLAlchemy extension
+        """
+        if not self.threshold:
+            return
+
+        with app.app_context():
+            for engine in db.engines.values():
+                self._instrument_engine(engine)
+
+    def _instrument_engine(self, engine):
+        """Attach the timing listeners to one engine."""
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def start_timer(conn, cursor, statement, parameters, context, executemany):
+            conn.info.setdefault('slow_query_started', []).append(perf_counter())
+
+        @event.listens_for(engine, 'after_cursor_execute')
+        def check_duration(conn, cursor, statement, parameters, context, executemany):
+            started = conn.info['slow_query_started'].pop()
+            duration = perf_counter() - started
+            if duration >= self.threshold:
+                self.record(conn, statement, parameters, duration, executemany)
+
+        @event.listens_for(engine, 'handle_error')
+        def discard_timer(exception_context):
+            conn = exception_context.connection
+            if conn is not None and conn.info.get('slow_query_started'):
+                conn.info['slow_query_started'].pop()
+
+    def record(self, conn, statement, parameters, duration, executemany=False):
+        """
+        Write one slow statement to the log.
+
+        Args:
+            conn: SQLAlchemy connection that ran the statement
+            statement (str): SQL statement
+            parameters: Driver parameters
+            duration (float): Seconds the statement took
+            executemany (bool): True for batched executions (not explained)
+        """
+        if has_request_context():
+            endpoint = request.endpoint or request.path
+            path = request.full_path.rstrip('?')
+        else:
+            endpoint = path = None
+
+        plan = []
+        if self.capture_plans and not executemany:
+            plan = explain(conn.dialect.name, conn.connection, statement, parameters)
+
+        record = {
+            'time': datetime.utcnow().isoformat(timespec='seconds'),
+            'duration_ms': round(duration * 1000, 2),
+            'fingerprint': fingerprint(statement),
+            'statement': statement[:MAX_STATEMENT_LENGTH],
+            'params': repr(parameters)[:MAX_PARAMS_LENGTH],
+            'endpoint': endpoint or '(no request)',
+            'path': path,
+            'call_site': call_site(self.root) if self.root else [],
+            'plan': plan,
+            'pid': os.getpid()
+        }
+        self._ensure_handler()
+        self.logger.info(json.dumps(record))
\ No newline at end of file
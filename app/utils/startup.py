@@ -0,0 +1,80 @@
+"""
+Startup profiling helpers for the application factory.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+
+class StartupProfile:
+    """Record how long each step of ``create_app`` takes."""
+
+    def __init__(self):
+        self.started_at = perf_counter()
+        self.finished_at = None
+        self.steps = []
+
+    @contextmanager
+    def measure(self, kind, name):
+        """
+        Time a block of startup work.
+
+        Args:
+            kind (str): Step category (e.g. 'extension', 'blueprint')
+            name (str): Name of the extension, blueprint or step
+        """
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append({
+                'kind': kind,
+                'name': name,
+                'seconds': perf_counter() - start
+            })
+
+    def finish(self):
+        """Mark the end of application startup."""
+        self.finished_at = perf_counter()
+
+    @property
+    def total(self):
+        """Total seconds spent in ``create_app``."""
+        end = self.finished_at if self.finished_at is not None else perf_counter()
+        return end - self.started_at
+
+    def to_dict(self):
+        """Convert the profile to a dictionary."""
+        return {
+            'total': self.total,
+            'steps': list(self.steps)
+        }
+
+def parse_import_times(stderr, modules):
+    """
+    Extract cumulative import times from ``python -X importtime`` output.
+
+    Args:
+        stderr (str): Output written by the interpreter to stderr
+        modules (iterable): Module names to report on
+
+    Returns:
+        dict: Cumulative import time in seconds per module found
+    """
+    wanted = set(modules)
+    times = {}
+
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3:
+            continue
+
+        name = parts[2].strip()
+        if name in wanted:
+            try:
+                times[name] = int(parts[1]) / 1_000_000
+            except ValueError:
+                continue
+
+    return times
@@ -0,0 +1,247 @@
+"""
+Static site export of the public pages.
+
+Pages are written as ``<path>/index.html`` (first page) and
+``<path>/page-<n>.html`` (later pages), with category listings under
+``posts/category/<slug>/`` so a web server can map query strings to files.
+"""
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from flask import request, has_request_context
+
+# WSGI environ flag set on requests made by the exporter
+EXPORT_ENVIRON_KEY = 'app.static_export'
+
+# State file older exports left inside the web root
+LEGACY_STATE_FILENAME = '.export-state.json'
+
+def is_static_export():
+    """
+    Check whether the current request is rendering a page for export.
+
+    Returns:
+        bool: True while the static exporter renders a page
+    """
+    return has_request_context() and bool(request.environ.get(EXPORT_ENVIRON_KEY))
+
+def page_filename(path, page=1, category=None):
+    """
+    Get the file an exported page is written to, relative to the output folder.
+
+    Args:
+        path (str): URL path of the page
+        page (int): Page number of a paginated listing
+        category (str): Category slug of a filtered listing
+
+    Returns:
+        str: Relative file path
+    """
+    parts = [part for part in path.strip('/').split('/') if part]
+    if category:
+        parts += ['category', category]
+
+    parts.append('index.html' if page == 1 else f'page-{page}.html')
+    return os.path.join(*parts)
+
+class StaticExporter:
+    """Render public pages through the app and write them to disk."""
+
+    def __init__(self, app, output_dir, state_dir=None):
+        self.app = app
+        self.output_dir = output_dir
+        self.state_dir = state_dir or app.config['STATIC_EXPORT_STATE_DIR']
+        self.client = app.test_client()
+        self.written = 0
+        self.failures = []
+
+    @property
+    def state_path(self):
+        """Path of the export state file, kept outside the published folder."""
+        digest = hashlib.sha1(os.path.abspath(self.output_dir).encode()).hexdigest()[:16]
+        return os.path.join(self.state_dir, f'{digest}.json')
+
+    def load_state(self):
+        """Load the state of the previous export, if any."""
+        if not os.path.exists(self.state_path):
+            return None
+
+        with open(self.state_path) as f:
+            state = json.load(f)
+        # Exports before authors and categories were recorded cannot be diffed
+        return state if isinstance(state.get('posts'), dict) else None
+
+    def save_state(self, exported_at, posts):
+        """
+        Record when the export ran and which post pages exist.
+
+        Args:
+            exported_at (datetime): Start of the export
+            posts (dict): Slug -> (author id, category id) of every exported post
+        """
+        os.makedirs(self.state_dir, exist_ok=True)
+        with open(self.state_path, 'w') as f:
+            json.dump({'exported_at': exported_at.isoformat(), 'posts': posts}, f)
+
+        legacy = os.path.join(self.output_dir, LEGACY_STATE_FILENAME)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+
+    def render(self, path, page=1, category=None):
+        """
+        Render one page and write it to the output folder.
+
+        Args:
+            path (str): URL path of the page
+            page (int): Page number for paginated listings
+            category (str): Category slug for category listings
+        """
+        query = {}
+        if page > 1:
+            query['page'] = page
+        if category:
+            query['category'] = category
+
+        try:
+            response = self.client.get(path, query_string=query,
+                                       environ_base={EXPORT_ENVIRON_KEY: True})
+        except Exception as e:
+            self.app.logger.error(f'Static export of {path} failed: {e}')
+            self.failures.append((path, query, 500))
+            return
+
+        if response.status_code != 200:
+            self.failures.append((path, query, response.status_code))
+            return
+
+        target = os.path.join(self.output_dir, page_filename(path, page, category))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(response.get_data())
+        self.written += 1
+
+    def render_listing(self, path, total, per_page, category=None):
+        """
+        Render every page of a paginated listing, dropping pages that no longer exist.
+
+        Args:
+            path (str): URL path of the listing
+            total (int): Number of posts in the listing
+            per_page (int): Page size used by the view
+            category (str): Category slug for category listings
+        """
+        pages = max(1, math.ceil(total / per_page))
+        folder = os.path.dirname(os.path.join(self.output_dir, page_filename(path, 1, category)))
+
+        if os.path.isdir(folder):
+            for name in os.listdir(folder):
+                if name.startswith('page-') and name.endswith('.html'):
+                    os.remove(os.path.join(folder, name))
+
+        for page in range(1, pages + 1):
+            self.render(path, page, category)
+
+    def remove_post(self, slug):
+        """Delete the exported page of a post that is gone or unpublished."""
+        target = os.path.join(self.output_dir, page_filename(f'/post/{slug}'))
+        if os.path.exists(target):
+            os.remove(target)
+
+    def export(self, incremental=False):
+        """
+        Export the public pages.
+
+        In incremental mode only the pages affected by posts updated or
+        removed since the last export are rendered again, including the
+        listings a post was in before it moved or was removed.
+
+        Args:
+            incremental (bool): Only re-render pages affected by changed posts
+
+        Returns:
+            bool: True if an incremental export was possible
+        """
+        from flask import url_for
+        from app import db
+        from app.models import Post, Category, User, ArchiveMonth
+        from app.views.routes import INDEX_PER_PAGE, LISTING_PER_PAGE
+
+        state = self.load_state() if incremental else None
+        exported_at = datetime.utcnow()
+        pages = []
+        listings = []
+
+        # Work out what to render first, so every page renders in its own app context
+        with self.app.test_request_context():
+            published = {slug: [author_id, category_id] for slug, author_id, category_id
+                         in db.session.query(Post.slug, Post.author_id, Post.category_id)
+                                      .filter(Post.is_published == True)}
+            slugs = set(published)
+            category_totals = dict(db.session.query(Post.category_id, db.func.count(Post.id))
+                                   .filter(Post.is_published == True)
+                                   .group_by(Post.category_id).all())
+            author_totals = dict(db.session.query(Post.author_id, db.func.count(Post.id))
+                                 .filter(Post.is_published == True)
+                                 .group_by(Post.author_id).all())
+            categories = {c.id: c.slug for c in Category.get_active_categories()}
+
+            if state is None:
+                post_slugs = slugs
+                category_ids = set(categories)
+                author_ids = set(author_totals)
+            else:
+                since = datetime.fromisoformat(state['exported_at'])
+                previous = state['posts']
+                changed = db.session.query(Post.slug, Post.author_id, Post.category_id)\
+                                    .filter(Post.updated_at > since).all()
+                removed = set(previous) - slugs
+                if not changed and not removed:
+                    self.save_state(exported_at, published)
+                    return True
+
+                for slug in removed:
+                    self.remove_post(slug)
+
+                # Listings the posts are in now, and the ones they were in before
+                # moving to another category or author, or being removed
+                touched = [(author_id, category_id) for _, author_id, category_id in changed]
+                touched += [tuple(previous[slug]) for slug, _, _ in changed if slug in previous]
+                touched += [tuple(previous[slug]) for slug in removed]
+
+                post_slugs = {slug for slug, _, _ in changed} & slugs
+                category_ids = {category_id for _, category_id in touched} & set(categories)
+                author_ids = {author_id for author_id, _ in touched if author_id is not None}
+
+            authors = dict(db.session.query(User.id, User.username)
+                           .filter(User.id.in_(author_ids)).all()) if author_ids else {}
+
+            pages.append(url_for('main.about'))
+            pages.append(url_for('main.contact'))
+            pages.append(url_for('main.archive'))
+            pages.extend(url_for('main.post_detail', slug=slug) for slug in post_slugs)
+
+            listings.append((url_for('main.index'), len(slugs), INDEX_PER_PAGE, None))
+            listings.append((url_for('main.posts'), len(slugs), LISTING_PER_PAGE, None))
+            for category_id in category_ids:
+                listings.append((url_for('main.posts'), category_totals.get(category_id, 0),
+                                 LISTING_PER_PAGE, categories[category_id]))
+            for author_id, username in authors.items():
+                listings.append((url_for('main.author_posts', username=username),
+                                 author_totals.get(author_id, 0), LISTING_PER_PAGE, None))
+            # Every month page carries the archive sidebar, so all are rendered, like /posts
+            for entry in ArchiveMonth.get_months():
+                listings.append((url_for('main.archive_month', year=entry.year, month=entry.month),
+                                 entry.post_count, LISTING_PER_PAGE, None))
+
+        for path in pages:
+            self.render(path)
+
+        for path, total, per_page, category in listings:
+            self.render_listing(path, total, per_page, category)
+
+        # Keep the old state after failures so the next run retries those pages
+        if not self.failures:
+            self.save_state(exported_at, published)
+        return state is not None
@@ -0,0 +1,264 @@
+"""
+Cache headers for a reverse-proxy tier and purging by surrogate key.
+
+Routes marked ``@surrogate_cache.cacheable(...)`` are served with
+``Cache-Control``, ``Surrogate-Control`` and ``Surrogate-Key`` headers. The
+keys name every post, user and category loaded while rendering
+(``post-12``, ``user-3``, ``category-5``) plus the collections the route
+lists (``posts``, ``users``, ``categories``).
+
+Committed ORM writes purge the keys of the rows they changed; writes that
+change which rows a listing holds (publishing, featuring, moving, adding
+or deleting) also purge the collection. Purges are sent by a background
+job to the configured purger.
+"""
+import json
+import os
+import threading
+import urllib.request
+from datetime import datetime
+from functools import wraps
+from flask import current_app, g, has_app_context, has_request_context, request, session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+
+# Key prefix per table; the table name itself is the collection key
+KEY_PREFIXES = {
+    'posts': 'post',
+    'users': 'user',
+    'categories': 'category'
+}
+
+# Columns whose change moves a row into, out of or within listings
+COLLECTION_COLUMNS = {
+    'posts': ('is_published', 'is_featured', 'category_id', 'author_id', 'created_at'),
+    'users': ('is_active',),
+    'categories': ('is_active', 'name')
+}
+
+# Keys sent per purge request, keeping the header well under proxy limits
+PURGE_CHUNK_SIZE = 256
+
+def item_key(table, row_id):
+    """Get the surrogate key of one row, e.g. ``post-12``."""
+    return f'{KEY_PREFIXES[table]}-{row_id}'
+
+def row_keys(table, ids):
+    """Get the surrogate keys of many rows of a table."""
+    return [item_key(table, row_id) for row_id in ids]
+
+class NullPurger:
+    """Purger used when no cache tier is configured."""
+
+    name = 'none'
+
+    def purge(self, keys):
+        """Drop nothing."""
+
+class LogPurger:
+    """Append purges to a JSON lines file, for development and tests."""
+
+    name = 'log'
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def purge(self, keys):
+        """Record one purge of ``keys``."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        line = json.dumps({'time': datetime.utcnow().isoformat(), 'keys': list(keys)})
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+class HttpPurger:
+    """
+    Purge by surrogate key with HTTP requests to every cache node.
+
+    The default ``PURGE`` request with a ``Surrogate-Key`` header fits a
+    Fastly-style API; Varnish with xkey expects the keys in ``xkey-purge``.
+    """
+
+    name = 'http'
+
+    def __init__(self, urls, method='PURGE', header='Surrogate-Key', timeout=5):
+        self.urls = list(urls)
+        self.method = method
+        self.header = header
+        self.timeout = timeout
+
+    def purge(self, keys):
+        """
+        Purge ``keys`` on every node.
+
+        Raises:
+            OSError: If a node cannot be reached or refuses the purge (the job retries)
+        """
+        keys = list(keys)
+        for url in self.urls:
+            for start in range(0, len(keys), PURGE_CHUNK_SIZE):
+                chunk = keys[start:start + PURGE_CHUNK_SIZE]
+                purge_request = urllib.request.Request(url, method=self.method,
+                                                       headers={self.header: ' '.join(chunk)})
+                with urllib.request.urlopen(purge_request, timeout=self.timeout):
+                    pass
+
+def build_purger(config):
+    """
+    Create the purger selected by ``CACHE_PURGE_BACKEND``.
+
+    Args:
+        config: Flask config
+
+    Returns:
+        Purger with a ``purge(keys)`` method
+    """
+    backend = config['CACHE_PURGE_BACKEND']
+    if backend == 'none':
+        return NullPurger()
+    if backend == 'log':
+        return LogPurger(config['CACHE_PURGE_LOG'])
+    if backend == 'http':
+        if not config['CACHE_PURGE_URLS']:
+            raise ValueError('CACHE_PURGE_BACKEND=http needs CACHE_PURGE_URLS')
+        return HttpPurger(config['CACHE_PURGE_URLS'], method=config['CACHE_PURGE_METHOD'],
+                          header=config['CACHE_PURGE_HEADER'], timeout=config['CACHE_PURGE_TIMEOUT'])
+    raise ValueError(f'Unknown CACHE_PURGE_BACKEND: {backend}')
+
+class SurrogateCache:
+    """Flask extension tagging cacheable responses and purging changed rows."""
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.purger = NullPurger()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the purger and register the response hook."""
+        self.enabled = app.config['CACHE_HEADERS_ENABLED']
+        self.purger = build_purger(app.config)
+        app.extensions['surrogate_cache'] = self
+        app.after_request(self._apply_headers)
+
+    def instrument_models(self, session_class, models):
+        """
+        Tag responses with the rows they load and purge the rows sessions commit.
+
+        Args:
+            session_class: Session class whose commits are watched
+            models: Model classes with surrogate keys
+        """
+        for model in models:
+            if not event.contains(model, 'load', _tag_loaded):
+                event.listen(model, 'load', _tag_loaded)
+
+        if not event.contains(session_class, 'after_flush', _collect_changes):
+            event.listen(session_class, 'after_flush', _collect_changes)
+            event.listen(session_class, 'after_commit', _purge_committed)
+            event.listen(session_class, 'after_rollback', _forget_changes)
+
+    def cacheable(self, *collections, max_age=None, surrogate_max_age=None):
+        """
+        Decorator marking a GET route as cacheable by the proxy tier.
+
+        Args:
+            collections (str): Collection keys of the rows the route lists
+            max_age (int): Browser cache seconds (default ``CACHE_MAX_AGE``)
+            surrogate_max_age (int): Proxy cache seconds (default ``CACHE_SURROGATE_MAX_AGE``)
+
+        Returns:
+            callable: Route decorator
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                g.surrogate_cacheable = (max_age, surrogate_max_age)
+                tag(*collections)
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+
+    def purge(self, keys):
+        """Queue a purge of surrogate keys."""
+        keys = sorted(set(keys))
+        if not keys or self.purger.name == 'none':
+            return
+
+        from app.jobs.tasks import purge_surrogate_keys
+        purge_surrogate_keys.delay(keys)
+
+    def _apply_headers(self, response):
+        """Add cache headers to responses of cacheable routes."""
+        cacheable = g.get('surrogate_cacheable')
+        if not self.enabled or cacheable is None:
+            return response
+
+        config = current_app.config
+        keys = ' '.join(sorted(g.get('surrogate_keys', ())))
+        shared = request.method in ('GET', 'HEAD') and response.status_code == 200 \
+            and not current_user.is_authenticated and not session.modified \
+            and 'Set-Cookie' not in response.headers \
+            and len(keys) <= config['CACHE_SURROGATE_KEY_MAX_BYTES']
+
+        if not shared:
+            # Personalized, failed or untaggable: never stored by the proxy
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        max_age, surrogate_max_age = cacheable
+        if max_age is None:
+            max_age = config['CACHE_MAX_AGE']
+        if surrogate_max_age is None:
+            surrogate_max_age = config['CACHE_SURROGATE_MAX_AGE']
+
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+        response.headers['Surrogate-Control'] = f'max-age={surrogate_max_age}'
+        response.headers['Surrogate-Key'] = keys
+        return response
+
+def tag(*keys):
+    """Add surrogate keys to the current response."""
+    if not has_request_context():
+        return
+    if 'surrogate_keys' not in g:
+        g.surrogate_keys = set()
+    g.surrogate_keys.update(keys)
+
+def _tag_loaded(target, context):
+    """Tag the response with every row loaded while rendering it."""
+    if has_request_context():
+        tag(item_key(target.__tablename__, target.id))
+
+def _changed_keys(target, state):
+    """Get the keys a flushed change of a row invalidates."""
+    table = target.__tablename__
+    keys = {item_key(table, target.id)}
+    if state == 'dirty':
+        columns = inspect(target).attrs
+        if any(columns[name].history.has_changes() for name in COLLECTION_COLUMNS[table]):
+            keys.add(table)
+    else:
+        keys.add(table)
+    return keys
+
+def _collect_changes(session, flush_context):
+    """Remember the keys of the rows a flush wrote, until the commit."""
+    pending = session.info.setdefault('surrogate_purge', set())
+    for state, targets in (('new', session.new), ('dirty', session.dirty), ('deleted', session.deleted)):
+        for target in targets:
+            if getattr(target, '__tablename__', None) not in KEY_PREFIXES:
+                continue
+            if state == 'dirty' and not session.is_modified(target, include_collections=False):
+                continue
+            pending.update(_changed_keys(target, state))
+
+def _purge_committed(session):
+    """Purge the keys of the committed rows."""
+    keys = session.info.pop('surrogate_purge', None)
+    if keys and has_app_context():
+        current_app.extensions['surrogate_cache'].purge(keys)
+
+def _forget_changes(session):
+    """Drop the keys of rolled back rows."""
+    session.info.pop('surrogate_purge', None)
\ No newline at end of file
@@ -1,7 +1,7 @@
 """
 Template filters for Jinja2 templates.
 """
-from app.utils.helpers import format_date, truncate_text
+from app.utils.helpers import format_date, truncate_text, count_words, estimate_reading_time
 
 def register_template_filters(app):
     """
@@ -89,17 +89,16 @@ def register_template_filters(app):
     
     @app.template_filter('word_count')
     def word_count_filter(text):
-        """Count words in text."""
-        if not text:
-            return 0
-        return len(text.split())
+        """Count words in text (prefer the stored ``Post.word_count``)."""
+        return count_words(text)
     
     @app.template_filter('reading_time')
     def reading_time_filter(text, words_per_minute=200):
-        """Estimate reading time in minutes."""
-        if not text:
-            return 0
-        
-        word_count = len(text.split())
-        minutes = max(1, round(word_count / words_per_minute))
-        return minutes 
\ No newline at end of file
+        """Estimate reading time in minutes (prefer the stored ``Post.reading_time``)."""
+        return estimate_reading_time(count_words(text), words_per_minute) 
+    
+    @app.template_filter('month_name')
+    def month_name_filter(month):
+        """Get the name of a month number (1-12)."""
+        import calendar
+        return calendar.month_name[month]
\ No newline at end of file
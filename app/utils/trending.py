@@ -0,0 +1,74 @@
+"""
+Per-process board of the top trending posts.
+
+The board holds the best ``TRENDING_BOARD_SIZE`` (post id, score) pairs.
+It is reloaded from the ``trending_scores`` index every
+``TRENDING_REFRESH_SECONDS`` and updated in place by views recorded in
+this process, so reading the top posts never sorts the posts table.
+"""
+import threading
+from time import monotonic
+from flask import current_app
+
+class TrendingBoard:
+    """Top-N trending posts, kept in memory."""
+
+    def __init__(self, size=50):
+        self.size = size
+        self.entries = {}
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Replace the board with the top scores from the database."""
+        from app import db
+        from app.models.trending import TrendingScore
+
+        rows = db.session.query(TrendingScore.post_id, TrendingScore.score)\
+                         .order_by(TrendingScore.score.desc())\
+                         .limit(self.size).all()
+        with self._lock:
+            self.entries = dict(rows)
+            self.loaded_at = monotonic()
+
+    def offer(self, post_id, score):
+        """
+        Record a post's new score, keeping only the top ``size`` posts.
+
+        Scores only grow, so a post that is not on the board joins it when
+        it beats the lowest entry.
+        """
+        with self._lock:
+            if post_id not in self.entries and len(self.entries) >= self.size:
+                lowest = min(self.entries, key=self.entries.get)
+                if score <= self.entries[lowest]:
+                    return
+                del self.entries[lowest]
+            self.entries[post_id] = score
+
+    def top(self, limit, ttl):
+        """
+        Get the highest scored posts, reloading the board when older than ``ttl``.
+
+        Returns:
+            list: (post id, score) pairs, best first
+        """
+        if self.loaded_at is None or monotonic() - self.loaded_at >= ttl:
+            self.load()
+        with self._lock:
+            ranked = sorted(self.entries.items(), key=lambda entry: entry[1], reverse=True)
+        return ranked[:limit]
+
+    def clear(self):
+        """Forget the board, so the next read reloads it."""
+        with self._lock:
+            self.entries = {}
+            self.loaded_at = None
+
+def get_trending_board():
+    """Get the trending board of the current app."""
+    board = current_app.extensions.get('trending_board')
+    if board is None:
+        board = current_app.extensions.setdefault(
+            'trending_board', TrendingBoard(current_app.config['TRENDING_BOARD_SIZE']))
+    return board
\ No newline at end of file
@@ -0,0 +1,428 @@
+"""
+Per-process typeahead index over published post titles and author names.
+
+Every word of a title starts an index key (the rest of the normalized
+title), so ``"fla"`` and ``"flask tip"`` both match "Ten Flask tips". The
+keys are held in one sorted list of ``(key, target)`` pairs; a prefix is a
+contiguous run found with ``bisect``. Targets are ranked by popularity:
+posts by views, authors by the views of their published posts. Short
+prefixes match too much to rank per request, so their top targets are
+precomputed and kept current; longer ones are ranked from their run and
+kept in a small LRU of recent prefixes. Suggestions never touch the
+database.
+
+The index is built when the server starts (before workers fork, when the
+app is preloaded) or on first use. Posts committed through the ORM in this
+process, and authors renamed, deactivated or reactivated, are applied
+right away; only active authors are suggested. Every
+``TYPEAHEAD_REFRESH_SECONDS`` the index is rebuilt in a background thread,
+which picks up writes made by other workers, bulk actions and current view
+counts.
+"""
+import bisect
+import heapq
+import re
+import sys
+import threading
+from collections import OrderedDict
+from time import monotonic
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+
+# Characters of a key that are indexed; longer prefixes are checked against the title
+KEY_LENGTH = 32
+
+MAX_SUGGESTIONS = 20
+
+# Prefixes up to this length have their top targets precomputed
+SHORT_PREFIX_LENGTH = 3
+
+_WORD = re.compile(r'\w+')
+
+def normalize(text):
+    """Case-fold text and reduce it to words separated by single spaces."""
+    return ' '.join(_WORD.findall((text or '').casefold()))
+
+def term_keys(text):
+    """
+    Get the index keys of a title or name: its normalized text from each word on.
+
+    Returns:
+        set: Keys, cut to ``KEY_LENGTH`` characters
+    """
+    words = normalize(text).split(' ')
+    return {' '.join(words[i:])[:KEY_LENGTH] for i in range(len(words)) if words[i]}
+
+def short_prefixes(keys):
+    """Get the precomputed prefixes of index keys."""
+    return {key[:length] for key in keys for length in range(1, SHORT_PREFIX_LENGTH + 1)}
+
+def matches(text, query):
+    """Check whether a normalized query starts at a word boundary of ``text``."""
+    return f' {normalize(text)}'.find(f' {query}') != -1
+
+class TypeaheadIndex:
+    """Sorted prefix index of one process, with per-prefix top results."""
+
+    def __init__(self, app):
+        self.app = app
+        self.refresh_seconds = app.config['TYPEAHEAD_REFRESH_SECONDS']
+        self.cache_size = app.config['TYPEAHEAD_CACHE_SIZE']
+        # (key, target): post ids are positive targets, author ids negative
+        self.entries = []
+        # post id -> [title, slug, author id, views]
+        self.posts = {}
+        # user id -> [username, views of published posts, published posts]
+        self.authors = {}
+        # short prefix -> top MAX_SUGGESTIONS targets, most popular first
+        self.short_tops = {}
+        self.loaded_at = None
+        self._dirty = set()
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._rebuilding = False
+        self._replay = []
+
+    def build(self):
+        """Load the index from the database, replacing the current one."""
+        from app import db
+        from app.models import Post, User
+
+        posts = Post.__table__
+        users = User.__table__
+        with self.app.app_context(), db.engine.connect() as connection:
+            post_rows = connection.execute(
+                db.select(posts.c.id, posts.c.title, posts.c.slug, posts.c.author_id, posts.c.view_count)
+                  .where(posts.c.is_published == True)
+            ).all()
+            user_rows = connection.execute(
+                db.select(users.c.id, users.c.username)
+                  .where(users.c.is_active == True,
+                         users.c.id.in_(db.select(posts.c.author_id).where(posts.c.is_published == True)))
+            ).all()
+
+        authors = {user_id: [username, 0, 0] for user_id, username in user_rows}
+        index_posts = {}
+        entries = []
+        for post_id, title, slug, author_id, views in post_rows:
+            index_posts[post_id] = [title, slug, author_id, views or 0]
+            entries.extend((key, post_id) for key in term_keys(title))
+            if author_id in authors:
+                authors[author_id][1] += views or 0
+                authors[author_id][2] += 1
+        for user_id, (username, _, _) in authors.items():
+            entries.extend((key, -user_id) for key in term_keys(username))
+        entries.sort()
+
+        groups = {}
+        for key, target in entries:
+            for length in range(1, SHORT_PREFIX_LENGTH + 1):
+                groups.setdefault(key[:length], set()).add(target)
+        popularity = lambda target: _popularity(index_posts, authors, target)
+        short_tops = {prefix: heapq.nlargest(MAX_SUGGESTIONS, targets, key=popularity)
+                      for prefix, targets in groups.items()}
+
+        with self._lock:
+            self.entries, self.posts, self.authors = entries, index_posts, authors
+            self.short_tops = short_tops
+            self._cache.clear()
+            self.loaded_at = monotonic()
+
+    def refresh(self):
+        """Rebuild in a background thread, serving the current index meanwhile."""
+        with self._rebuild_lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._replay = []
+        threading.Thread(target=self._rebuild, name='typeahead-rebuild', daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except Exception:
+            self.app.logger.exception('Rebuilding the typeahead index failed')
+            with self._lock:
+                self.loaded_at = monotonic()
+        finally:
+            with self._rebuild_lock:
+                self._rebuilding = False
+                replay, self._replay = self._replay, []
+        # Changes committed while the rebuild read the database may predate its snapshot
+        self.apply(replay)
+
+    def mark_stale(self):
+        """Rebuild on the next suggestion (e.g. after a bulk action bypassed the ORM)."""
+        with self._lock:
+            if self.loaded_at is not None:
+                self.loaded_at = float('-inf')
+
+    def apply(self, changes):
+        """
+        Apply committed post and author changes.
+
+        Args:
+            changes (list): ``('upsert', post_id, title, slug, author_id, views,
+                username, author_active)``, ``('remove', post_id)`` or
+                ``('author', user_id, username, active)`` tuples
+        """
+        if not changes or self.loaded_at is None:
+            return
+        with self._rebuild_lock:
+            if self._rebuilding:
+                self._replay.extend(changes)
+        with self._lock:
+            for change in changes:
+                if change[0] == 'author':
+                    self._update_author(*change[1:])
+                    continue
+                self._remove_post(change[1])
+                if change[0] == 'upsert':
+                    self._add_post(*change[1:])
+            # Top lists that lost a target are re-ranked from their runs
+            for prefix in self._dirty:
+                self.short_tops[prefix] = self._rank(prefix, MAX_SUGGESTIONS)
+            self._dirty.clear()
+            self._cache.clear()
+
+    def _add_post(self, post_id, title, slug, author_id, views, username, author_active):
+        self.posts[post_id] = [title, slug, author_id, views or 0]
+        keys = term_keys(title)
+        for key in keys:
+            bisect.insort(self.entries, (key, post_id))
+        self._offer(post_id, keys)
+
+        author = self.authors.get(author_id)
+        if author is None:
+            # Inactive authors are not suggested (their posts are)
+            if username is None or not author_active:
+                return
+            author = self.authors[author_id] = [username, 0, 0]
+            for key in term_keys(username):
+                bisect.insort(self.entries, (key, -author_id))
+        author[1] += views or 0
+        author[2] += 1
+        self._offer(-author_id, term_keys(author[0]))
+
+    def _remove_post(self, post_id):
+        post = self.posts.pop(post_id, None)
+        if post is None:
+            return
+        title, _, author_id, views = post
+        keys = term_keys(title)
+        for key in keys:
+            self._discard((key, post_id))
+        self._withdraw(post_id, keys)
+
+        author = self.authors.get(author_id)
+        if author is None:
+            return
+        author[1] -= views
+        author[2] -= 1
+        author_keys = term_keys(author[0])
+        if author[2] <= 0:
+            del self.authors[author_id]
+            for key in author_keys:
+                self._discard((key, -author_id))
+        # Gone, or less popular: its top lists may now miss a better target
+        self._withdraw(-author_id, author_keys)
+
+    def _update_author(self, user_id, username, active):
+        """Re-index an author renamed, deactivated or reactivated, counting its posts in the index."""
+        author = self.authors.pop(user_id, None)
+        if author is not None:
+            keys = term_keys(author[0])
+            for key in keys:
+                self._discard((key, -user_id))
+            self._withdraw(-user_id, keys)
+        if not active or username is None:
+            return
+
+        views = [post[3] for post in self.posts.values() if post[2] == user_id]
+        if not views:
+            return
+        self.authors[user_id] = [username, sum(views), len(views)]
+        keys = term_keys(username)
+        for key in keys:
+            bisect.insort(self.entries, (key, -user_id))
+        self._offer(-user_id, keys)
+
+    def _offer(self, target, keys):
+        """Enter a new or more popular target into the top lists of its short prefixes."""
+        score = self._popularity(target)
+        for prefix in short_prefixes(keys):
+            top = self.short_tops.setdefault(prefix, [])
+            if target not in top:
+                if len(top) >= MAX_SUGGESTIONS and score <= self._popularity(top[-1]):
+                    continue
+                top.append(target)
+            top.sort(key=self._popularity, reverse=True)
+            del top[MAX_SUGGESTIONS:]
+
+    def _withdraw(self, target, keys):
+        """Take a removed or less popular target out of its top lists, which are re-ranked later."""
+        for prefix in short_prefixes(keys):
+            top = self.short_tops.get(prefix, ())
+            if target in top:
+                top.remove(target)
+                self._dirty.add(prefix)
+
+    def _rank(self, prefix, limit):
+        """Get the most popular targets of the keys starting with ``prefix``."""
+        start = bisect.bisect_left(self.entries, (prefix,))
+        end = bisect.bisect_left(self.entries, (prefix + chr(sys.maxunicode),), start)
+        targets = {target for _, target in self.entries[start:end]}
+        return heapq.nlargest(limit, targets, key=self._popularity)
+
+    def _discard(self, entry):
+        position = bisect.bisect_left(self.entries, entry)
+        if position < len(self.entries) and self.entries[position] == entry:
+            del self.entries[position]
+
+    def suggest(self, query, limit=8):
+        """
+        Get the most popular posts and authors matching a typed prefix.
+
+        Args:
+            query (str): Text typed so far
+            limit (int): Maximum suggestions
+
+        Returns:
+            list: Suggestion dicts, most popular first
+        """
+        query = normalize(query)
+        if not query:
+            return []
+
+        if self.loaded_at is None:
+            self.build()
+        elif monotonic() - self.loaded_at >= self.refresh_seconds:
+            self.refresh()
+
+        with self._lock:
+            if len(query) <= SHORT_PREFIX_LENGTH:
+                return [self._suggestion(target) for target in self.short_tops.get(query, [])[:limit]]
+
+            cached = self._cache.get((query, limit))
+            if cached is not None:
+                self._cache.move_to_end((query, limit))
+                return cached
+
+            if len(query) > KEY_LENGTH:
+                top = [target for target in self._rank(query[:KEY_LENGTH], len(self.entries))
+                       if matches(self._text(target), query)][:limit]
+            else:
+                top = self._rank(query, limit)
+            suggestions = [self._suggestion(target) for target in top]
+
+            self._cache[(query, limit)] = suggestions
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return suggestions
+
+    def _text(self, target):
+        return self.posts[target][0] if target > 0 else self.authors[-target][0]
+
+    def _popularity(self, target):
+        return _popularity(self.posts, self.authors, target)
+
+    def _suggestion(self, target):
+        if target > 0:
+            title, slug, author_id, _ = self.posts[target]
+            author = self.authors.get(author_id)
+            return {'type': 'post', 'id': target, 'title': title, 'slug': slug,
+                    'author': author[0] if author else None}
+        username, _, post_count = self.authors[-target]
+        return {'type': 'author', 'id': -target, 'username': username, 'post_count': post_count}
+
+def _popularity(posts, authors, target):
+    """Rank key of a target; ties go to the newer post (higher id)."""
+    if target > 0:
+        return posts[target][3], target
+    return authors[-target][1], 0
+
+class Typeahead:
+    """Flask extension serving search suggestions from the in-memory index."""
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the app's index (loaded at server start or on first use)."""
+        app.extensions['typeahead'] = TypeaheadIndex(app)
+
+    def instrument_models(self, session_class):
+        """
+        Apply posts committed through the ORM to this process's index.
+
+        Args:
+            session_class: Session class whose commits are watched
+        """
+        if not event.contains(session_class, 'after_flush', _collect_changes):
+            event.listen(session_class, 'after_flush', _collect_changes)
+            event.listen(session_class, 'after_commit', _apply_committed)
+            event.listen(session_class, 'after_rollback', _forget_changes)
+
+    def build(self, app=None):
+        """Load the index of an app from the database."""
+        (app or current_app).extensions['typeahead'].build()
+
+    def mark_stale(self):
+        """Rebuild the current app's index on its next use."""
+        current_app.extensions['typeahead'].mark_stale()
+
+    def suggest(self, query, limit=8):
+        """Get suggestions for a typed prefix (see ``TypeaheadIndex.suggest``)."""
+        return current_app.extensions['typeahead'].suggest(query, limit)
+
+def _collect_changes(session, flush_context):
+    """Remember flushed post and author changes, with their values, until the commit."""
+    pending = session.info.setdefault('typeahead_changes', {})
+    for post in session.deleted:
+        if getattr(post, '__tablename__', None) == 'posts':
+            pending[post.id] = ('remove', post.id)
+    for user in list(session.dirty) + list(session.deleted):
+        if getattr(user, '__tablename__', None) != 'users':
+            continue
+        attrs = inspect(user).attrs
+        if user in session.deleted:
+            pending[('author', user.id)] = ('author', user.id, None, False)
+        elif attrs.is_active.history.has_changes() or attrs.username.history.has_changes():
+            pending[('author', user.id)] = ('author', user.id, user.username, bool(user.is_active))
+    for post in list(session.new) + list(session.dirty):
+        if getattr(post, '__tablename__', None) != 'posts':
+            continue
+        if post in session.dirty and not session.is_modified(post, include_collections=False):
+            continue
+        if post.is_published:
+            pending[post.id] = ('upsert', post.id, post.title, post.slug, post.author_id,
+                                post.view_count, *_author(session, post))
+        else:
+            pending[post.id] = ('remove', post.id)
+
+def _author(session, post):
+    """
+    Get the author of a post, also when only ``author_id`` was set.
+
+    Returns:
+        tuple: (username or None, whether the author is active)
+    """
+    author = post.author
+    if author is None and post.author_id is not None:
+        # A new post does not lazy-load its author relationship
+        from app.models.user import User
+        author = session.get(User, post.author_id)
+    if author is None:
+        return None, False
+    return author.username, bool(author.is_active)
+
+def _apply_committed(session):
+    """Apply the committed post changes to this process's index."""
+    changes = session.info.pop('typeahead_changes', None)
+    if changes and has_app_context():
+        current_app.extensions['typeahead'].apply(list(changes.values()))
+
+def _forget_changes(session):
+    session.info.pop('typeahead_changes', None)
\ No newline at end of file
@@ -4,33 +4,48 @@ Main application routes.
 from flask import render_template, request, redirect, url_for, flash, abort
 from flask_login import login_required, current_user
 from app.views import main_bp
-from app.models import Post, Category, User
-from app import db
+from app.models import Post, Category, User, ArchiveMonth
+from app import db, surrogate_cache
+from app.utils.pagination import paginate
+from app.utils.static_export import is_static_export
+
+# Page sizes shared with the static site exporter
+INDEX_PER_PAGE = 6
+LISTING_PER_PAGE = 10
 
 @main_bp.route('/')
+# Short proxy lifetime: the trending section changes without writes
+@surrogate_cache.cacheable('posts', 'categories', surrogate_max_age=60)
 def index():
     """Home page route."""
     page = request.args.get('page', 1, type=int)
-    posts = Post.get_published_posts(page=page, per_page=6)
+    posts = Post.get_published_posts(page=page, per_page=INDEX_PER_PAGE)
     featured_posts = Post.get_featured_posts(limit=3)
+    trending_posts = Post.get_trending(limit=5)
     categories = Category.get_active_categories()
+    archive_months = ArchiveMonth.get_months()
     
     return render_template('main/index.html',
                          posts=posts,
                          featured_posts=featured_posts,
-                         categories=categories)
+                         trending_posts=trending_posts,
+                         categories=categories,
+                         archive_months=archive_months)
 
 @main_bp.route('/about')
+@surrogate_cache.cacheable('pages')
 def about():
     """About page route."""
     return render_template('main/about.html')
 
 @main_bp.route('/contact')
+@surrogate_cache.cacheable('pages')
 def contact():
     """Contact page route."""
     return render_template('main/contact.html')
 
 @main_bp.route('/posts')
+@surrogate_cache.cacheable('posts', 'categories')
 def posts():
     """Posts listing page."""
     page = request.args.get('page', 1, type=int)
@@ -40,11 +55,10 @@ def posts():
         category = Category.get_category_by_slug(category_slug)
         if not category:
             abort(404)
-        posts = Post.query.filter_by(category_id=category.id, is_published=True)\
-                         .order_by(Post.created_at.desc())\
-                         .paginate(page=page, per_page=10, error_out=False)
+        posts = paginate(Post.published_query(category_id=category.id),
+                         page=page, per_page=LISTING_PER_PAGE)
     else:
-        posts = Post.get_published_posts(page=page, per_page=10)
+        posts = Post.get_published_posts(page=page, per_page=LISTING_PER_PAGE)
         category = None
     
     categories = Category.get_active_categories()
@@ -54,28 +68,80 @@ def posts():
                          category=category,
                          categories=categories)
 
+def archive_category():
+    """Get the category of an archive page from ``?category=<slug>`` (404 if unknown)."""
+    category_slug = request.args.get('category')
+    if not category_slug:
+        return None
+    
+    category = Category.get_category_by_slug(category_slug)
+    if not category:
+        abort(404)
+    return category
+
+@main_bp.route('/archive')
+@surrogate_cache.cacheable('posts', 'categories')
+def archive():
+    """Archive index listing every month with published posts."""
+    category = archive_category()
+    archive_months = ArchiveMonth.get_months(category.id if category else None)
+    
+    return render_template('main/archive.html',
+                         archive_months=archive_months,
+                         category=category,
+                         year=None,
+                         month=None,
+                         posts=None)
+
+@main_bp.route('/archive/<int:year>/<int:month>')
+@surrogate_cache.cacheable('posts', 'categories')
+def archive_month(year, month):
+    """Published posts of one month, optionally within a category."""
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        abort(404)
+    
+    category = archive_category()
+    category_id = category.id if category else None
+    page = request.args.get('page', 1, type=int)
+    
+    # The rollup row holds the total, so the page needs no COUNT query
+    total = ArchiveMonth.get_count(year, month, category_id)
+    if not total:
+        abort(404)
+    
+    posts = paginate(Post.archive_query(year, month, category_id=category_id),
+                     page=page, per_page=LISTING_PER_PAGE, total=total)
+    archive_months = ArchiveMonth.get_months(category_id)
+    
+    return render_template('main/archive.html',
+                         archive_months=archive_months,
+                         category=category,
+                         year=year,
+                         month=month,
+                         posts=posts)
+
 @main_bp.route('/post/<slug>')
 def post_detail(slug):
     """Individual post detail page."""
-    post = Post.query.filter_by(slug=slug, is_published=True).first()
+    post = Post.query.options(db.undefer(Post.content_html))\
+                     .filter_by(slug=slug, is_published=True).first()
     if not post:
         abort(404)
     
-    # Increment view count
-    post.increment_view_count()
+    # Increment view count (exported pages are rendered once, not viewed)
+    if not is_static_export():
+        post.increment_view_count()
     
     # Get related posts
-    related_posts = Post.query.filter(
-        Post.category_id == post.category_id,
-        Post.id != post.id,
-        Post.is_published == True
-    ).limit(3).all()
+    related_posts = Post.get_related_posts(post, limit=3)
     
     return render_template('main/post_detail.html',
                          post=post,
+                         content_html=post.get_content_html(),
                          related_posts=related_posts)
 
 @main_bp.route('/search')
+@surrogate_cache.cacheable('posts')
 def search():
     """Search posts."""
     query = request.args.get('q', '')
@@ -91,6 +157,7 @@ def search():
                          query=query)
 
 @main_bp.route('/author/<username>')
+@surrogate_cache.cacheable('posts')
 def author_posts(username):
     """Show posts by a specific author."""
     user = User.query.filter_by(username=username).first()
@@ -98,9 +165,8 @@ def author_posts(username):
         abort(404)
     
     page = request.args.get('page', 1, type=int)
-    posts = Post.query.filter_by(author_id=user.id, is_published=True)\
-                     .order_by(Post.created_at.desc())\
-                     .paginate(page=page, per_page=10, error_out=False)
+    posts = paginate(Post.published_query(author_id=user.id),
+                     page=page, per_page=LISTING_PER_PAGE)
     
     return render_template('main/author_posts.html',
                          user=user,
@@ -129,6 +195,7 @@ def create_post():
         # Generate slug from title
         from app.utils import generate_slug
         post.slug = generate_slug(post.title)
+        post.update_derived_fields()
         
         db.session.add(post)
         db.session.commit()
@@ -164,6 +231,7 @@ def edit_post(post_id):
         # Update slug if title changed
         from app.utils import generate_slug
         post.slug = generate_slug(post.title)
+        post.update_derived_fields()
         
         db.session.commit()
         
@@ -7,6 +7,26 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///app.db'
     
+    # Database engine (connection pool for server databases)
+    DB_POOL_SIZE = 5
+    DB_MAX_OVERFLOW = 10
+    DB_POOL_RECYCLE = 1800  # seconds
+    DB_POOL_PRE_PING = True
+    
+    # Read replicas (comma-separated URLs), each registered as a 'replica_N' bind
+    DATABASE_REPLICA_URLS = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+    REPLICA_HEALTH_CHECK_INTERVAL = 30  # seconds between probes of a replica
+    READ_YOUR_WRITES_SECONDS = 5  # keep a session on the primary after it writes
+    
+    # SQLite pragmas applied to every new connection
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,  # milliseconds
+        'mmap_size': 268435456,  # 256MB
+        'cache_size': -64000  # 64MB (negative values are KiB)
+    }
+    
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(hours=2)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
@@ -20,29 +40,126 @@ class Config:
     
     # Pagination
     POSTS_PER_PAGE = 10
+    PAGINATION_COUNT_TTL = 60  # seconds a listing's total is reused per filter signature
+    PAGINATION_ESTIMATE_THRESHOLD = 100000  # table rows above which totals are estimated (0 disables)
+    
+    # API
+    API_BATCH_MAX_SIZE = 20  # sub-requests per POST /api/v1/batch
+    
+    # Admin bulk moderation
+    BULK_ACTION_BATCH_SIZE = 500  # ids per UPDATE ... WHERE id IN (...)
+    
+    # Trending posts (hourly view buckets folded into time-decayed scores)
+    TRENDING_HALF_LIFE_HOURS = 24  # run flask trending rebuild after changing
+    TRENDING_BOARD_SIZE = 50  # top posts kept in memory per process
+    TRENDING_REFRESH_SECONDS = 60  # reload the in-memory board from the database
+    TRENDING_RETENTION_DAYS = 14  # hour buckets kept for rebuilds
+    
+    # Search suggestions (per-process prefix index at /api/v1/search/suggest)
+    TYPEAHEAD_REFRESH_SECONDS = 300  # background rebuild, picking up other workers' writes and view counts
+    TYPEAHEAD_CACHE_SIZE = 1024  # recent prefixes whose results are kept
+    
+    # Live stream of published posts (server-sent events at /api/v1/posts/stream)
+    POSTS_STREAM_POLL_SECONDS = 1.0  # each process polls the post_events log this often
+    POSTS_STREAM_BACKLOG = 100  # recent events kept in memory for reconnecting clients
+    POSTS_STREAM_HEARTBEAT_SECONDS = 15  # comment lines keeping idle connections open through proxies
+    POSTS_STREAM_MAX_SECONDS = 300  # streams end after this; browsers reconnect and resume
+    POSTS_STREAM_RETRY_MS = 3000  # browser reconnect delay
+    POSTS_STREAM_GAP_SECONDS = 60  # ids skipped by the poll cursor are looked for again this long (late commits)
+    # Open streams per worker process (gunicorn.conf.py sets it from the worker class);
+    # more clients get 503 and retry later, 0 turns the stream off
+    POSTS_STREAM_MAX_CLIENTS = int(os.environ.get('POSTS_STREAM_MAX_CLIENTS') or 1)
+    POSTS_STREAM_BUSY_RETRY_SECONDS = 30  # Retry-After of a 503 from a full worker
+    POSTS_STREAM_RETENTION_HOURS = 24  # events kept by flask posts prune-events
+    
+    # Background jobs
+    JOBS_BACKEND = os.environ.get('JOBS_BACKEND') or 'thread'  # 'thread', 'sqlite' or 'eager'
+    JOBS_WORKERS = 2
+    JOBS_MAX_QUEUE = 1000  # producers block, then run jobs inline, when full
+    JOBS_ENQUEUE_TIMEOUT = 0.5  # seconds
+    JOBS_MAX_RETRIES = 3
+    JOBS_RETRY_BACKOFF = 1.0  # seconds, doubled on each retry
+    JOBS_SHUTDOWN_TIMEOUT = 10  # seconds to drain on shutdown
+    JOBS_SQLITE_PATH = os.environ.get('JOBS_SQLITE_PATH') or 'instance/jobs.db'
+    JOBS_POLL_INTERVAL = 0.5  # seconds
+    JOBS_LEASE_SECONDS = 300
+    
+    # Reverse proxies in front of the app (nginx, load balancer) trusted for X-Forwarded-For/-Proto
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', 0))  # 0 uses the socket peer address
+    
+    # Rate limiting (token buckets shared by all worker processes)
+    RATELIMIT_ENABLED = os.environ.get('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    RATELIMIT_STORAGE = 'mmap'  # 'mmap' (shared file) or 'memory' (per process)
+    RATELIMIT_STORAGE_PATH = os.environ.get('RATELIMIT_STORAGE_PATH') or 'instance/ratelimit.bin'
+    RATELIMIT_SLOTS = 65536  # buckets in the shared table (24 bytes each)
+    
+    # Metrics (Prometheus text format at /metrics, aggregated over worker processes)
+    METRICS_ENABLED = True
+    METRICS_DIR = os.environ.get('METRICS_DIR') or 'instance/metrics'  # one file per process; wipe on server start
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # bearer token required to scrape, if set
+    
+    # Slow query log (JSON lines with EXPLAIN plans, aggregated at /admin/slow-queries)
+    SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.25))  # seconds; 0 disables
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG') or 'instance/slow_queries.log'  # each process writes slow_queries.<pid>.log
+    SLOW_QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUPS = 3
+    SLOW_QUERY_LOG_MAX_FILES = 20  # logs of exited worker processes kept for the admin page
+    SLOW_QUERY_EXPLAIN = True
+    
+    # Reverse-proxy caching (Surrogate-Key tagged responses, purged on writes)
+    CACHE_HEADERS_ENABLED = True
+    CACHE_MAX_AGE = 0  # browser seconds; the proxy is purged on writes, browsers are not
+    CACHE_SURROGATE_MAX_AGE = 86400  # proxy seconds
+    CACHE_SURROGATE_KEY_MAX_BYTES = 8000  # longer key lists are served uncached
+    CACHE_PURGE_BACKEND = os.environ.get('CACHE_PURGE_BACKEND') or 'none'  # 'none', 'log' or 'http'
+    CACHE_PURGE_LOG = os.environ.get('CACHE_PURGE_LOG') or 'instance/purges.log'
+    CACHE_PURGE_URLS = [url for url in os.environ.get('CACHE_PURGE_URLS', '').split(',') if url]
+    CACHE_PURGE_METHOD = os.environ.get('CACHE_PURGE_METHOD') or 'PURGE'
+    CACHE_PURGE_HEADER = os.environ.get('CACHE_PURGE_HEADER') or 'Surrogate-Key'  # 'xkey-purge' for Varnish xkey
+    CACHE_PURGE_TIMEOUT = 5  # seconds per purge request
+    
+    # Static site export (flask export-static)
+    STATIC_EXPORT_FOLDER = os.environ.get('STATIC_EXPORT_FOLDER') or 'static_export'
+    STATIC_EXPORT_STATE_DIR = os.environ.get('STATIC_EXPORT_STATE_DIR') or 'instance/static_export'  # outside the web root
     
     # Security
     WTF_CSRF_ENABLED = True
     WTF_CSRF_TIME_LIMIT = 3600  # 1 hour
+    
+    # Startup
+    AUTO_CREATE_TABLES = True  # Run db.create_all() on boot; migrations own the schema in production
+    LAZY_EXTENSIONS = False  # Only load CLI-only extensions (Flask-Migrate) when running under the flask CLI
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///dev.db'
+    DB_POOL_SIZE = 2
+    DB_MAX_OVERFLOW = 5
 
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///test.db'
+    JOBS_BACKEND = 'eager'
+    RATELIMIT_STORAGE = 'memory'
+    PAGINATION_COUNT_TTL = 0
     WTF_CSRF_ENABLED = False
+    CACHE_PURGE_BACKEND = 'log'
+    CACHE_PURGE_LOG = 'instance/test_purges.log'
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
     SESSION_COOKIE_SECURE = True
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Strict'
+    AUTO_CREATE_TABLES = False
+    LAZY_EXTENSIONS = True
 
 config = {
     'development': DevelopmentConfig,
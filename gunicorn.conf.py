@@ -0,0 +1,110 @@
+"""
+Gunicorn configuration for production.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden through the environment (see env.example).
+The app is preloaded in the master and workers are forked from it, so
+code and read-mostly data are shared copy-on-write. Workers are recycled
+after a jittered number of requests, so they do not all restart at once.
+"""
+import gc
+import os
+
+def cpu_count():
+    """Get the CPUs this process may run on (container CPU sets included)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - macOS, Windows
+        return os.cpu_count() or 1
+
+def env_int(name, default):
+    """Read an integer setting from the environment."""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+cores = cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# 'gthread' (default): a few processes with a thread pool each, suited to
+# I/O-bound request handling. 'gevent': cooperative greenlets for many
+# slow clients or long-lived responses. 'sync': one request per process.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so locks and sockets created at
+    # import time are cooperative in every worker
+    from gevent import monkey
+    monkey.patch_all()
+
+    workers = env_int('WEB_CONCURRENCY', cores)
+    worker_connections = env_int('GUNICORN_WORKER_CONNECTIONS', 1000)
+    # An idle stream is a parked greenlet
+    stream_clients = worker_connections // 2
+elif worker_class == 'gthread':
+    workers = env_int('WEB_CONCURRENCY', cores + 1)
+    threads = env_int('GUNICORN_THREADS', 4)
+    # Each open stream holds a thread; keep most of them for requests
+    stream_clients = threads // 4
+else:
+    workers = env_int('WEB_CONCURRENCY', cores * 2 + 1)
+    # A stream would hold the whole worker until the timeout kills it
+    stream_clients = 0
+
+# Read by config.py when the app loads
+if not os.environ.get('POSTS_STREAM_MAX_CLIENTS'):
+    os.environ['POSTS_STREAM_MAX_CLIENTS'] = str(stream_clients)
+
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+# Recycle workers to bound slow leaks; jitter spreads the restarts out
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+# Long enough for a worker to drain its background jobs (JOBS_SHUTDOWN_TIMEOUT)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 15)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+def _app():
+    """Get the Flask app (already loaded in the master when preloading)."""
+    from wsgi import app
+    return app
+
+def _fire(event):
+    """Run the app's lifecycle callbacks for an event."""
+    from app import lifecycle
+    lifecycle.fire(_app(), event)
+
+def when_ready(server):
+    """Master: the sockets are bound; no worker exists yet."""
+    # Inherited by the workers; server_ready callbacks that may run in
+    # several workers use it to act once per server run
+    os.environ['SERVER_PID'] = str(server.pid)
+    if not preload_app:
+        # The master never loads the app, so code reloads reach the workers
+        return
+
+    _fire('server_ready')
+    # Move everything allocated so far out of the collector's reach, so
+    # collections in the workers do not write to (and copy) shared pages
+    gc.collect()
+    gc.freeze()
+
+def post_fork(server, worker):
+    """Worker: runs right after the fork, before the worker serves requests."""
+    _fire('worker_start')
+
+def post_worker_init(worker):
+    """Worker: the app is loaded; without preloading, each worker prepares it itself."""
+    if not preload_app:
+        _fire('server_ready')
+
+def worker_exit(server, worker):
+    """Worker: runs as the worker exits (shutdown, reload or max_requests)."""
+    _fire('worker_exit')
\ No newline at end of file
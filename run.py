@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-Flask application entry point.
+Development server entry point (production: wsgi.py with gunicorn.conf.py).
 """
 import os
 from dotenv import load_dotenv
@@ -16,5 +16,5 @@ if __name__ == '__main__':
     app.run(
         host=os.getenv('FLASK_HOST', '0.0.0.0'),
         port=int(os.getenv('FLASK_PORT', 5000)),
-        debug=os.getenv('FLASK_DEBUG', 'True').lower() == 'true'
+        debug=os.getenv('FLASK_DEBUG', str(app.config['DEBUG'])).lower() == 'true'
     ) 
\ No newline at end of file
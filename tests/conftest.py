@@ -0,0 +1,39 @@
+"""
+Shared fixtures: an app on the testing config with fresh tables.
+"""
+import pytest
+from app import create_app, db
+from app.models import User
+
+@pytest.fixture
+def app():
+    """Application with empty tables, torn down after the test."""
+    app = create_app('testing')
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    """Test client of the app."""
+    return app.test_client()
+
+@pytest.fixture
+def user(app):
+    """A saved, active user."""
+    user = User(username='alice', email='alice@example.com')
+    user.set_password('secret')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def auth_client(client, user):
+    """Test client signed in as ``user`` through the session cookie."""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+    return client
\ No newline at end of file
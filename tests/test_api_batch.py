@@ -0,0 +1,59 @@
+"""
+Tests for the batch API endpoint.
+"""
+import pytest
+from flask import jsonify, request
+from flask_login import current_user
+from app import db
+from app.models import Category
+
+@pytest.fixture
+def probe(app):
+    """API view reporting who a sub-request runs as, and leaving a pending object behind."""
+    def whoami():
+        pending = len(db.session.new)
+        db.session.add(Category(name='Pending', slug='pending'))
+        return jsonify({
+            'user_id': current_user.id if current_user.is_authenticated else None,
+            'remote_addr': request.remote_addr,
+            'authorization': request.headers.get('Authorization'),
+            'has_cookie': 'Cookie' in request.headers,
+            'pending': pending
+        })
+    
+    app.add_url_rule('/api/v1/_whoami', 'api.test_whoami', whoami)
+
+def run_batch(client, *paths, **kwargs):
+    response = client.post('/api/v1/batch', json={'requests': [{'path': path} for path in paths]}, **kwargs)
+    assert response.status_code == 200
+    return response.get_json()['data']
+
+def test_subrequests_keep_client_identity(auth_client, user, probe):
+    results = run_batch(auth_client, '_whoami', '/api/v1/_whoami',
+                        headers={'Authorization': 'Bearer abc'},
+                        environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    
+    for result in results:
+        assert result['status_code'] == 200
+        body = result['body']
+        assert body['user_id'] == user.id
+        assert body['remote_addr'] == '203.0.113.7'
+        assert body['authorization'] == 'Bearer abc'
+        assert body['has_cookie']
+
+def test_subrequests_are_anonymous_for_anonymous_batches(client, user, probe):
+    result, = run_batch(client, '_whoami')
+    assert result['body']['user_id'] is None
+
+def test_session_is_rolled_back_between_subrequests(client, probe):
+    results = run_batch(client, '_whoami', '_whoami')
+    
+    assert [result['body']['pending'] for result in results] == [0, 0]
+    assert db.session.scalar(db.select(db.func.count(Category.id))) == 0
+
+def test_only_api_reads_are_dispatched(client):
+    results = client.post('/api/v1/batch', json={'requests': [
+        {'path': '/auth/login'}, {'path': 'posts', 'method': 'POST'}, {'path': 'batch'}
+    ]}).get_json()['data']
+    
+    assert [result['status_code'] for result in results] == [404, 405, 405]
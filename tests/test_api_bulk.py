@@ -0,0 +1,31 @@
+"""
+Tests for the validation of bulk moderation requests.
+"""
+import pytest
+from app import db
+
+@pytest.fixture
+def admin_client(auth_client, user):
+    user.is_admin = True
+    db.session.commit()
+    return auth_client
+
+@pytest.mark.parametrize('body, message', [
+    ([1, 2], 'The body must be a JSON object'),
+    ({'action': 'publish', 'filter': 'drafts'}, 'filter must be an object'),
+    ({'action': 'publish', 'filter': [{'status': 'draft'}]}, 'filter must be an object'),
+    ({'action': 'publish', 'ids': [True, False]}, 'ids must be a list of integers'),
+    ({'action': 'publish', 'ids': '1,2'}, 'ids must be a list of integers')
+])
+def test_malformed_bodies_are_rejected(admin_client, body, message):
+    response = admin_client.post('/api/v1/posts/bulk', json=body)
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
+
+def test_filter_values_of_the_wrong_type_are_ignored(admin_client):
+    response = admin_client.post('/api/v1/users/bulk',
+                                 json={'action': 'activate', 'filter': {'username': 5, 'active': False}})
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['updated'] == 0
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""
+Tests for the post listing API.
+"""
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import Category, Post, User
+
+@contextmanager
+def count_statements():
+    """Count the SQL statements run inside the block."""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+@pytest.fixture
+def make_posts(app):
+    """Create published posts, each with its own author and category."""
+    def make(count, start=0):
+        for i in range(start, start + count):
+            author = User(username=f'author{i}', email=f'author{i}@example.com')
+            category = Category(name=f'Category {i}', slug=f'category-{i}')
+            db.session.add(Post(title=f'Post {i}', slug=f'post-{i}', content=f'Body of post {i}',
+                                author=author, category=category, is_published=True))
+        db.session.commit()
+        db.session.expunge_all()
+    return make
+
+def listing_statements(client):
+    with count_statements() as statements:
+        response = client.get('/api/v1/posts?per_page=50')
+    assert response.status_code == 200
+    return len(statements), response.get_json()['data']['posts']
+
+def test_embedded_listing_runs_a_fixed_number_of_queries(app, client, make_posts):
+    make_posts(2)
+    few, posts = listing_statements(client)
+    assert len(posts) == 2
+    
+    make_posts(18, start=2)
+    many, posts = listing_statements(client)
+    assert len(posts) == 20
+    assert many == few
+    assert all(post['author']['username'] and post['category']['post_count'] == 1 for post in posts)
+
+def test_category_post_counts_exclude_drafts(app, client, make_posts):
+    make_posts(1)
+    draft = Post(title='Draft', slug='draft', content='Not yet', author_id=1, category_id=1, is_published=False)
+    db.session.add(draft)
+    db.session.commit()
+    
+    post, = client.get('/api/v1/posts').get_json()['data']['posts']
+    assert post['category']['post_count'] == 1
+    
+    categories = client.get('/api/v1/categories').get_json()['data']
+    assert categories[0]['post_count'] == 1
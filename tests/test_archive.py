@@ -0,0 +1,90 @@
+"""
+Tests for the monthly archive rollup kept by write-time deltas.
+"""
+from datetime import datetime
+import pytest
+from app import db
+from app.models import Category, Post
+from app.models.archive import ALL_CATEGORIES, ArchiveMonth, rebuild_archive
+from app.utils.moderation import run_bulk_action
+
+def rollup():
+    """Non-zero rollup rows as {(category_id, year, month): count}."""
+    return {(row.category_id, row.year, row.month): row.post_count
+            for row in ArchiveMonth.query if row.post_count}
+
+def assert_matches_recount():
+    """The incrementally maintained rollup equals a recount from the posts table."""
+    maintained = rollup()
+    with db.engine.begin() as connection:
+        rebuild_archive(connection)
+    db.session.expire_all()
+    assert maintained == rollup()
+
+@pytest.fixture
+def categories(app):
+    news, tips = Category(name='News', slug='news'), Category(name='Tips', slug='tips')
+    db.session.add_all([news, tips])
+    db.session.commit()
+    return news, tips
+
+def add_post(user, slug, category, created_at, is_published=True):
+    post = Post(title=slug, slug=slug, content='Body', author_id=user.id, category_id=category.id,
+                created_at=created_at, is_published=is_published)
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+def test_inserts_count_published_posts_only(user, categories):
+    news, tips = categories
+    add_post(user, 'a', news, datetime(2024, 1, 10))
+    add_post(user, 'b', tips, datetime(2024, 1, 20))
+    add_post(user, 'c', news, datetime(2024, 2, 1))
+    add_post(user, 'draft', news, datetime(2024, 2, 2), is_published=False)
+    
+    assert rollup() == {
+        (ALL_CATEGORIES, 2024, 1): 2, (ALL_CATEGORIES, 2024, 2): 1,
+        (news.id, 2024, 1): 1, (news.id, 2024, 2): 1, (tips.id, 2024, 1): 1
+    }
+    assert_matches_recount()
+
+def test_updates_and_deletes_move_counts(user, categories):
+    news, tips = categories
+    post = add_post(user, 'a', news, datetime(2024, 1, 10))
+    draft = add_post(user, 'draft', news, datetime(2024, 3, 1), is_published=False)
+    
+    draft.is_published = True
+    db.session.commit()
+    assert ArchiveMonth.get_count(2024, 3, news.id) == 1
+    
+    post.category_id = tips.id
+    db.session.commit()
+    assert ArchiveMonth.get_count(2024, 1, news.id) == 0
+    assert ArchiveMonth.get_count(2024, 1, tips.id) == 1
+    
+    post.created_at = datetime(2023, 12, 31)
+    db.session.commit()
+    assert ArchiveMonth.get_count(2024, 1) == 0
+    assert ArchiveMonth.get_count(2023, 12, tips.id) == 1
+    
+    draft.is_published = False
+    db.session.commit()
+    assert ArchiveMonth.get_count(2024, 3) == 0
+    
+    db.session.delete(post)
+    db.session.commit()
+    assert rollup() == {}
+    assert_matches_recount()
+
+def test_bulk_actions_recount_touched_months(user, categories):
+    news, _ = categories
+    ids = [add_post(user, f'p{i}', news, datetime(2024, 5, i + 1), is_published=False).id for i in range(3)]
+    
+    run_bulk_action('posts', 'publish', ids=ids[:2])
+    db.session.expire_all()
+    assert ArchiveMonth.get_count(2024, 5) == 2
+    
+    run_bulk_action('posts', 'unpublish', ids=ids[:1])
+    db.session.expire_all()
+    assert ArchiveMonth.get_count(2024, 5, news.id) == 1
+    assert_matches_recount()
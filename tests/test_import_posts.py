@@ -0,0 +1,74 @@
+"""
+Tests for ``flask import posts`` resuming after a crash.
+"""
+import json
+import pytest
+from app import db
+from app.models import Post
+from app.models.archive import ArchiveMonth
+
+RECORDS = 10
+BATCH_SIZE = 3
+
+class Crash(Exception):
+    """Stands in for the process dying mid-import."""
+
+@pytest.fixture
+def export_file(tmp_path, user):
+    """A JSON lines export of published posts by the test user."""
+    path = tmp_path / 'posts.jsonl'
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(RECORDS):
+            f.write(json.dumps({'title': f'Imported {i}', 'content': f'Body {i}', 'author': user.username,
+                                'is_published': True, 'created_at': '2024-03-05T10:00:00'}) + '\n')
+    return path
+
+def run_import(app, path):
+    return app.test_cli_runner().invoke(args=['import', 'posts', str(path), '--batch-size', str(BATCH_SIZE)])
+
+def crash_on_call(monkeypatch, target, name, call):
+    """Make the ``call``-th call of ``target.name`` raise ``Crash``."""
+    original = getattr(target, name)
+    calls = []
+    
+    def wrapper(*args, **kwargs):
+        calls.append(None)
+        if len(calls) == call:
+            raise Crash()
+        return original(*args, **kwargs)
+    
+    monkeypatch.setattr(target, name, wrapper)
+
+def assert_imported_once(path):
+    titles = [title for title, in db.session.query(Post.title)]
+    assert sorted(titles) == sorted(f'Imported {i}' for i in range(RECORDS))
+    assert ArchiveMonth.get_count(2024, 3) == RECORDS
+    assert not path.with_name(path.name + '.checkpoint').exists()
+
+def test_resume_after_crash_before_commit(app, export_file, monkeypatch):
+    import app.models.archive as archive
+    crash_on_call(monkeypatch, archive, 'apply_archive_deltas', 2)
+    
+    result = run_import(app, export_file)
+    assert isinstance(result.exception, Crash)
+    assert Post.query.count() == BATCH_SIZE
+    
+    monkeypatch.undo()
+    result = run_import(app, export_file)
+    assert result.exit_code == 0, result.output
+    assert 'rolled back' in result.output
+    assert_imported_once(export_file)
+
+def test_resume_after_crash_after_commit(app, export_file, monkeypatch):
+    from app.utils.importing import Checkpoint
+    crash_on_call(monkeypatch, Checkpoint, 'advance', 2)
+    
+    result = run_import(app, export_file)
+    assert isinstance(result.exception, Crash)
+    assert Post.query.count() == 2 * BATCH_SIZE
+    
+    monkeypatch.undo()
+    result = run_import(app, export_file)
+    assert result.exit_code == 0, result.output
+    assert 'committed' in result.output
+    assert_imported_once(export_file)
@@ -0,0 +1,39 @@
+"""
+Tests for rendered post content and the fields derived from it.
+"""
+from app import db
+from app.models import Post
+from app.utils.rendering import RENDERER_VERSION, html_text
+
+CONTENT = '''# Heading
+
+Some **bold** text with a [link](http://example.com) and `code`.
+
+<script>alert("x")</script>
+'''
+
+def test_html_text_drops_markup():
+    assert html_text('<p>One <em>two</em></p><p>three&amp;four</p>') == 'One two three&four'
+
+def test_summary_and_word_count_come_from_rendered_text(app, user):
+    post = Post(title='Markdown', slug='markdown', content=CONTENT, author_id=user.id)
+    post.update_derived_fields()
+    
+    assert post.summary.startswith('Heading Some bold text with a link and code')
+    assert '**' not in post.summary and '<' not in post.summary and '#' not in post.summary
+    assert post.word_count == len(html_text(post.content_html).split())
+    assert post.renderer_version == RENDERER_VERSION
+
+def test_rerender_recomputes_derived_fields(app, user):
+    db.session.add(Post(title='Stale', slug='stale', content=CONTENT, author_id=user.id,
+                        summary='# Heading **bold**', word_count=99, renderer_version=RENDERER_VERSION - 1))
+    db.session.commit()
+    
+    result = app.test_cli_runner().invoke(args=['posts', 'rerender', '--workers', '1'])
+    assert result.exit_code == 0, result.output
+    
+    db.session.expire_all()
+    post = Post.query.filter_by(slug='stale').one()
+    assert post.renderer_version == RENDERER_VERSION
+    assert post.summary.startswith('Heading Some bold text')
+    assert post.word_count < 99
@@ -0,0 +1,136 @@
+"""
+Tests for the live post stream: the per-worker client cap and the poller.
+"""
+from datetime import datetime
+import pytest
+from app import db
+from app.models import Post
+from app.models.post_event import PostEvent, prune
+
+@pytest.fixture
+def broadcaster(app):
+    broadcaster = app.extensions['post_stream']
+    broadcaster.max_clients = 1
+    yield broadcaster
+    broadcaster.shutdown()
+
+@pytest.fixture
+def poller(app):
+    """The broadcaster without its thread; tests poll it by hand."""
+    broadcaster = app.extensions['post_stream']
+    broadcaster.reset_after_fork()
+    broadcaster.poll_interval = 0.05
+    return broadcaster
+
+@pytest.fixture
+def post(user):
+    """A published post; publishing it logs event 1."""
+    post = Post(title='Hello', slug='hello', content='Body', author_id=user.id, is_published=True)
+    db.session.add(post)
+    db.session.commit()
+    return post
+
+def log_event(post, event_id):
+    """Log a publication under a chosen id, as a transaction that took it earlier would."""
+    with db.engine.begin() as connection:
+        connection.execute(PostEvent.__table__.insert().values(id=event_id, post_id=post.id,
+                                                               created_at=datetime.utcnow()))
+
+def publish(user, slug):
+    db.session.add(Post(title=slug, slug=slug, content='Body', author_id=user.id, is_published=True))
+    db.session.commit()
+
+def prune_all():
+    """Empty the log, as ``flask posts prune-events`` does after a quiet retention window."""
+    with db.engine.begin() as connection:
+        prune(connection, 0, now=datetime(2100, 1, 1))
+    assert PostEvent.query.count() == 0
+
+def read_ids(poller, position):
+    events, position = poller.wait(position, 0)
+    return [event_id for event_id, _ in events], position
+
+def open_stream(client):
+    response = client.get('/api/v1/posts/stream', buffered=False)
+    if response.status_code == 200:
+        assert next(response.response).startswith(b'retry:')
+    return response
+
+def test_streams_over_the_cap_get_503_with_retry_hint(app, client, broadcaster):
+    first = open_stream(client)
+    assert first.status_code == 200
+    assert broadcaster.clients == 1
+    
+    busy = open_stream(client)
+    assert busy.status_code == 503
+    assert busy.headers['Retry-After'] == str(app.config['POSTS_STREAM_BUSY_RETRY_SECONDS'])
+    assert busy.get_data(as_text=True).startswith('retry: ')
+    
+    first.close()
+    assert broadcaster.clients == 0
+    
+    again = open_stream(client)
+    assert again.status_code == 200
+    again.close()
+
+def test_streams_closed_before_sending_free_their_slot(client, broadcaster):
+    response = client.get('/api/v1/posts/stream', buffered=False)
+    assert response.status_code == 200
+    response.close()
+    assert broadcaster.clients == 0
+
+
+def test_ids_committed_after_the_cursor_passed_them_are_delivered(poller, post):
+    log_event(post, 3)
+    poller.poll()
+    ids, position = read_ids(poller, 0)
+    assert ids == [1, 3]
+    assert 2 in poller.gaps
+    
+    # The transaction holding id 2 commits after 3 was read
+    log_event(post, 2)
+    poller.poll()
+    ids, position = read_ids(poller, position)
+    assert ids == [2]
+    assert poller.gaps == {}
+    assert poller.cursor == 3
+    
+    # A client that last saw 3 missed 2, read after it
+    assert [event_id for event_id, _ in poller.replay(3)[0]] == [2]
+    assert [event_id for event_id, _ in poller.replay(1)[0]] == [3, 2]
+
+def test_skipped_ids_expire(poller, post):
+    poller.gap_seconds = 0
+    log_event(post, 3)
+    poller.poll()
+    poller.poll()
+    
+    assert poller.gaps == {}
+
+def test_publishing_after_a_full_prune_reaches_the_streams(poller, post, user):
+    poller.poll()
+    ids, position = read_ids(poller, 0)
+    assert ids == [1]
+    
+    prune_all()
+    publish(user, 'after-prune')
+    poller.poll()
+    
+    ids, position = read_ids(poller, position)
+    assert ids == [2]
+    assert poller.replay(1)[0][0][0] == 2
+
+def test_poller_rewinds_when_log_ids_restart_below_its_cursor(poller, post, user):
+    # A log table created without AUTOINCREMENT reuses the ids of a pruned log
+    poller.poll()
+    _, position = read_ids(poller, 0)
+    poller.cursor = poller.floor = 50
+    
+    publish(user, 'after-restart')
+    poller.poll()
+    
+    assert poller.cursor == 2
+    ids, position = read_ids(poller, position)
+    assert ids == [1, 2]
+    # A client that last saw an id from before the restart gets the new events
+    assert [event_id for event_id, _ in poller.replay(50)[0]] == [1, 2]
\ No newline at end of file
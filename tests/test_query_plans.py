@@ -0,0 +1,19 @@
+"""
+Query plan regression tests (the same checks as ``flask check-query-plans``).
+"""
+import pytest
+from app import db
+from app.utils.query_plans import check_query_plans, hot_queries
+
+@pytest.fixture
+def plans(app):
+    """Plan steps and offending steps of every hot query."""
+    return check_query_plans(db.metadata, hot_queries())
+
+def test_hot_queries_are_registered(plans):
+    assert 'Post.published_query()' in plans
+    assert any(name.startswith('admin posts(') for name in plans)
+
+def test_hot_queries_use_indexes(plans):
+    failures = {name: problems for name, (details, problems) in plans.items() if problems}
+    assert failures == {}
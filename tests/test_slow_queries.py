@@ -0,0 +1,40 @@
+"""
+Tests for the query plans captured by the slow query log.
+"""
+import sqlite3
+import pytest
+from app.utils.slow_queries import explain
+
+@pytest.fixture
+def connection():
+    """A DBAPI connection inside an open transaction with one pending row."""
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE posts (id INTEGER PRIMARY KEY, title TEXT)')
+    connection.commit()
+    connection.execute("INSERT INTO posts (title) VALUES ('pending')")
+    assert connection.in_transaction
+    yield connection
+    connection.close()
+
+def test_failed_explain_is_rolled_back_to_its_savepoint(connection):
+    # SQLite supports savepoints too, so the isolation used for server databases runs here
+    plan = explain('postgresql', connection, 'SELECT * FROM missing', ())
+
+    assert plan[0].startswith('EXPLAIN failed: OperationalError: no such table')
+    assert connection.in_transaction
+    assert connection.execute('SELECT title FROM posts').fetchall() == [('pending',)]
+    # The savepoint was released: the transaction commits as usual
+    connection.commit()
+    assert not connection.in_transaction
+
+def test_successful_explain_releases_its_savepoint(connection):
+    plan = explain('postgresql', connection, 'SELECT * FROM posts WHERE id = ?', (1,))
+
+    assert plan
+    with pytest.raises(sqlite3.OperationalError, match='no such savepoint'):
+        connection.execute('RELEASE SAVEPOINT slow_query_explain')
+
+def test_sqlite_plans_skip_the_savepoint(connection):
+    plan = explain('sqlite', connection, 'SELECT * FROM posts WHERE id = ?', (1,))
+
+    assert any('posts' in line for line in plan)
\ No newline at end of file
@@ -0,0 +1,150 @@
+"""
+Tests for the typeahead index kept current by committed ORM writes.
+"""
+import pytest
+from app import db, typeahead
+from app.models import Post, User
+from app.utils.typeahead import TypeaheadIndex
+
+def suggestions(client, query):
+    """Suggestions of the endpoint the live search calls on each keystroke."""
+    response = client.get('/api/v1/search/suggest', query_string={'q': query, 'limit': 8})
+    assert response.status_code == 200
+    return response.get_json()['data']['suggestions']
+
+def post_titles(client, query):
+    return [item['title'] for item in suggestions(client, query) if item['type'] == 'post']
+
+def assert_matches_rebuild(app):
+    """The incrementally updated index equals one built from the database."""
+    index = app.extensions['typeahead']
+    fresh = TypeaheadIndex(app)
+    fresh.build()
+    assert index.entries == fresh.entries
+    assert index.posts == fresh.posts
+    assert index.authors == fresh.authors
+    assert {prefix: top for prefix, top in index.short_tops.items() if top} == \
+           {prefix: top for prefix, top in fresh.short_tops.items() if top}
+
+@pytest.fixture
+def indexed(app, user):
+    """The app with its index built from one published post."""
+    db.session.add(Post(title='Flask tips', slug='flask-tips', content='Body', author_id=user.id,
+                        is_published=True, view_count=5))
+    db.session.commit()
+    typeahead.build(app)
+    return app
+
+def test_committed_posts_are_suggested_without_a_rebuild(indexed, client, user):
+    post = Post(title='Flask testing', slug='flask-testing', content='Body', author_id=user.id,
+                is_published=True, view_count=10)
+    db.session.add(post)
+    db.session.commit()
+
+    assert post_titles(client, 'fla') == ['Flask testing', 'Flask tips']
+    assert post_titles(client, 'flask te') == ['Flask testing']
+    assert post_titles(client, 'testing') == ['Flask testing']
+    assert_matches_rebuild(indexed)
+
+def test_renames_unpublishing_and_deletes_follow(indexed, client, user):
+    post = Post(title='Flask testing', slug='flask-testing', content='Body', author_id=user.id,
+                is_published=True)
+    db.session.add(post)
+    db.session.commit()
+
+    post.title = 'Django testing'
+    db.session.commit()
+    assert post_titles(client, 'fla') == ['Flask tips']
+    assert post_titles(client, 'djan') == ['Django testing']
+    assert_matches_rebuild(indexed)
+
+    post.is_published = False
+    db.session.commit()
+    assert post_titles(client, 'djan') == []
+    assert_matches_rebuild(indexed)
+
+    post.is_published = True
+    db.session.commit()
+    db.session.delete(post)
+    db.session.commit()
+    assert post_titles(client, 'djan') == []
+    assert_matches_rebuild(indexed)
+
+def test_authors_follow_their_published_posts(indexed, client, user):
+    bob = User(username='bob', email='bob@example.com')
+    bob.set_password('secret')
+    db.session.add(bob)
+    db.session.commit()
+    assert suggestions(client, 'bob') == []
+
+    post = Post(title='Notes', slug='notes', content='Body', author_id=bob.id, is_published=True)
+    db.session.add(post)
+    db.session.commit()
+    assert [item['username'] for item in suggestions(client, 'bob') if item['type'] == 'author'] == ['bob']
+    assert_matches_rebuild(indexed)
+
+    db.session.delete(post)
+    db.session.commit()
+    assert suggestions(client, 'bob') == []
+    assert_matches_rebuild(indexed)
+
+def test_rolled_back_changes_are_not_applied(indexed, client, user):
+    db.session.add(Post(title='Flask drafts', slug='flask-drafts', content='Body', author_id=user.id,
+                        is_published=True))
+    db.session.flush()
+    db.session.rollback()
+
+    assert post_titles(client, 'flask d') == []
+    assert_matches_rebuild(indexed)
+
+def author_names(client, query):
+    return [item['username'] for item in suggestions(client, query) if item['type'] == 'author']
+
+def test_deactivated_authors_are_not_suggested(indexed, client, user):
+    assert author_names(client, 'ali') == ['alice']
+    
+    user.is_active = False
+    db.session.commit()
+    assert author_names(client, 'ali') == []
+    assert post_titles(client, 'fla') == ['Flask tips']
+    assert_matches_rebuild(indexed)
+    
+    # Posts of an inactive author do not bring the author back
+    db.session.add(Post(title='More tips', slug='more-tips', content='Body', author_id=user.id,
+                        is_published=True))
+    db.session.commit()
+    assert author_names(client, 'ali') == []
+    assert_matches_rebuild(indexed)
+    
+    user.is_active = True
+    db.session.commit()
+    assert [item['post_count'] for item in suggestions(client, 'ali') if item['type'] == 'author'] == [2]
+    assert_matches_rebuild(indexed)
+
+def test_renamed_authors_and_new_authors_follow(indexed, client, user):
+    user.username = 'alicia'
+    db.session.commit()
+    assert author_names(client, 'alici') == ['alicia']
+    assert_matches_rebuild(indexed)
+    
+    carol = User(username='carol', email='carol@example.com')
+    carol.set_password('secret')
+    db.session.add(carol)
+    db.session.add(Post(title='Hello', slug='hello', content='Body', author=carol, is_published=True))
+    db.session.commit()
+    assert author_names(client, 'car') == ['carol']
+    assert_matches_rebuild(indexed)
+
+def test_admin_toggle_removes_the_author(indexed, client, user):
+    admin = User(username='root', email='root@example.com', is_admin=True)
+    admin.set_password('secret')
+    db.session.add(admin)
+    db.session.commit()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+        session['_fresh'] = True
+    
+    response = client.post(f'/admin/users/{user.id}/toggle-status')
+    assert response.status_code == 302
+    assert author_names(client, 'ali') == []
+    assert_matches_rebuild(indexed)
\ No newline at end of file
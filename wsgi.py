@@ -0,0 +1,14 @@
+"""
+Production WSGI entry point.
+
+Run with ``gunicorn -c gunicorn.conf.py wsgi:app`` (see gunicorn.conf.py).
+"""
+import os
+from dotenv import load_dotenv
+from app import create_app
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Create Flask application instance
+app = create_app(os.getenv('FLASK_ENV', 'production'))
\ No newline at end of file